@@ -0,0 +1,553 @@
+"""
+Local stand-ins for the Twitter API v2 and OpenAI chat completions endpoints.
+
+Both servers run on 127.0.0.1 in daemon threads and need no network. They
+inject latency drawn from a configurable distribution, random 5xx errors
+and (for Twitter) per-endpoint rate-limit windows that answer 429 once
+exhausted. The fake Twitter server also generates list tweets with Poisson
+arrivals and timestamps every reply, so tweet-to-reply latency can be
+measured end to end.
+"""
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from requests.adapters import HTTPAdapter
+
+from src.mock_data import MOCK_TWEETS, MOCK_USERS
+
+TWITTER_HOST = 'https://api.twitter.com'
+
+
+class LatencyModel:
+    """
+    Log-normal latency distribution described by its median and spread.
+    sigma=0 gives a constant latency.
+    """
+
+    def __init__(self, median: float = 0.0, sigma: float = 0.0, rng: random.Random = None):
+        self.median = median
+        self.sigma = sigma
+        self.rng = rng or random.Random()
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(self.sigma * self.rng.gauss(0, 1))
+
+    def sleep(self):
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+
+
+class RedirectAdapter(HTTPAdapter):
+    """
+    requests transport adapter that sends requests meant for one host to
+    another. tweepy hardcodes https://api.twitter.com, so mounting this on
+    tweepy.Client.session points the bot at a fake server.
+    """
+
+    def __init__(self, target: str, source: str = TWITTER_HOST, **kwargs):
+        super().__init__(**kwargs)
+        self.source = source
+        self.target = target.rstrip('/')
+
+    def send(self, request, **kwargs):
+        if request.url.startswith(self.source):
+            request.url = self.target + request.url[len(self.source):]
+        return super().send(request, **kwargs)
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    fake = None  # Set on the per-server subclass
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _send_json(self, status: int, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_chunked(self, content_type: str):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        self.fake.handle(self, 'GET')
+
+    def do_POST(self):
+        self.fake.handle(self, 'POST')
+
+    def do_DELETE(self):
+        self.fake.handle(self, 'DELETE')
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients closing keep-alive connections or cancelling streams are expected
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+class _FakeServer:
+    """Shared lifecycle for the fake HTTP servers"""
+
+    def start(self):
+        handler = type('Handler', (_JSONHandler,), {'fake': self})
+        self.server = _QuietHTTPServer(('127.0.0.1', 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _endpoint(method: str, path: str) -> str:
+    segments = path.split('/')
+    segments = [':id' if index > 1 and segment.isdigit() else segment for index, segment in enumerate(segments)]
+    return f"{method} {'/'.join(segments)}"
+
+
+class FakeTwitterServer(_FakeServer):
+    """
+    Fake Twitter API v2 covering the endpoints the bot uses: list tweets,
+    users lookup, list members, create tweet and the filtered stream with
+    its rules.
+    """
+
+    def __init__(self, arrival_rate: float = 1.0, latency: LatencyModel = None,
+                 error_rate: float = 0.0, rate_limits: dict = None, window: float = 900,
+                 referenced_fraction: float = 0.2, users: dict = None, seed: int = 0,
+                 initial_tweets: list = None):
+        """
+        Args:
+            arrival_rate (float): Mean new list tweets per second (Poisson arrivals)
+            latency (LatencyModel): Per-request latency
+            error_rate (float): Probability of answering 503 instead of serving a request
+            rate_limits (dict): Endpoint key -> requests per window, e.g.
+                {'GET /2/lists/:id/tweets': 900}; endpoints not listed are unlimited
+            window (float): Rate-limit window length in seconds
+            referenced_fraction (float): Share of generated tweets that are retweets/replies
+            users (dict): user_id -> {'id', 'username'}, defaults to MOCK_USERS
+            seed (int): Random seed, so runs are repeatable
+            initial_tweets (list): Tweets present before the first arrival, newest first
+        """
+        self.rng = random.Random(seed)
+        self.arrival_rate = arrival_rate
+        self.latency = latency or LatencyModel(rng=self.rng)
+        self.error_rate = error_rate
+        self.rate_limits = rate_limits or {}
+        self.window = window
+        self.referenced_fraction = referenced_fraction
+        self.users = users or MOCK_USERS
+        self.lock = threading.Lock()
+        self.tweets = [dict(tweet) for tweet in (initial_tweets if initial_tweets is not None else MOCK_TWEETS)]
+        self.created_at = {tweet['id']: time.monotonic() for tweet in self.tweets}
+        self.next_id = max([int(tweet['id']) for tweet in self.tweets] + [1872400000000000000]) + 1
+        self.next_arrival = None
+        self.calls = {}
+        self.windows = {}
+        self.replies = []
+        self.rate_limited = 0
+        self.errors = 0
+        self.stream_rules = {}
+        self.next_rule_id = 1
+        self.stream_heartbeat = 1.0  # Seconds between keep-alive newlines
+        self.stream_disconnect_after = None  # Close each stream connection after this many tweets
+        self.stream_connections = 0
+        self._stopping = threading.Event()
+
+    def start(self):
+        super().start()
+        self.next_arrival = time.monotonic() + self._interarrival()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        super().stop()
+
+    def _interarrival(self) -> float:
+        return self.rng.expovariate(self.arrival_rate) if self.arrival_rate > 0 else float('inf')
+
+    def add_tweet(self, text: str, author_id: str, referenced_tweets=None) -> dict:
+        """Post a tweet to the list immediately"""
+        with self.lock:
+            tweet = {
+                'id': str(self.next_id),
+                'text': text,
+                'author_id': author_id,
+                'referenced_tweets': referenced_tweets,
+            }
+            self.next_id += 1
+            self.tweets.insert(0, tweet)
+            self.created_at[tweet['id']] = time.monotonic()
+            return tweet
+
+    def _generate_arrivals(self):
+        now = time.monotonic()
+        author_ids = list(self.users)
+        while self.next_arrival is not None and self.next_arrival <= now:
+            referenced = None
+            if self.rng.random() < self.referenced_fraction:
+                referenced = [{'type': 'retweeted', 'id': '1'}]
+            number = self.next_id
+            tweet = {
+                'id': str(number),
+                'text': f"Benchmark tweet {number}: sharing a thought about shipping fast and measuring twice.",
+                'author_id': self.rng.choice(author_ids),
+                'referenced_tweets': referenced,
+            }
+            self.next_id += 1
+            self.tweets.insert(0, tweet)
+            self.created_at[tweet['id']] = self.next_arrival
+            self.next_arrival += self._interarrival()
+        del self.tweets[800:]  # The real endpoint only serves the newest 800
+
+    def _rate_limit(self, endpoint: str):
+        """Consume one request from the endpoint's window; returns headers and whether it is exhausted"""
+        limit = self.rate_limits.get(endpoint)
+        if limit is None:
+            return {}, False
+        now = time.time()
+        reset_at, used = self.windows.get(endpoint, (now + self.window, 0))
+        if now >= reset_at:
+            reset_at, used = now + self.window, 0
+        exhausted = used >= limit
+        if not exhausted:
+            used += 1
+        self.windows[endpoint] = (reset_at, used)
+        headers = {
+            'x-rate-limit-limit': limit,
+            'x-rate-limit-remaining': max(limit - used, 0),
+            'x-rate-limit-reset': int(math.ceil(reset_at)),
+        }
+        return headers, exhausted
+
+    def handle(self, handler: _JSONHandler, method: str):
+        parsed = urlparse(handler.path)
+        endpoint = _endpoint(method, parsed.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        body = handler._read_json() if method == 'POST' else {}
+
+        self.latency.sleep()
+        if method == 'GET' and parsed.path == '/2/tweets/search/stream':
+            with self.lock:
+                self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            self._stream(handler)
+            return
+        with self.lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            headers, exhausted = self._rate_limit(endpoint)
+            if exhausted:
+                self.rate_limited += 1
+                handler._send_json(429, {'title': 'Too Many Requests'}, headers)
+                return
+            if self.rng.random() < self.error_rate:
+                self.errors += 1
+                handler._send_json(503, {'title': 'Service Unavailable'}, headers)
+                return
+            status, payload = self._route(method, parsed.path, query, body)
+        handler._send_json(status, payload, headers)
+
+    def _route(self, method: str, path: str, query: dict, body: dict):
+        match = re.fullmatch(r'/2/lists/(\d+)/tweets', path)
+        if match and method == 'GET':
+            return 200, self._list_tweets(query)
+        match = re.fullmatch(r'/2/lists/(\d+)/members', path)
+        if match and method == 'GET':
+            return 200, self._page([self._user(user_id) for user_id in self.users], query)
+        if path == '/2/users' and method == 'GET':
+            ids = query.get('ids', '').split(',')
+            return 200, {'data': [self._user(user_id) for user_id in ids if user_id in self.users]}
+        match = re.fullmatch(r'/2/users/(\d+)', path)
+        if match and method == 'GET':
+            if match.group(1) not in self.users:
+                return 404, {'title': 'Not Found'}
+            return 200, {'data': self._user(match.group(1))}
+        if path == '/2/tweets' and method == 'POST':
+            return 201, self._create_tweet(body)
+        if path == '/2/tweets/search/stream/rules':
+            if method == 'GET':
+                rules = list(self.stream_rules.values())
+                return 200, {'data': rules, 'meta': {'result_count': len(rules)}} if rules else {'meta': {'result_count': 0}}
+            if method == 'POST':
+                return 200, self._update_rules(body)
+        return 404, {'title': 'Not Found'}
+
+    def _update_rules(self, body: dict) -> dict:
+        for rule_id in (body.get('delete') or {}).get('ids', []):
+            self.stream_rules.pop(rule_id, None)
+        added = []
+        for rule in body.get('add') or []:
+            rule = {'id': str(self.next_rule_id), 'value': rule['value'], 'tag': rule.get('tag')}
+            self.next_rule_id += 1
+            self.stream_rules[rule['id']] = rule
+            added.append(rule)
+        return {'data': added, 'meta': {'summary': {'created': len(added)}}}
+
+    def _matching_rules(self, tweet: dict) -> list:
+        username = self.users.get(tweet['author_id'], {}).get('username')
+        return [
+            {'id': rule['id'], 'tag': rule['tag']}
+            for rule in self.stream_rules.values()
+            if username and username.lower() in (name.lower() for name in re.findall(r'from:(\w+)', rule['value']))
+        ]
+
+    def _stream(self, handler: _JSONHandler):
+        """
+        Filtered stream: emits tweets that arrive after the connection opens
+        and match a from: rule as chunked JSON lines, with keep-alive newlines
+        in between
+        """
+        handler.close_connection = True
+        with self.lock:
+            self.stream_connections += 1
+            first_id = self.next_id
+        handler._start_chunked('application/json')
+        seen = set()
+        delivered = 0
+        last_write = time.monotonic()
+        try:
+            while not self._stopping.is_set():
+                with self.lock:
+                    self._generate_arrivals()
+                    messages = []
+                    for tweet in reversed(self.tweets):  # Oldest first
+                        if int(tweet['id']) < first_id or tweet['id'] in seen:
+                            continue
+                        seen.add(tweet['id'])
+                        rules = self._matching_rules(tweet)
+                        if rules:
+                            messages.append({
+                                'data': self._tweet_payload(tweet),
+                                'includes': {'users': [self._user(tweet['author_id'])]},
+                                'matching_rules': rules,
+                            })
+                for message in messages:
+                    handler._write_chunk(json.dumps(message).encode('utf-8') + b'\r\n')
+                    last_write = time.monotonic()
+                    delivered += 1
+                    if self.stream_disconnect_after and delivered >= self.stream_disconnect_after:
+                        handler._end_chunked()  # Simulated disconnect
+                        return
+                if time.monotonic() - last_write >= self.stream_heartbeat:
+                    handler._write_chunk(b'\r\n')
+                    last_write = time.monotonic()
+                time.sleep(0.01)
+            handler._end_chunked()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _user(self, user_id: str) -> dict:
+        user = self.users[user_id]
+        return {'id': user['id'], 'name': user['username'], 'username': user['username']}
+
+    def _page(self, items: list, query: dict) -> dict:
+        size = int(query.get('max_results', 100))
+        start = int(query.get('pagination_token') or 0)
+        page = items[start:start + size]
+        meta = {'result_count': len(page)}
+        if start + size < len(items):
+            meta['next_token'] = str(start + size)
+        return {'data': page, 'meta': meta}
+
+    def _tweet_payload(self, tweet: dict) -> dict:
+        payload = {'id': tweet['id'], 'text': tweet['text'], 'author_id': tweet['author_id'], 'edit_history_tweet_ids': [tweet['id']]}
+        created_at = self.created_at.get(tweet['id'])
+        if created_at is not None:
+            posted = datetime.fromtimestamp(time.time() - (time.monotonic() - created_at), timezone.utc)
+            payload['created_at'] = posted.strftime('%Y-%m-%dT%H:%M:%S.') + f"{posted.microsecond // 1000:03d}Z"
+        if tweet['referenced_tweets']:
+            payload['referenced_tweets'] = tweet['referenced_tweets']
+        return payload
+
+    def _list_tweets(self, query: dict) -> dict:
+        self._generate_arrivals()
+        response = self._page([self._tweet_payload(tweet) for tweet in self.tweets], query)
+        authors = dict.fromkeys(tweet['author_id'] for tweet in response['data'])
+        response['includes'] = {'users': [self._user(author_id) for author_id in authors if author_id in self.users]}
+        return response
+
+    def _create_tweet(self, body: dict) -> dict:
+        in_reply_to = (body.get('reply') or {}).get('in_reply_to_tweet_id')
+        posted_at = time.monotonic()
+        created_at = self.created_at.get(in_reply_to)
+        self.replies.append({
+            'in_reply_to_tweet_id': in_reply_to,
+            'text': body.get('text', ''),
+            'latency': posted_at - created_at if created_at is not None else None,
+        })
+        tweet_id = str(self.next_id)
+        self.next_id += 1
+        return {'data': {'id': tweet_id, 'text': body.get('text', ''), 'edit_history_tweet_ids': [tweet_id]}}
+
+    def api_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+class FakeOpenAIServer(_FakeServer):
+    """
+    Fake OpenAI chat completions endpoint supporting plain, streamed (SSE)
+    and JSON-mode batch requests.
+    """
+
+    REPLY = ("Thanks for sharing this, it is a genuinely interesting point. "
+             "Measuring before optimising has saved many teams from chasing the wrong bottleneck. "
+             "Curious to hear how it works out for you over the next few weeks!")
+
+    def __init__(self, latency: LatencyModel = None, token_delay: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        """
+        Args:
+            latency (LatencyModel): Time to first token
+            token_delay (float): Seconds between streamed tokens (and per token when not streaming)
+            error_rate (float): Probability of answering 500
+            seed (int): Random seed
+        """
+        self.rng = random.Random(seed)
+        self.latency = latency or LatencyModel(rng=self.rng)
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.cancelled_streams = 0
+        self.completion_tokens = 0
+
+    def handle(self, handler: _JSONHandler, method: str):
+        if method != 'POST' or not urlparse(handler.path).path.endswith('/chat/completions'):
+            handler._send_json(404, {'error': {'message': 'Not found'}})
+            return
+        request = handler._read_json()
+        with self.lock:
+            self.calls += 1
+            failed = self.rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        self.latency.sleep()
+        if failed:
+            handler._send_json(500, {'error': {'message': 'Injected failure', 'type': 'server_error'}})
+            return
+
+        content = self._content(request)
+        tokens = re.findall(r'\S+\s*', content)
+        if request.get('max_tokens'):
+            tokens = tokens[:request['max_tokens']]
+            content = ''.join(tokens)
+        if request.get('stream'):
+            self._stream(handler, request, tokens)
+            return
+        if self.token_delay:
+            time.sleep(self.token_delay * len(tokens))
+        with self.lock:
+            self.completion_tokens += len(tokens)
+        handler._send_json(200, {
+            'id': f'chatcmpl-{self.calls}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'gpt-3.5-turbo'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': self._usage(request, len(tokens)),
+        })
+
+    def _content(self, request: dict) -> str:
+        if (request.get('response_format') or {}).get('type') == 'json_object':
+            user_message = request['messages'][-1]['content']
+            numbers = [int(number) for number in re.findall(r'^(\d+)\. ', user_message, re.MULTILINE)]
+            return json.dumps({'replies': [
+                {'id': number, 'reply': self.REPLY.split('. ')[0] + '.'} for number in numbers
+            ]})
+        return self.REPLY
+
+    def _usage(self, request: dict, completion_tokens: int) -> dict:
+        prompt_tokens = sum(len(message.get('content', '')) for message in request.get('messages', [])) // 4
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+        }
+
+    def _stream(self, handler: _JSONHandler, request: dict, tokens: list):
+        handler._start_chunked('text/event-stream')
+        sent = 0
+        try:
+            for token in tokens:
+                chunk = {
+                    'id': f'chatcmpl-{self.calls}',
+                    'object': 'chat.completion.chunk',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'gpt-3.5-turbo'),
+                    'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}],
+                }
+                handler._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                sent += 1
+                if self.token_delay:
+                    time.sleep(self.token_delay)
+            if (request.get('stream_options') or {}).get('include_usage'):
+                chunk = {
+                    'id': f'chatcmpl-{self.calls}',
+                    'object': 'chat.completion.chunk',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'gpt-3.5-turbo'),
+                    'choices': [],
+                    'usage': self._usage(request, len(tokens)),
+                }
+                handler._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            handler._write_chunk(b"data: [DONE]\n\n")
+            handler._end_chunked()
+        except (BrokenPipeError, ConnectionResetError):
+            with self.lock:
+                self.cancelled_streams += 1
+        finally:
+            with self.lock:
+                self.completion_tokens += sent
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Offline load test: runs TwitterBot against the local fake Twitter and
+OpenAI servers and reports tweet-to-reply latency, replies per second and
+API calls per reply.
+
+    python -m benchmarks.load_test --mode async --duration 20 --arrival-rate 2
+    python -m benchmarks.load_test --save-baseline baseline.json
+    python -m benchmarks.load_test --baseline baseline.json
+
+With --baseline the report is compared against a previous run, so every
+performance change can be judged against the same workload.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from benchmarks.fakes import FakeOpenAIServer, FakeTwitterServer, LatencyModel, RedirectAdapter, TWITTER_HOST
+
+FAKE_CREDENTIALS = {
+    'BearerToken': 'bench-bearer',
+    'APIkey': 'bench-key',
+    'apiSecretkey': 'bench-secret',
+    'AccessToken': 'bench-token',
+    'AccessTokenSecret': 'bench-token-secret',
+}
+
+
+def _percentile(values: list, quantile: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(quantile * len(values)), len(values) - 1)]
+
+
+def point_bot_at(bot, twitter: FakeTwitterServer, openai_server: FakeOpenAIServer):
+    """Route a bot's Twitter and OpenAI traffic to the fake servers"""
+    from src import llm
+
+    bot.client.session.mount(TWITTER_HOST, RedirectAdapter(twitter.url))
+    llm.client = OpenAI(api_key='bench', base_url=f"{openai_server.url}/v1", max_retries=0)
+    llm.OPENAI_API_KEY = 'bench'
+
+
+def run_load_test(mode: str = 'async', duration: float = 10, interval: float = 1.0,
+                  arrival_rate: float = 2.0, twitter_latency: float = 0.02,
+                  openai_latency: float = 0.3, latency_sigma: float = 0.3,
+                  token_delay: float = 0.005, twitter_error_rate: float = 0.0,
+                  openai_error_rate: float = 0.0, list_rate_limit: int = None,
+                  rate_limit_window: float = 900, generate_concurrency: int = 4,
+                  seed: int = 0) -> dict:
+    """
+    Run one load test and return its report
+    Args:
+        mode (str): 'async' for TweetPipeline, 'sync' for monitor_list_tweets
+        duration (float): Seconds of polling
+        interval (float): Base poll interval
+        arrival_rate (float): New list tweets per second
+        twitter_latency (float): Median Twitter request latency in seconds
+        openai_latency (float): Median OpenAI time to first token in seconds
+        latency_sigma (float): Log-normal spread applied to both latencies
+        token_delay (float): Seconds per generated token
+        twitter_error_rate (float): Probability of a Twitter 503
+        openai_error_rate (float): Probability of an OpenAI 500
+        list_rate_limit (int): Requests per window for the list tweets endpoint
+        rate_limit_window (float): Rate-limit window length in seconds
+        generate_concurrency (int): Concurrent LLM calls in async mode
+        seed (int): Random seed for arrivals, latencies and errors
+    Returns:
+        dict: Report with latency percentiles, throughput and API call counts
+    """
+    from src import llm
+    from src.usage import usage
+    from src.bot import TwitterBot, create_twitter_client
+    from src.pipeline import TweetPipeline
+
+    rate_limits = {'GET /2/lists/:id/tweets': list_rate_limit} if list_rate_limit else {}
+    twitter = FakeTwitterServer(
+        arrival_rate=arrival_rate,
+        latency=LatencyModel(twitter_latency, latency_sigma),
+        error_rate=twitter_error_rate,
+        rate_limits=rate_limits,
+        window=rate_limit_window,
+        seed=seed,
+    )
+    openai_server = FakeOpenAIServer(
+        latency=LatencyModel(openai_latency, latency_sigma),
+        token_delay=token_delay,
+        error_rate=openai_error_rate,
+        seed=seed,
+    )
+
+    original_client, original_key = llm.client, llm.OPENAI_API_KEY
+    usage.reset()
+    with twitter, openai_server:
+        with patch.dict(os.environ, FAKE_CREDENTIALS):
+            bot = TwitterBot(client=create_twitter_client())  # Its own session, redirected below
+        bot.max_daily_replies = 10 ** 6  # Measure throughput, not the quota
+        bot.scheduler.min_interval = min(bot.scheduler.min_interval, interval)
+        point_bot_at(bot, twitter, openai_server)
+        cycles = max(int(duration / interval), 1)
+        list_id = '1872292999155040454'
+
+        start = time.monotonic()
+        try:
+            if mode == 'async':
+                pipeline = TweetPipeline(bot, list_id, interval=interval, generate_concurrency=generate_concurrency)
+                asyncio.run(pipeline.run(max_cycles=cycles))
+            else:
+                bot.monitor_list_tweets(list_id, interval=interval, max_cycles=cycles)
+        finally:
+            llm.client, llm.OPENAI_API_KEY = original_client, original_key
+        elapsed = time.monotonic() - start
+
+    latencies = [reply['latency'] for reply in twitter.replies if reply['latency'] is not None]
+    replies = len(twitter.replies)
+    api_calls = twitter.api_calls() + openai_server.calls
+    llm_usage = usage.report()
+    return {
+        'mode': mode,
+        'elapsed_seconds': round(elapsed, 3),
+        'replies': replies,
+        'replies_per_second': round(replies / elapsed, 3) if elapsed else 0.0,
+        'reply_latency_p50': round(_percentile(latencies, 0.5), 3),
+        'reply_latency_p95': round(_percentile(latencies, 0.95), 3),
+        'reply_latency_p99': round(_percentile(latencies, 0.99), 3),
+        'twitter_calls': dict(twitter.calls),
+        'openai_calls': openai_server.calls,
+        'api_calls_per_reply': round(api_calls / replies, 3) if replies else None,
+        'rate_limited': twitter.rate_limited,
+        'twitter_errors': twitter.errors,
+        'openai_errors': openai_server.errors,
+        'completion_tokens': openai_server.completion_tokens,
+        'prompt_tokens_per_reply': llm_usage['prompt_tokens_per_reply'],
+        'completion_tokens_per_reply': llm_usage['completion_tokens_per_reply'],
+        'llm_cost_per_reply': llm_usage['cost_per_reply'],
+    }
+
+
+def compare(report: dict, baseline: dict) -> str:
+    """Format the change of each numeric metric relative to a baseline report"""
+    lines = [f"{'metric':<24}{'baseline':>12}{'current':>12}{'change':>10}"]
+    for key, current in report.items():
+        previous = baseline.get(key)
+        if not isinstance(current, (int, float)) or not isinstance(previous, (int, float)):
+            continue
+        change = f"{(current - previous) / previous * 100:+.1f}%" if previous else 'n/a'
+        lines.append(f"{key:<24}{previous:>12}{current:>12}{change:>10}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline TwitterBot load test')
+    parser.add_argument('--mode', choices=['async', 'sync'], default='async')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--arrival-rate', type=float, default=2.0)
+    parser.add_argument('--twitter-latency', type=float, default=0.02)
+    parser.add_argument('--openai-latency', type=float, default=0.3)
+    parser.add_argument('--latency-sigma', type=float, default=0.3)
+    parser.add_argument('--token-delay', type=float, default=0.005)
+    parser.add_argument('--twitter-error-rate', type=float, default=0.0)
+    parser.add_argument('--openai-error-rate', type=float, default=0.0)
+    parser.add_argument('--list-rate-limit', type=int, default=None)
+    parser.add_argument('--rate-limit-window', type=float, default=900)
+    parser.add_argument('--generate-concurrency', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save-baseline', help='Write the report to this JSON file')
+    parser.add_argument('--baseline', help='Compare the report with this JSON file')
+    args = parser.parse_args(argv)
+
+    options = {key: value for key, value in vars(args).items() if key not in ('save_baseline', 'baseline')}
+    report = run_load_test(**options)
+    print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print(compare(report, json.load(f)))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Tweet ingestion microbenchmark: decodes list tweet pages the way tweepy
+does (json plus Tweet objects) and straight into TweetRecords (with json
+and, when installed, orjson), and reports decode throughput and the memory
+each decoded tweet keeps alive, plus the cost of a processed tweet ID.
+
+    python -m benchmarks.records --tweets 20000
+    python -m benchmarks.records --save-baseline records.json
+    python -m benchmarks.records --baseline records.json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tweepy
+
+from benchmarks.load_test import compare
+from src.records import TweetPage, orjson
+from src.state import ProcessedTweets
+
+PAGE_SIZE = 100  # max_results of the list tweets endpoint
+
+
+def make_pages(tweets: int, seed: int = 0) -> list:
+    """
+    Build raw list tweet pages shaped like the API's, with the fields the bot requests
+    Returns:
+        list: JSON bodies (bytes) of PAGE_SIZE tweets each
+    """
+    rng = random.Random(seed)
+    words = ['latency', 'queue', 'release', 'python', 'profiling', 'cache', 'shipped', 'today', 'team', 'tail']
+    pages = []
+    for start in range(0, tweets, PAGE_SIZE):
+        data = []
+        for i in range(start, min(start + PAGE_SIZE, tweets)):
+            tweet_id = str(1872400000000000000 + i)
+            data.append({
+                'id': tweet_id,
+                'edit_history_tweet_ids': [tweet_id],
+                'text': ' '.join(rng.choice(words) for _ in range(rng.randint(8, 40))) + ' https://t.co/abcdef',
+                'author_id': str(1001 + rng.randrange(50)),
+                'created_at': '2024-12-30T12:%02d:%02d.000Z' % (i // 60 % 60, i % 60),
+                'lang': 'en',
+                'public_metrics': {'retweet_count': rng.randrange(20), 'reply_count': rng.randrange(10),
+                                   'like_count': rng.randrange(200), 'quote_count': rng.randrange(5),
+                                   'bookmark_count': 0, 'impression_count': rng.randrange(5000)},
+            })
+        users = [{'id': str(1001 + n), 'name': f'User {n}', 'username': f'user_{n}'} for n in range(50)]
+        pages.append(json.dumps({
+            'data': data, 'includes': {'users': users},
+            'meta': {'result_count': len(data), 'next_token': f'token{start}'},
+        }).encode('utf-8'))
+    return pages
+
+
+def _tweepy_decoder():
+    client = tweepy.Client()
+
+    def decode(payload):
+        return client._construct_response(json.loads(payload), data_type=tweepy.Tweet)
+    return decode
+
+
+def decoders() -> dict:
+    """Name -> function decoding one page body into the objects the bot keeps"""
+    paths = {
+        'tweepy': _tweepy_decoder(),
+        'records_json': lambda payload: TweetPage.decode(payload, json.loads),
+    }
+    if orjson is not None:
+        paths['records_orjson'] = lambda payload: TweetPage.decode(payload, orjson.loads)
+    return paths
+
+
+def measure_throughput(decode, pages: list, repeat: int = 3) -> float:
+    """Best of repeat runs, in tweets decoded per second"""
+    tweets = sum(len(json.loads(page)['data']) for page in pages)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            decode(page)
+        best = min(best, time.perf_counter() - start)
+    return tweets / best
+
+
+def measure_memory(decode, pages: list) -> float:
+    """Bytes still allocated per tweet while every decoded tweet is kept"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [tweet for page in pages for tweet in decode(page).data]
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / len(kept)
+
+
+def measure_dedup_memory(count: int = 10000) -> dict:
+    """Bytes per processed tweet ID kept as strings, as before, and in ProcessedTweets"""
+    ids = [1872400000000000000 + i for i in range(count)]
+    report = {}
+    for name, build in (('dedup_str', lambda: OrderedDict.fromkeys(str(tweet_id) for tweet_id in ids)),
+                        ('dedup_int', lambda: ProcessedTweets((str(tweet_id) for tweet_id in ids), maxlen=count))):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            kept = build()
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        report[f'{name}_bytes_per_id'] = round((after - before) / len(kept), 1)
+    return report
+
+
+def run_records_benchmark(tweets: int = 20000, repeat: int = 3, seed: int = 0) -> dict:
+    """
+    Compare the decode paths
+    Args:
+        tweets (int): Tweets to decode per run
+        repeat (int): Timed runs per path; the best counts
+        seed (int): Random seed for the synthetic tweets
+    Returns:
+        dict: Tweets per second and bytes per tweet of each path
+    """
+    pages = make_pages(tweets, seed)
+    report = {'tweets': tweets, 'orjson': orjson is not None}
+    for name, decode in decoders().items():
+        report[f'{name}_tweets_per_second'] = round(measure_throughput(decode, pages, repeat))
+        report[f'{name}_bytes_per_tweet'] = round(measure_memory(decode, pages), 1)
+    report.update(measure_dedup_memory(min(tweets, 10000)))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tweet decoding and memory microbenchmark')
+    parser.add_argument('--tweets', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save-baseline', help='Write the report to this JSON file')
+    parser.add_argument('--baseline', help='Compare the report with this JSON file')
+    args = parser.parse_args(argv)
+
+    report = run_records_benchmark(args.tweets, args.repeat, args.seed)
+    print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print(compare(report, json.load(f)))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: measures, in a fresh interpreter, how long it takes to
+import the bot, construct the first TwitterBot and rebuild it the way
+run_continuous does after a crash, and whether importing touched the disk
+or construction imported the OpenAI SDK.
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --save-baseline startup.json
+    python -m benchmarks.startup --baseline startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.load_test import FAKE_CREDENTIALS, compare
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter, so nothing is warm from the parent
+PROBE = r'''
+import json, os, sys, time
+start = time.perf_counter()
+from src.bot import TwitterBot
+imported = time.perf_counter()
+logs_created = os.path.exists(os.environ['BOT_LOG_DIR'])
+bot = TwitterBot()
+constructed = time.perf_counter()
+restarted_bot = TwitterBot(state_store=bot.state_store, reply_cache=bot.reply_cache)
+restarted = time.perf_counter()
+print(json.dumps({
+    'import_seconds': imported - start,
+    'construct_seconds': constructed - imported,
+    'restart_seconds': restarted - constructed,
+    'client_shared': restarted_bot.client is bot.client,
+    'openai_imported': 'openai' in sys.modules,
+    'logs_created_on_import': logs_created,
+}))
+'''
+
+
+def measure_once() -> dict:
+    """Run the probe in a new interpreter and return its measurements"""
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, **FAKE_CREDENTIALS)
+        env.update(PYTHONPATH=ROOT, BOT_LOG_DIR=os.path.join(workdir, 'logs'))
+        env.setdefault('OPENAI_API_KEY', 'bench')
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE], cwd=workdir, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_startup_benchmark(runs: int = 5) -> dict:
+    """
+    Measure startup several times and report the median of each timing
+    Args:
+        runs (int): Number of fresh interpreters to start
+    Returns:
+        dict: Median timings in milliseconds and the flags of the last run
+    """
+    samples = [measure_once() for _ in range(runs)]
+    report = {'runs': runs}
+    for key in ('import_seconds', 'construct_seconds', 'restart_seconds'):
+        values = sorted(sample[key] for sample in samples)
+        report[key.replace('_seconds', '_ms')] = round(values[len(values) // 2] * 1000, 2)
+    for key in ('client_shared', 'openai_imported', 'logs_created_on_import'):
+        report[key] = samples[-1][key]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='TwitterBot startup benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--save-baseline', help='Write the report to this JSON file')
+    parser.add_argument('--baseline', help='Compare the report with this JSON file')
+    args = parser.parse_args(argv)
+
+    report = run_startup_benchmark(args.runs)
+    print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print(compare(report, json.load(f)))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -1,170 +1,645 @@
+import asyncio
+import threading
 import tweepy
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 import sys
 import os
 import time
+from contextlib import nullcontext
+from requests.adapters import HTTPAdapter
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.llm import generate_response
-from src.logger import setup_logger
+from src.cache import TTLCache
+from src.filters import TweetFilter
+from src.llm import PROMPT_VERSION, generate_response, generate_responses
+from src.logger import HIGH_VOLUME, log_context, setup_logger
+from src.membership import ListMembership
+from src.metrics import metrics
+from src.priority import ReplyQueue
+from src.prompt import reply_char_limit
+from src.quota import ReplyQuota
+from src.records import TweetPage, to_record
+from src.reply_cache import ReplyCache
+from src.scheduler import LIST_TWEETS_ENDPOINT, PollScheduler
+from src.state import MemoryStateStore, ProcessedTweets, StateStore
+from src.usage import usage
 
 logger = setup_logger('twitter_bot')
 
+# Environment variables holding the OAuth 1.0a credentials, in tweepy.Client argument order
+CREDENTIAL_VARS = ('BearerToken', 'APIkey', 'apiSecretkey', 'AccessToken', 'AccessTokenSecret')
+
+_twitter_clients = {}
+_twitter_clients_lock = threading.Lock()
+
+LIST_TWEETS_PARAMETERS = (
+    'expansions', 'max_results', 'media.fields', 'pagination_token', 'place.fields', 'poll.fields',
+    'tweet.fields', 'user.fields'
+)
+
+class TwitterClient(tweepy.Client):
+    """
+    tweepy.Client whose list tweet pages skip tweepy's object model: the
+    raw body is decoded (with orjson when installed) straight into
+    TweetRecords. This is the endpoint polled every cycle; the rest of the
+    API is unchanged.
+    """
+
+    def get_list_tweets(self, id, *, user_auth=False, **params):
+        if self.return_type is not tweepy.Response:
+            return super().get_list_tweets(id, user_auth=user_auth, **params)
+        response = self.request(
+            'GET', f"/2/lists/{id}/tweets",
+            params=self._process_params(params, LIST_TWEETS_PARAMETERS), user_auth=user_auth
+        )
+        return TweetPage.decode(response.content)
+
+def create_twitter_client(pool_maxsize: int = 16) -> tweepy.Client:
+    """
+    Create a Twitter API client with OAuth 1.0a credentials from the environment
+    Args:
+        pool_maxsize (int): Keep-alive connections kept per host, enough for
+            the worker pools and pipeline stages to share the session
+    Returns:
+        tweepy.Client: A new client
+    """
+    bearer_token, consumer_key, consumer_secret, access_token, access_token_secret = (
+        os.getenv(name) for name in CREDENTIAL_VARS
+    )
+    client = TwitterClient(
+        bearer_token=bearer_token,
+        consumer_key=consumer_key,
+        consumer_secret=consumer_secret,
+        access_token=access_token,
+        access_token_secret=access_token_secret
+    )
+    client.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize))
+    return client
+
+def get_twitter_client() -> tweepy.Client:
+    """
+    Shared client for the current credentials. Every TwitterBot in the
+    process uses it, so a bot rebuilt after a crash keeps the warm
+    connections of the one before it.
+    Returns:
+        tweepy.Client: The shared client
+    """
+    credentials = tuple(os.getenv(name) for name in CREDENTIAL_VARS)
+    client = _twitter_clients.get(credentials)
+    if client is None:
+        with _twitter_clients_lock:
+            client = _twitter_clients.get(credentials)
+            if client is None:
+                client = _twitter_clients[credentials] = create_twitter_client()
+    return client
+
 class TwitterBot:
-    def __init__(self):
-        """Initialize Twitter bot with OAuth 1.0a client and tracking structures"""
+    def __init__(self, state_store: StateStore = None, reply_cache: ReplyCache = None,
+                 tweet_filter: TweetFilter = None, client: tweepy.Client = None,
+                 quota: ReplyQuota = None, coordinator=None):
+        """
+        Initialize Twitter bot with OAuth 1.0a client and tracking structures
+        Args:
+            state_store (StateStore): Backend that persists dedup and quota state
+                between runs; defaults to an in-memory store
+            reply_cache (ReplyCache): Cache of generated replies for repeated
+                tweet content; defaults to a memory-only cache
+            tweet_filter (TweetFilter): Rules that discard tweets before any
+                API call; defaults to TweetFilter.from_env(), which accepts
+                every tweet unless BOT_FILTER_CONFIG is set
+            client (tweepy.Client): Twitter API client; defaults to the
+                process-wide client from get_twitter_client()
+            quota (ReplyQuota): Rolling reply limits; defaults to three
+                replies per author in any 24 hours
+            coordinator (Coordinator): Tweet claims shared with other worker
+                processes, None when this is the only bot
+        """
         try:
-            # Initialize Twitter API client with OAuth 1.0a
-            self.client = tweepy.Client(
-                bearer_token=os.getenv("BearerToken"),
-                consumer_key=os.getenv("APIkey"),
-                consumer_secret=os.getenv("apiSecretkey"),
-                access_token=os.getenv("AccessToken"),
-                access_token_secret=os.getenv("AccessTokenSecret")
+            # Reuse the shared OAuth 1.0a client and its connection pool
+            self.client = client or get_twitter_client()
+            # Initialize tracking structures, resuming from the state store
+            self.state_store = state_store or MemoryStateStore()
+            self.max_processed_tweets = 1000
+            # Replies per author (and optionally overall) over rolling windows
+            self.quota = quota or ReplyQuota(per_user=3)
+            self.quota.restore(self.state_store.load_reply_log())
+            self.coordinator = coordinator
+            self.stream_replies = True  # Stream completions and stop at the character limit
+            self.reply_cache = reply_cache or ReplyCache(prompt_version=PROMPT_VERSION)
+            self.tweet_filter = tweet_filter or TweetFilter.from_env()
+            self.processed_tweets = ProcessedTweets(  # Track processed tweet IDs
+                self.state_store.load_processed(self.max_processed_tweets),
+                maxlen=self.max_processed_tweets
             )
-            # Initialize tracking structures
-            self.daily_replies = {}  # Track daily replies per user
-            self.max_daily_replies = 3
-            self.processed_tweets = set()  # Track processed tweet IDs
-            print("Twitter bot initialized successfully")
+            self.user_cache = TTLCache(maxsize=5000, ttl=6 * 3600)  # author_id -> username
+            self.list_high_water = self.state_store.load_high_water()  # Newest tweet ID processed per list
+            self._pending_high_water = {}  # Marks of fetched tweets, applied once they are processed
+            # Members of the monitored lists, loaded from the store and refreshed as diffs
+            self.membership = ListMembership()
+            self.membership.load(self.state_store.load_list_members())
+            self.member_refresh = None  # Seconds between membership refreshes in monitor_lists, None to skip
+            self.sleep = time.sleep  # Waits between cycles; replays swap it out to run as fast as possible
+            self.profiler = None  # Optional Profiler; profiles monitor_lists cycles on request
+            self.max_list_pages = 8  # The list tweets endpoint serves at most 800 tweets
+            self.reply_pool = None  # Optional ReplyWorkerPool; replies are generated in batches otherwise
+            # Candidate replies, best first; spends the scarce per-user budget on the
+            # freshest, most engaging tweets instead of in response order
+            self.reply_queue = ReplyQueue()
+            self.max_replies_per_cycle = None  # Leave the rest queued for the next cycle
+            # Adaptive poll interval fed by the rate-limit headers of every response
+            self.scheduler = PollScheduler()
+            self.scheduler.attach(self.client.session)
+            metrics.gauge('processed_tweets', fn=lambda: len(self.processed_tweets))
+            metrics.gauge('user_cache_hit_ratio', fn=lambda: self.user_cache.hit_ratio)
+            metrics.gauge('reply_cache_hit_ratio', fn=lambda: self.reply_cache.hit_ratio)
+            metrics.gauge('reply_cache_saved_seconds', fn=lambda: self.reply_cache.saved_seconds)
+            logger.info("Twitter bot initialized successfully")
         except Exception as e:
-            print(f"Error initializing Twitter bot: {e}")
+            logger.error(f"Error initializing Twitter bot: {e}")
             raise
 
-    def monitor_list_tweets(self, list_id: str, interval: int = 60):
+    def monitor_list_tweets(self, list_id: str, interval: int = 60, max_cycles: int = None):
         """
         Monitor tweets from a Twitter list directly
         Args:
             list_id (str): ID of the Twitter list to monitor
-            interval (int): Time between checks in seconds
+            interval (int): Time between checks in seconds on a quiet list; the
+                scheduler polls faster while the list is busy and slower as the
+                rate-limit budget runs out
+            max_cycles (int): Stop after this many polls, None to run until interrupted
+        """
+        return self.monitor_lists([list_id], interval=interval, max_cycles=max_cycles)
+
+    def monitor_lists(self, list_ids: list, interval: int = 60, max_cycles: int = None):
+        """
+        Monitor several Twitter lists in one loop; each cycle polls every list
+        and answers the best of their new tweets together
+        Args:
+            list_ids (list): IDs of the Twitter lists to monitor
+            interval (int): Time between cycles in seconds, adapted by the scheduler
+            max_cycles (int): Stop after this many cycles, None to run until interrupted
         """
-        print(f"Starting to monitor tweets from list {list_id} at {datetime.now(timezone.utc)}")
+        self.scheduler.base_interval = interval
+        logger.info(f"Starting to monitor tweets from lists {', '.join(list_ids)} at {datetime.now(timezone.utc)}")
         
+        cycles = 0
         try:
-            while True:
-                try:
-                    print(f"\nChecking for new tweets at {datetime.now(timezone.utc)}")
-                    response = self.client.get_list_tweets(
-                        id=list_id,
-                        max_results=10,
-                        tweet_fields=['author_id', 'referenced_tweets', 'text']
-                    )
-                    
-                    # Filter out retweets and replies
-                    filtered_tweets = []
-                    if response.data:
-                        for tweet in response.data:
-                            # Skip if it's a retweet or reply
-                            if not (hasattr(tweet, 'referenced_tweets') and tweet.referenced_tweets):
-                                filtered_tweets.append(tweet)
-                    
-                    if not filtered_tweets:
-                        print("No new tweets found")
-                        time.sleep(interval)
-                        continue
-                    
-                    for tweet in filtered_tweets:
-                        try:
-                            tweet_id = str(tweet.id)
-                            author_id = str(tweet.author_id)
-                            
-                            # Skip if we've already processed this tweet
-                            if tweet_id in self.processed_tweets:
-                                continue
-                            
-                            # Get author information
-                            author = self.client.get_user(id=author_id)
-                            if not hasattr(author, 'data') or not author.data:
-                                logger.warning(f"Could not fetch author information for tweet {tweet_id}")
-                                continue
-                            
-                            username = author.data.username
-                            logger.info(f"Processing tweet {tweet_id} from @{username}")
-                        except AttributeError as e:
-                            logger.error(f"Error accessing tweet attributes: {e}", exc_info=True)
-                            continue
-                        except Exception as e:
-                            logger.error(f"Unexpected error processing tweet: {e}", exc_info=True)
-                            continue
-                        
-                        # Check if we can reply to this user today
-                        if self.can_reply_to_user(author_id):
-                            logger.info(f"New tweet from @{username}: {tweet.text[:50]}...")
-                            if self._reply_to_tweet(tweet_id, author_id, username, tweet.text):
-                                self.processed_tweets.add(tweet_id)
-                        
-                    # Prevent processed_tweets from growing too large
-                    if len(self.processed_tweets) > 1000:
-                        self.processed_tweets = set(list(self.processed_tweets)[-1000:])
-                        
-                    time.sleep(interval)
-                    
-                except tweepy.TooManyRequests as e:
-                    reset_time = int(e.response.headers.get('x-rate-limit-reset', 900))
-                    current_time = int(datetime.now(timezone.utc).timestamp())
-                    sleep_time = max(reset_time - current_time, 60)
-                    logger.warning(f"Rate limit exceeded. Waiting {sleep_time} seconds...")
-                    time.sleep(sleep_time)
+            while max_cycles is None or cycles < max_cycles:
+                cycles += 1
+                with self.profiler.cycle() if self.profiler else nullcontext():
+                    delay = self._monitor_cycle(list_ids)
+                # Outside the profiled section, so a session covers only the work
+                self.sleep(delay)
+
+        except KeyboardInterrupt:
+            logger.info("Monitoring stopped by user")
+            return True
+            
+        finally:
+            self.save_state()
+            
+        return True
+
+    def _monitor_cycle(self, list_ids: list) -> float:
+        """
+        Poll every list once and answer the new tweets
+        Returns:
+            float: Seconds to wait before the next cycle
+        """
+        try:
+            logger.debug(f"Checking for new tweets at {datetime.now(timezone.utc)}")
+            if self.member_refresh is not None:
+                for list_id in list_ids:
+                    self.get_list_members(list_id, max_age=self.member_refresh)
+            self._pending_high_water.clear()
+            filtered_tweets = [
+                tweet for list_id in list_ids for tweet in self._fetch_list_tweets(list_id)
+            ]
+
+            if not filtered_tweets and not self.reply_queue:
+                logger.debug("No new tweets found")
+                self._advance_high_water()
+                self.save_state()
+                metrics.maybe_log_summary(logger)
+                return self.scheduler.next_delay(LIST_TWEETS_ENDPOINT)
+
+            self._process_tweets(filtered_tweets)
+            self._advance_high_water()
+            cycle_usage = usage.end_cycle()
+            if cycle_usage['requests']:
+                logger.info(f"Cycle LLM usage: {cycle_usage['requests']} requests, "
+                            f"{cycle_usage['prompt_tokens']}+{cycle_usage['completion_tokens']} tokens, "
+                            f"${cycle_usage['cost']:.5f} (${cycle_usage['cost_per_reply']:.6f} per reply)")
+            self.save_state()
+            metrics.maybe_log_summary(logger)
+            return self.scheduler.next_delay(LIST_TWEETS_ENDPOINT)
+
+        except tweepy.TooManyRequests as e:
+            metrics.counter('rate_limited_total').inc()
+            reset_time = int(e.response.headers.get('x-rate-limit-reset', 900))
+            current_time = int(datetime.now(timezone.utc).timestamp())
+            sleep_time = max(reset_time - current_time, 60)
+            logger.warning(f"Rate limit exceeded. Waiting {sleep_time} seconds...")
+            return sleep_time
+
+        except tweepy.TwitterServerError as e:
+            logger.error(f"Twitter server error: {e}", exc_info=True)
+            logger.info("Waiting 60 seconds before retry...")
+            return 60
+
+        except Exception as e:
+            logger.error(f"Error processing tweets: {e}", exc_info=True)
+            logger.info("Waiting 30 seconds before retry...")
+            return 30
+
+    def monitor_list_tweets_async(self, list_id: str, interval: int = 60, **pipeline_options):
+        """
+        Monitor tweets from a Twitter list using the asyncio pipeline
+        Args:
+            list_id (str): ID of the Twitter list to monitor
+            interval (int): Time between checks in seconds
+            **pipeline_options: Stage concurrency and queue options for TweetPipeline
+        """
+        from src.pipeline import TweetPipeline
+
+        pipeline = TweetPipeline(self, list_id, interval=interval, **pipeline_options)
+        try:
+            asyncio.run(pipeline.run())
+        except KeyboardInterrupt:
+            logger.info("Monitoring stopped by user")
+        return True
+
+    def monitor_list_stream(self, list_id: str, **stream_options):
+        """
+        Follow a Twitter list through the filtered stream instead of polling
+        Args:
+            list_id (str): ID of the Twitter list to monitor
+            **stream_options: Base URL, rule and reconnect options for ListStream
+        """
+        from src.stream import ListStream
+
+        stream = ListStream(self, list_id, **stream_options)
+        try:
+            stream.run()
+        except KeyboardInterrupt:
+            logger.info("Monitoring stopped by user")
+        return True
+
+    def _fetch_list_tweets(self, list_id: str):
+        """
+        Fetch tweets posted to a list since the last poll, dropping retweets and replies.
+
+        Pages are requested at the maximum size and walked newest-first via
+        pagination_token until a tweet at or below the list's high-water mark
+        is reached, so bursts larger than one page are not lost and tweets seen
+        in earlier polls are not downloaded again. The first poll of a list
+        only reads the newest page rather than backfilling its history. The
+        high-water mark only moves in _advance_high_water(), once the tweets
+        are processed, so tweets of a failed cycle are fetched again.
+        Returns:
+            list: New original tweets from the list, newest first
+        """
+        high_water = self.list_high_water.get(list_id)
+        new_tweets = []
+        pagination_token = None
+        
+        for _ in range(self.max_list_pages):
+            with metrics.time('get_list_tweets'):
+                response = self.client.get_list_tweets(
+                    id=list_id,
+                    max_results=100,
+                    pagination_token=pagination_token,
+                    tweet_fields=['author_id', 'referenced_tweets', 'text', 'created_at', 'public_metrics', 'lang'],
+                    expansions=['author_id'],
+                    user_fields=['username']
+                )
+            
+            # Authors come back in the includes, so most lookups never hit the API
+            for user in (response.includes or {}).get('users', []):
+                self.user_cache.set(str(user.id), user.username)
+                if list_id in self.membership and not self.membership.is_member(str(user.id), list_id):
+                    self.membership.mark_stale(list_id)  # Someone joined since the last refresh
+            
+            reached_seen = False
+            for tweet in response.data or []:
+                tweet = to_record(tweet)
+                if high_water is not None and tweet.id <= high_water:
+                    reached_seen = True
+                    break
+                new_tweets.append(tweet)
+            
+            pagination_token = (response.meta or {}).get('next_token')
+            if reached_seen or not pagination_token or high_water is None:
+                break
+        else:
+            logger.warning(f"List {list_id} has more than {self.max_list_pages} pages of new tweets; older ones were skipped")
+        
+        self.scheduler.record_activity(len(new_tweets))
+        if new_tweets:
+            self._pending_high_water[list_id] = max(tweet.id for tweet in new_tweets)
+        
+        return self._filter_tweets(new_tweets)
+
+    def _advance_high_water(self):
+        """Move each list's high-water mark past the tweets fetched since the last call"""
+        for list_id, tweet_id in self._pending_high_water.items():
+            if tweet_id > self.list_high_water.get(list_id, 0):
+                self.list_high_water[list_id] = tweet_id
+        self._pending_high_water.clear()
+
+    def _filter_tweets(self, tweets: list) -> list:
+        """
+        Drop retweets, replies and tweets rejected by the tweet filter
+        Returns:
+            list: The original tweets as TweetRecords, in the same order
+        """
+        tweets = [to_record(tweet) for tweet in tweets]
+        # Skip retweets, quotes and replies
+        filtered_tweets = [tweet for tweet in tweets if not tweet.is_reference]
+        # Then drop tweets we would never answer, before any API call
+        with metrics.time('filter_tweets'):
+            filtered_tweets = self.tweet_filter.filter(filtered_tweets)
+        metrics.counter('tweets_fetched_total').inc(len(tweets))
+        metrics.counter('tweets_filtered_total').inc(len(tweets) - len(filtered_tweets))
+        return filtered_tweets
+
+    def _process_tweets(self, filtered_tweets: list) -> list:
+        """
+        Reply to new original tweets: skip ones already processed, resolve
+        their authors in one batch, queue them by priority, apply the daily
+        limits best first and generate the replies. Shared by list polling
+        and the filtered stream.
+        Args:
+            filtered_tweets (list): Tweets without retweets and replies
+        Returns:
+            list: IDs of the tweets that were replied to
+        """
+        # Resolve every author in one batch before generating replies
+        usernames = self._resolve_usernames(
+            str(tweet.author_id) for tweet in filtered_tweets
+            if tweet.id not in self.processed_tweets
+        )
+        
+        for tweet in filtered_tweets:
+            try:
+                tweet_id = tweet.id
+                author_id = str(tweet.author_id)
+                
+                # Skip if we've already processed or queued this tweet
+                if tweet_id in self.processed_tweets or tweet_id in self.reply_queue:
+                    metrics.counter('tweets_deduplicated_total').inc()
                     continue
-                    
-                except tweepy.TwitterServerError as e:
-                    logger.error(f"Twitter server error: {e}", exc_info=True)
-                    logger.info("Waiting 60 seconds before retry...")
-                    time.sleep(60)
+                
+                # Get author information
+                username = usernames.get(author_id)
+                if not username:
+                    logger.warning(f"Could not fetch author information for tweet {tweet_id}")
                     continue
-                    
-                except Exception as e:
-                    logger.error(f"Error processing tweets: {e}", exc_info=True)
-                    logger.info("Waiting 30 seconds before retry...")
-                    time.sleep(30)
+                
+                logger.info(f"Processing tweet {tweet_id} from @{username}")
+                self.reply_queue.push(tweet_id, (tweet_id, author_id, username, tweet.text), tweet)
+            except AttributeError as e:
+                logger.error(f"Error accessing tweet attributes: {e}", exc_info=True)
+                continue
+            except Exception as e:
+                logger.error(f"Unexpected error processing tweet: {e}", exc_info=True)
+                continue
+        
+        # Take candidates best first while checking the reply quota, counting
+        # replies already planned in this cycle
+        self.reply_queue.evict_expired()
+        jobs = []
+        planned = {}
+        order = []
+        while self.max_replies_per_cycle is None or len(jobs) < self.max_replies_per_cycle:
+            entry = self.reply_queue.pop()
+            if entry is None:
+                break
+            (tweet_id, author_id, username, text), score = entry
+            if tweet_id in self.processed_tweets:
+                continue
+            blocked_by = self.quota.blocked_by(author_id, pending=planned.get(author_id, 0), pending_total=len(jobs))
+            if blocked_by is None:
+                # Another worker process may watch a list with the same tweet
+                if self.coordinator is not None and not self.coordinator.claim(tweet_id):
                     continue
-                    
-        except KeyboardInterrupt:
-            print("\nMonitoring stopped by user")
+                logger.info(f"New tweet from @{username}: {text[:50]}...")
+                planned[author_id] = planned.get(author_id, 0) + 1
+                jobs.append((tweet_id, author_id, username, text))
+                order.append(f"{tweet_id} ({score:.3f})")
+            else:
+                metrics.counter('priority_quota_skipped_total').inc()
+                logger.debug(f"Skipping tweet {tweet_id} (score {score:.3f}): {blocked_by} reply limit reached for @{username}",
+                             extra=HIGH_VOLUME)
+        if len(jobs) > 1:
+            logger.info(f"Reply order by priority: {', '.join(order)}")
+        
+        # Generate all of this cycle's replies concurrently on the worker pool,
+        # or in batched completions
+        if self.reply_pool is not None:
+            replied = self.reply_pool.run(jobs)
+        else:
+            replied = self._reply_to_tweets(jobs)
+        for tweet_id in replied:
+            self.processed_tweets.add(tweet_id)
+        return replied
+
+    @property
+    def monitored_users(self) -> dict:
+        """author_id -> username of every member of the monitored lists"""
+        return self.membership.monitored_users
+
+    def get_list_members(self, list_id: str, max_age: float = 0) -> bool:
+        """
+        Refresh the member index of a list, downloading all members and
+        applying the difference to the index
+        Args:
+            list_id (str): ID of the Twitter list
+            max_age (float): Keep the indexed members if they were refreshed
+                less than this many seconds ago
+        Returns:
+            bool: True if the index holds the list's members
+        """
+        if not self.membership.due(list_id, max_age):
             return True
-            
+        try:
+            members = {}
+            pagination_token = None
+            while True:
+                with metrics.time('get_list_members'):
+                    response = self.client.get_list_members(
+                        id=list_id, max_results=100, pagination_token=pagination_token,
+                        user_fields=['username']
+                    )
+                for user in response.data or []:
+                    members[str(user.id)] = user.username
+                pagination_token = (response.meta or {}).get('next_token')
+                if not pagination_token:
+                    break
+        except Exception as e:
+            logger.error(f"Error fetching members of list {list_id}: {e}")
+            return list_id in self.membership
+        self.membership.update(list_id, members)
         return True
 
-    def can_reply_to_user(self, user_id: str) -> bool:
+    def _get_username(self, author_id: str):
         """
-        Check if we can reply to a user based on daily limits
+        Look up the username of a tweet author
+        Returns:
+            str: Username, or None if the author could not be fetched
+        """
+        return self._resolve_usernames([author_id]).get(author_id)
+
+    def _resolve_usernames(self, author_ids):
         """
-        today = datetime.now().date()
-        if user_id not in self.daily_replies:
-            self.daily_replies[user_id] = {'date': today, 'count': 0}
-        elif self.daily_replies[user_id]['date'] != today:
-            self.daily_replies[user_id] = {'date': today, 'count': 0}
+        Resolve author IDs to usernames from the list member index and the
+        user cache, fetching any misses with bulk get_users calls (up to 100
+        IDs per request)
+        Args:
+            author_ids (iterable): Author IDs to resolve
+        Returns:
+            dict: author_id -> username for every author that could be resolved
+        """
+        usernames = {}
+        missing = []
+        for author_id in dict.fromkeys(author_ids):
+            username = self.membership.monitored_users.get(author_id) or self.user_cache.get(author_id)
+            if username:
+                usernames[author_id] = username
+            else:
+                missing.append(author_id)
+        
+        for start in range(0, len(missing), 100):
+            with metrics.time('get_users'):
+                response = self.client.get_users(ids=missing[start:start + 100], user_fields=['username'])
+            for user in response.data or []:
+                usernames[str(user.id)] = user.username
+                self.user_cache.set(str(user.id), user.username)
         
-        return self.daily_replies[user_id]['count'] < self.max_daily_replies
+        if missing:
+            logger.info(f"User cache: resolved {len(missing)} authors via get_users ({self.user_cache.stats()})")
+        return usernames
+
+    @property
+    def max_daily_replies(self) -> int:
+        """Replies allowed per author in the quota's rolling window"""
+        return self.quota.per_user
+
+    @max_daily_replies.setter
+    def max_daily_replies(self, limit: int):
+        self.quota.per_user = limit
+
+    def can_reply_to_user(self, user_id: str) -> bool:
+        """
+        Check if we can reply to a user within the reply quota
+        """
+        return self.quota.allows(user_id)
 
     def monitor_tweets(self, list_id: str, interval: int = 60):
         """
         Deprecated: Use monitor_list_tweets instead
         This method is kept for backward compatibility
         """
-        print("Warning: This method is deprecated. Please use monitor_list_tweets instead.")
+        logger.warning("This method is deprecated. Please use monitor_list_tweets instead.")
         return self.monitor_list_tweets(list_id, interval)
 
-    def _reply_to_tweet(self, tweet_id: str, user_id: str, user_handle: str, tweet_text: str):
+    def _reply_to_tweet(self, tweet_id: int, user_id: str, user_handle: str, tweet_text: str):
         """
         Generate and post a reply to a tweet if within limits
         """
         if not self.can_reply_to_user(user_id):
-            print(f"Daily reply limit reached for user {user_handle}")
+            logger.info(f"Daily reply limit reached for user {user_handle}")
             return False
 
         # Generate response using LLM
-        response = generate_response(tweet_text)
+        with metrics.time('generate_response'):
+            response = generate_response(tweet_text, stream=self.stream_replies, cache=self.reply_cache,
+                                         char_limit=reply_char_limit(user_handle))
+        if response is None:
+            logger.info(f"Skipping reply to tweet {tweet_id}: no response was generated")
+            return False
         
         # Post reply
+        if self._post_within_quota(tweet_id, user_id, user_handle, response):
+            logger.info(f"Successfully replied to @{user_handle}'s tweet: {tweet_text[:50]}...")
+            return True
+        return False
+
+    def _reply_to_tweets(self, jobs: list) -> list:
+        """
+        Generate replies for several tweets at once and post them
+        Args:
+            jobs (list): (tweet_id, user_id, user_handle, tweet_text) tuples
+        Returns:
+            list: IDs of the tweets that were replied to
+        """
+        if not jobs:
+            return []
+        with metrics.time('generate_responses'):
+            responses = generate_responses([job[3] for job in jobs], stream=self.stream_replies, cache=self.reply_cache,
+                                           char_limits=[reply_char_limit(job[2]) for job in jobs])
+        
+        replied = []
+        for (tweet_id, user_id, user_handle, tweet_text), response in zip(jobs, responses):
+            with log_context(tweet_id):
+                if response is None:
+                    logger.info(f"Skipping reply to tweet {tweet_id}: no response was generated")
+                    continue
+                if self._post_within_quota(tweet_id, user_id, user_handle, response):
+                    logger.info(f"Successfully replied to @{user_handle}'s tweet: {tweet_text[:50]}...")
+                    replied.append(tweet_id)
+        return replied
+
+    def _post_reply(self, tweet_id: int, user_handle: str, response: str) -> bool:
+        """
+        Post a generated reply to a tweet
+        Returns:
+            bool: True if the reply was posted
+        """
         try:
-            self.client.create_tweet(
-                text=f"@{user_handle} {response}",
-                in_reply_to_tweet_id=tweet_id
-            )
-            self.daily_replies[user_id]['count'] += 1
-            print(f"Successfully replied to @{user_handle}'s tweet: {tweet_text[:50]}...")
+            with metrics.time('create_tweet'):
+                self.client.create_tweet(
+                    text=f"@{user_handle} {response}",
+                    in_reply_to_tweet_id=str(tweet_id)
+                )
+            metrics.counter('replies_posted_total').inc()
             return True
         except Exception as e:
-            print(f"Error replying to tweet: {e}")
+            metrics.counter('reply_errors_total').inc()
+            logger.error(f"Error replying to tweet: {e}")
+            return False
+
+    def _post_within_quota(self, tweet_id: int, user_id: str, user_handle: str, response: str) -> bool:
+        """
+        Charge the reply quota and post the reply, refunding the charge if
+        posting fails. Safe to call from concurrent workers: the check and
+        the charge are one atomic step, so they cannot overshoot a limit.
+        Returns:
+            bool: True if the reply was posted
+        """
+        if not self.quota.try_charge(user_id):
+            logger.info(f"Reply limit reached for user {user_handle}")
             return False
+        posted = False
+        try:
+            posted = self._post_reply(tweet_id, user_handle, response)
+        finally:
+            if not posted:
+                self.quota.refund(user_id)
+        return posted
+
+    def save_state(self):
+        """
+        Write this cycle's new processed tweets, reply counts, list
+        high-water marks and membership changes to the state store in one batch
+        """
+        try:
+            self.state_store.save(
+                processed=self.processed_tweets.drain_new(),
+                reply_log=self.quota.drain_changed(),
+                high_water=self.list_high_water,
+                list_members=self.membership.drain_changed(),
+                keep=self.max_processed_tweets
+            )
+        except Exception as e:
+            logger.error(f"Error saving bot state: {e}", exc_info=True)
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    In-process LRU cache whose entries also expire after a fixed time-to-live.
+
+    Lookups, inserts and evictions are O(1). The cache is safe to share
+    between the sync loop and the pipeline's worker threads, and keeps
+    hit/miss counters so its effectiveness can be logged.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl: float = 3600, clock=time.monotonic):
+        """
+        Args:
+            maxsize (int): Maximum number of entries before the least recently used is evicted
+            ttl (float): Seconds an entry stays valid after it was set
+            clock (callable): Monotonic time source, injectable for tests
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entry if full"""
+        with self._lock:
+            self._entries[key] = (value, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > self.clock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        """Return size and hit/miss counters"""
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hit_ratio, 3),
+        }
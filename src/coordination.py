@@ -0,0 +1,224 @@
+import sqlite3
+import threading
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logger import setup_logger
+from src.metrics import metrics
+from src.quota import ReplyQuota
+
+logger = setup_logger('twitter_bot')
+
+
+class Coordinator:
+    """
+    Local coordination layer shared by the worker processes of one machine:
+    an SQLite database in WAL mode holding tweet claims and reply quota
+    events. Every write that has to be atomic across processes runs in a
+    BEGIN IMMEDIATE transaction, which takes the database's write lock.
+    """
+
+    def __init__(self, path: str = 'state/coordination.db', owner: str = None, claim_ttl: float = 7 * 24 * 3600,
+                 clock=time.time):
+        """
+        Args:
+            path (str): Database file, created along with its directory if missing
+            owner (str): Name of this worker, recorded with its claims;
+                defaults to the process ID
+            claim_ttl (float): Seconds after which claims are pruned
+            clock (callable): Wall-clock time source, injectable for tests
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.owner = owner or f"pid-{os.getpid()}"
+        self.claim_ttl = claim_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS tweet_claims (
+                tweet_id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                claimed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS tweet_claims_claimed_at ON tweet_claims (claimed_at);
+            CREATE TABLE IF NOT EXISTS quota_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                ts REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS quota_events_user_ts ON quota_events (user_id, ts);
+            CREATE INDEX IF NOT EXISTS quota_events_ts ON quota_events (ts);
+        ''')
+
+    def transaction(self, immediate: bool = True):
+        """
+        Context manager for a transaction; immediate ones take the write lock
+        up front, so a read followed by a write is atomic across processes
+        """
+        return _Transaction(self, immediate)
+
+    def claim(self, tweet_id: int) -> bool:
+        """
+        Claim a tweet for this worker, so no other worker answers it, e.g.
+        when its author is on lists watched by different workers
+        Returns:
+            bool: True if this worker holds the claim (newly or from before)
+        """
+        key = str(tweet_id)  # Claims are keyed by text, like the processed tweets table
+        with self.transaction() as conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO tweet_claims (tweet_id, owner, claimed_at) VALUES (?, ?, ?)',
+                (key, self.owner, self.clock())
+            )
+            owner = conn.execute('SELECT owner FROM tweet_claims WHERE tweet_id = ?', (key,)).fetchone()[0]
+        if owner != self.owner:
+            metrics.counter('tweet_claims_lost_total').inc()
+            logger.info(f"Skipping tweet {tweet_id}: claimed by {owner}")
+            return False
+        return True
+
+    def prune(self, max_window: float = 24 * 3600) -> int:
+        """
+        Delete expired claims and quota events
+        Args:
+            max_window (float): Longest quota window in use
+        Returns:
+            int: Number of rows deleted
+        """
+        now = self.clock()
+        with self.transaction() as conn:
+            deleted = conn.execute('DELETE FROM tweet_claims WHERE claimed_at <= ?', (now - self.claim_ttl,)).rowcount
+            deleted += conn.execute('DELETE FROM quota_events WHERE ts <= ?', (now - max_window,)).rowcount
+        return deleted
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _Transaction:
+    def __init__(self, coordinator: Coordinator, immediate: bool):
+        self.coordinator = coordinator
+        self.immediate = immediate
+
+    def __enter__(self):
+        self.coordinator._lock.acquire()
+        try:
+            self.coordinator._conn.execute('BEGIN IMMEDIATE' if self.immediate else 'BEGIN')
+        except Exception:
+            self.coordinator._lock.release()
+            raise
+        return self.coordinator._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.coordinator._conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.coordinator._lock.release()
+        return False
+
+
+class SharedReplyQuota(ReplyQuota):
+    """
+    ReplyQuota whose reply log lives in the coordinator's database, so the
+    limits hold across every worker process. A check and charge is one
+    write-locked transaction over indexed (user_id, ts) ranges; the log is
+    its own persistence, so nothing is drained to the state store.
+    """
+
+    def __init__(self, coordinator: Coordinator, per_user: int = 3, user_window: float = 24 * 3600,
+                 global_limit: int = None, global_window: float = 24 * 3600, hourly_limit: int = None,
+                 prune_every: int = 100):
+        """
+        Args:
+            coordinator (Coordinator): Shared database
+            prune_every (int): Charges between deletions of expired events
+            Other arguments as for ReplyQuota; the clock is the coordinator's
+        """
+        super().__init__(per_user=per_user, user_window=user_window, global_limit=global_limit,
+                         global_window=global_window, hourly_limit=hourly_limit, clock=coordinator.clock)
+        self.coordinator = coordinator
+        self.prune_every = prune_every
+        self._charges = 0
+        metrics.gauge('quota_tracked_users', fn=lambda: len(self))
+
+    def _count(self, conn, now: float, window: float, user_id: str = None) -> int:
+        if user_id is None:
+            return conn.execute('SELECT COUNT(*) FROM quota_events WHERE ts > ?', (now - window,)).fetchone()[0]
+        return conn.execute(
+            'SELECT COUNT(*) FROM quota_events WHERE user_id = ? AND ts > ?', (user_id, now - window)
+        ).fetchone()[0]
+
+    def _shared_blocked_by(self, conn, user_id: str, now: float, pending: int = 0, pending_total: int = 0) -> str:
+        if self._count(conn, now, self.user_window, user_id) + pending >= self.per_user:
+            return 'user'
+        if self.global_limit is not None and \
+                self._count(conn, now, self.global_window) + pending_total >= self.global_limit:
+            return 'global'
+        if self.hourly_limit is not None and self._count(conn, now, 3600) + pending_total >= self.hourly_limit:
+            return 'hourly'
+        return None
+
+    def blocked_by(self, user_id: str, pending: int = 0, pending_total: int = 0) -> str:
+        with self.coordinator.transaction(immediate=False) as conn:
+            return self._shared_blocked_by(conn, user_id, self.clock(), pending, pending_total)
+
+    def try_charge(self, user_id: str) -> bool:
+        with self.coordinator.transaction() as conn:
+            now = self.clock()
+            scope = self._shared_blocked_by(conn, user_id, now)
+            if scope is None:
+                conn.execute('INSERT INTO quota_events (user_id, ts) VALUES (?, ?)', (user_id, now))
+        if scope is not None:
+            metrics.counter('quota_denied_total', scope=scope).inc()
+            return False
+        self._after_charge()
+        return True
+
+    def charge(self, user_id: str):
+        with self.coordinator.transaction() as conn:
+            conn.execute('INSERT INTO quota_events (user_id, ts) VALUES (?, ?)', (user_id, self.clock()))
+        self._after_charge()
+
+    def _after_charge(self):
+        self._charges += 1
+        if self._charges % self.prune_every == 0:
+            self.coordinator.prune(max(self.user_window, self.global_window, 3600))
+
+    def refund(self, user_id: str):
+        with self.coordinator.transaction() as conn:
+            conn.execute(
+                'DELETE FROM quota_events WHERE id = (SELECT MAX(id) FROM quota_events WHERE user_id = ?)',
+                (user_id,)
+            )
+
+    def used(self, user_id: str) -> int:
+        with self.coordinator.transaction(immediate=False) as conn:
+            return self._count(conn, self.clock(), self.user_window, user_id)
+
+    def drain_changed(self) -> dict:
+        return {}
+
+    def restore(self, entries: dict):
+        pass  # The shared log is authoritative
+
+    def stats(self) -> dict:
+        now = self.clock()
+        with self.coordinator.transaction(immediate=False) as conn:
+            return {
+                'tracked_users': conn.execute(
+                    'SELECT COUNT(DISTINCT user_id) FROM quota_events WHERE ts > ?', (now - self.user_window,)
+                ).fetchone()[0],
+                'global_used': self._count(conn, now, self.global_window) if self.global_limit is not None else None,
+                'hourly_used': self._count(conn, now, 3600) if self.hourly_limit is not None else None,
+            }
+
+    def __len__(self) -> int:
+        return self.stats()['tracked_users']
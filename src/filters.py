@@ -0,0 +1,189 @@
+import json
+import re
+from collections import Counter
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logger import HIGH_VOLUME, setup_logger
+from src.metrics import metrics
+from src.text import MENTION_PATTERN, URL_PATTERN
+
+logger = setup_logger('twitter_bot')
+
+DEFAULT_KEYWORDS = (
+    'giveaway', 'airdrop', 'whitelist', 'presale', 'promo code', 'discount code',
+    'follow and retweet', 'follow & retweet', 'like and retweet', 'dm me', 'link in bio',
+)
+DEFAULT_PATTERNS = {
+    'raffle': r'\b(?:rt|retweet|follow)\b.{0,40}\bto win\b',
+    'ticker_spam': r'(?:\$[A-Za-z]{2,6}\b[^$]*){3,}',
+}
+# A numbered backreference would point at another rule's group once combined
+NUMBERED_BACKREFERENCE = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]')
+RULE_GROUP = re.compile(r'r\d+$')
+
+
+def _check_rule(name: str, pattern: str, group_names: set) -> set:
+    """
+    Compile one rule on its own and make sure it can join the alternation
+    Args:
+        name (str): Rule name, used in error messages
+        pattern (str): The rule's regular expression
+        group_names (set): Named groups used by the rules checked so far
+    Returns:
+        set: The rule's named groups
+    Raises:
+        re.error: The pattern is not a valid regular expression
+        ValueError: The pattern is valid but cannot be combined with other rules
+    """
+    compiled = re.compile(pattern)
+    if NUMBERED_BACKREFERENCE.search(pattern):
+        raise ValueError(f"Filter rule {name} uses a numbered backreference; use a named group and (?P=name)")
+    try:
+        re.compile(f"x|(?:{pattern})")
+    except re.error as e:
+        raise ValueError(f"Filter rule {name} cannot be combined with other rules "
+                         f"(inline flags must be scoped, e.g. (?i:...)): {e}") from e
+    names = set(compiled.groupindex)
+    clashing = sorted(n for n in names if n in group_names or RULE_GROUP.match(n))
+    if clashing:
+        raise ValueError(f"Filter rule {name} reuses group name(s) {', '.join(clashing)}")
+    return names
+
+
+class TweetFilter:
+    """
+    Cheap checks that discard tweets we would never answer, run before any
+    author lookup or LLM call.
+
+    Keywords and regex rules are compiled into one alternation of named
+    groups, so a tweet is scanned once no matter how many rules there are;
+    the matching group names the rule. Each rule is compiled on its own
+    first, and rules that would change meaning in the alternation
+    (numbered backreferences, unscoped inline flags, clashing group names)
+    are rejected. Author lists are sets and every other
+    predicate is a constant-time check, so a tweet costs a few microseconds.
+    Rejections are counted per rule.
+    """
+
+    def __init__(self, keywords=(), patterns: dict = None, languages=None, min_length: int = 0,
+                 max_length: int = None, skip_link_only: bool = True, allow_authors=(), deny_authors=()):
+        """
+        Args:
+            keywords (iterable): Phrases that reject a tweet, matched case-insensitively on word boundaries
+            patterns (dict): Rule name -> regular expression that rejects a tweet
+            languages (iterable): Accepted tweet languages (the API's lang field);
+                None accepts every language
+            min_length (int): Minimum characters left after removing URLs and mentions
+            max_length (int): Maximum characters left, None for no limit
+            skip_link_only (bool): Reject tweets that are nothing but links and mentions
+            allow_authors (iterable): Author IDs that skip the content rules
+            deny_authors (iterable): Author IDs that are never answered
+        """
+        self.languages = set(languages) if languages is not None else None
+        self.min_length = min_length
+        self.max_length = max_length
+        self.skip_link_only = skip_link_only
+        self.allow_authors = {str(author_id) for author_id in allow_authors}
+        self.deny_authors = {str(author_id) for author_id in deny_authors}
+        self.hits = Counter()
+
+        rules = {f"keyword:{keyword}": r'\b' + re.escape(keyword) + r'\b' for keyword in keywords}
+        rules.update({f"pattern:{name}": pattern for name, pattern in (patterns or {}).items()})
+        self._rule_names = {}
+        groups = []
+        group_names = set()
+        for index, (name, pattern) in enumerate(rules.items()):
+            group_names |= _check_rule(name, pattern, group_names)
+            self._rule_names[f"r{index}"] = name
+            groups.append(f"(?P<r{index}>{pattern})")
+        self._matcher = re.compile('|'.join(groups), re.IGNORECASE | re.DOTALL) if groups else None
+
+    @classmethod
+    def pass_through(cls):
+        """A filter that accepts every tweet, the bot's default"""
+        return cls(skip_link_only=False)
+
+    @classmethod
+    def default(cls):
+        """Built-in spam, language and length rules, selected with BOT_FILTER_CONFIG=default"""
+        return cls(keywords=DEFAULT_KEYWORDS, patterns=DEFAULT_PATTERNS, languages=['en'], min_length=5)
+
+    @classmethod
+    def from_env(cls):
+        """
+        The filter named by BOT_FILTER_CONFIG: 'default' for default(), a
+        JSON file path for from_file(), unset for pass_through()
+        """
+        config = os.getenv('BOT_FILTER_CONFIG')
+        if not config:
+            return cls.pass_through()
+        if config == 'default':
+            return cls.default()
+        return cls.from_file(config)
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Build a filter from a dict with the constructor's argument names, e.g.
+        loaded from the JSON file named by BOT_FILTER_CONFIG
+        """
+        return cls(**config)
+
+    @classmethod
+    def from_file(cls, path: str):
+        with open(path) as f:
+            return cls.from_config(json.load(f))
+
+    def check(self, tweet) -> str:
+        """
+        Find the first rule that rejects a tweet
+        Returns:
+            str: Name of the rejecting rule, or None if the tweet passes
+        """
+        author_id = str(tweet.author_id)
+        if author_id in self.deny_authors:
+            return 'author:deny'
+        if author_id in self.allow_authors:
+            return None
+
+        lang = getattr(tweet, 'lang', None)
+        if self.languages is not None and isinstance(lang, str) and lang != 'und' and lang not in self.languages:
+            return 'language'
+
+        text = tweet.text or ''
+        content = MENTION_PATTERN.sub('', URL_PATTERN.sub('', text)).strip()
+        if self.skip_link_only and not content:
+            return 'link_only'
+        if len(content) < self.min_length:
+            return 'too_short'
+        if self.max_length is not None and len(content) > self.max_length:
+            return 'too_long'
+
+        if self._matcher is not None:
+            match = self._matcher.search(text)
+            if match:
+                return self._rule_names[match.lastgroup]
+        return None
+
+    def filter(self, tweets: list) -> list:
+        """
+        Drop the tweets rejected by a rule, counting each rejection
+        Returns:
+            list: The tweets that pass, in the same order
+        """
+        passed = []
+        for tweet in tweets:
+            rule = self.check(tweet)
+            if rule is None:
+                passed.append(tweet)
+                continue
+            self.hits[rule] += 1
+            metrics.counter('filter_rejected_total', rule=rule).inc()
+            logger.debug(f"Filtered tweet {tweet.id}: {rule}", extra=HIGH_VOLUME)
+        return passed
+
+    def stats(self) -> dict:
+        """Rejections per rule, most frequent first"""
+        return dict(self.hits.most_common())
@@ -1,57 +1,504 @@
+import contextvars
+import json
+import re
+import threading
 import time
-from openai import OpenAI
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logger import setup_logger
+from src.metrics import metrics
+from src.prompt import TEMPERATURE, TWITTER_CHAR_LIMIT, PromptBuilder, completion_budget
+from src.usage import usage
+
 OPENAI_API_KEY = os.getenv('OPENAIAPI')  # Using the provided API key
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Created on first use by get_client(); tests and benchmarks may assign their own
+client = None
+_client_lock = threading.Lock()
+logger = setup_logger('twitter_bot')
+
+DEFAULT_RESPONSE = "[Test Reply] Thanks for sharing! This is a test response while monitoring functionality is being verified."
+# Built once: every request starts with the same system message
+PROMPT = PromptBuilder()
+# Changes whenever the prompt changes, so cached replies from an older prompt are not reused
+PROMPT_VERSION = PROMPT.version
+
+# End of a sentence: terminal punctuation followed by whitespace or the end of text
+SENTENCE_END = re.compile(r'[.!?]+(?=\s|$)')
+
+# Resilience settings: a hedged second request is sent once an attempt runs
+# past the model's observed p95 latency, every attempt has a hard timeout,
+# and after repeated failures the breaker routes requests to FALLBACK_MODEL
+FALLBACK_MODEL = os.getenv('OPENAI_FALLBACK_MODEL', 'gpt-4o-mini')
+ATTEMPT_TIMEOUT = float(os.getenv('OPENAI_ATTEMPT_TIMEOUT', 15))
+HEDGE_MIN_DELAY = 0.5  # Never hedge sooner than this, whatever the p95 says
+HEDGE_MIN_SAMPLES = 20  # Latency samples needed before the p95 is trusted
+RETRY_BACKOFF = 0.5
+# Return None instead of DEFAULT_RESPONSE when generation fails, so no reply is posted
+SKIP_ON_FAILURE = os.getenv('BOT_SKIP_ON_LLM_FAILURE', '').lower() in ('1', 'true', 'yes')
+
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """
+    Per-model breaker: opens after failure_threshold consecutive failures,
+    lets one trial request through after reset_timeout seconds (half-open),
+    and closes again on the first success
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """True if a request may be sent; in half-open state only one trial at a time"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # A failed trial re-opens the breaker for another reset_timeout
+            if self._trial_running or (self.opened_at is None and self.failures >= self.failure_threshold):
+                metrics.counter('llm_circuit_opened_total').inc()
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+
+breakers = {}
+
+
+def _breaker(model: str) -> CircuitBreaker:
+    breaker = breakers.get(model)
+    if breaker is None:
+        breaker = breakers.setdefault(model, CircuitBreaker())
+        metrics.gauge('llm_circuit_open', fn=lambda: int(breaker.state != 'closed'), model=model)
+    return breaker
+
+
+def _select_model(model: str) -> str:
+    """The requested model, or the fallback while the requested model's breaker is open"""
+    if FALLBACK_MODEL and FALLBACK_MODEL != model and not _breaker(model).allow():
+        metrics.counter('llm_fallback_requests_total').inc()
+        return FALLBACK_MODEL
+    return model
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='llm_hedge')
+    return _hedge_executor
+
+
+def _hedge_delay(model: str):
+    """Seconds to wait before hedging, or None until enough latency samples exist"""
+    histogram = metrics.histogram('llm_request_seconds', model=model)
+    if histogram.count < HEDGE_MIN_SAMPLES:
+        return None
+    return max(histogram.percentiles((0.95,))[0.95], HEDGE_MIN_DELAY)
+
+
+def _call_with_hedge(call, model: str, timeout: float = None):
+    """
+    Run call() and, if it is still running after the model's p95 latency,
+    start an identical second request; the first success wins. Each request
+    gets its own threading.Event, set once its result is no longer wanted
+    (another request won or the attempt timed out) so it can stop early
+    Args:
+        call (callable): Performs one request given its cancel event and returns its result
+        model (str): Model the request goes to, whose latency history sets the hedge delay
+        timeout (float): Give up on the attempt after this many seconds
+    """
+    timeout = ATTEMPT_TIMEOUT if timeout is None else timeout
+    delay = _hedge_delay(model)
+    start = time.monotonic()
+
+    def timed(cancel):
+        result = call(cancel)
+        metrics.histogram('llm_request_seconds', model=model).observe(time.monotonic() - start)
+        return result
+
+    if delay is None or delay >= timeout:
+        return timed(threading.Event())
+
+    executor = _executor()
+    cancels = {}
+
+    def submit():
+        cancel = threading.Event()
+        # Copy the context so worker threads keep the tweet's log correlation ID
+        future = executor.submit(contextvars.copy_context().run, timed, cancel)
+        cancels[future] = cancel
+        return future
+
+    def cancel_pending():
+        for future in pending:
+            cancels[future].set()
+            metrics.counter('llm_requests_cancelled_total').inc()
+
+    primary = submit()
+    done, _ = wait([primary], timeout=delay)
+    pending = {primary}
+    if not done:
+        metrics.counter('llm_hedged_requests_total').inc()
+        logger.debug(f"Request to {model} exceeded p95 ({delay:.2f}s), sending a hedged request")
+        pending.add(submit())
+
+    error = None
+    while pending:
+        remaining = timeout - (time.monotonic() - start)
+        done, pending = wait(pending, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+        if not done:
+            cancel_pending()
+            raise TimeoutError(f"No completion from {model} within {timeout:.1f}s")
+        for future in done:
+            if future.exception() is None:
+                if future is not primary:
+                    metrics.counter('llm_hedge_wins_total').inc()
+                cancel_pending()
+                return future.result()
+            error = future.exception()
+    raise error
+
+def get_client():
+    """
+    The shared OpenAI client, built on first use so importing this module
+    stays cheap. One client serves every call, so its connection pool keeps
+    connections to the API alive between replies and across bot restarts.
+    """
+    global client
+    if client is None:
+        with _client_lock:
+            if client is None:
+                from openai import OpenAI  # Importing openai alone takes most of a second
+                client = OpenAI(api_key=OPENAI_API_KEY)
+    return client
+
+def _build_messages(tweet_text: str, char_limit: int = TWITTER_CHAR_LIMIT) -> list:
+    return PROMPT.messages(tweet_text, char_limit)
+
+def _trim_to_sentence(text: str, limit: int = TWITTER_CHAR_LIMIT) -> str:
+    """
+    Cut text to fit limit at the last complete sentence, falling back to a
+    hard cut with "..." when the first sentence is already too long
+    """
+    text = text.strip()
+    if len(text) <= limit:
+        return text
+    ends = [match.end() for match in SENTENCE_END.finditer(text) if match.end() <= limit]
+    if ends:
+        return text[:ends[-1]]
+    return text[:limit-3].rstrip() + "..."
 
-def generate_response(tweet_text: str, max_retries: int = 3, model: str = "gpt-3.5-turbo") -> str:
+def stream_response(tweet_text: str, model: str = "gpt-3.5-turbo", char_limit: int = TWITTER_CHAR_LIMIT,
+                    timeout: float = None, cancel: threading.Event = None):
+    """
+    Stream a reply, assembling it as tokens arrive and cancelling the rest of
+    the stream as soon as the text passes char_limit
+    Args:
+        tweet_text: The text of the tweet to respond to
+        model: OpenAI model name
+        char_limit: Maximum reply length
+        timeout: Request timeout in seconds, ATTEMPT_TIMEOUT by default
+        cancel: Event checked between chunks; once set the stream is closed
+            and the partial reply returned, e.g. when a hedged copy won
+    Returns:
+        tuple: (reply cut at a sentence boundary, stats dict with time_to_first_token,
+            total_latency, chunks, stopped_early and cancelled)
+    """
+    if cancel is not None and cancel.is_set():
+        return "", {'time_to_first_token': None, 'total_latency': 0.0, 'chunks': 0,
+                    'stopped_early': False, 'cancelled': True}
+    start = time.monotonic()
+    messages = _build_messages(tweet_text, char_limit)
+    stream = get_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=completion_budget(char_limit),
+        temperature=TEMPERATURE,
+        stream=True,
+        stream_options={"include_usage": True},  # Usage arrives in a last chunk without choices
+        timeout=ATTEMPT_TIMEOUT if timeout is None else timeout
+    )
+
+    parts = []
+    length = 0
+    first_token_at = None
+    chunks = 0
+    stopped_early = False
+    cancelled = False
+    stream_usage = None
+    try:
+        for chunk in stream:
+            if cancel is not None and cancel.is_set():
+                # Nobody is waiting for this reply any more
+                cancelled = True
+                break
+            if getattr(chunk, 'usage', None) is not None:
+                stream_usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if first_token_at is None:
+                first_token_at = time.monotonic() - start
+            parts.append(delta)
+            length += len(delta)
+            chunks += 1
+            if length > char_limit:
+                # Everything past here would be cut anyway; stop paying for it
+                stopped_early = True
+                break
+    finally:
+        close = getattr(stream, 'close', None)
+        if close:
+            close()
+
+    # A stream stopped at the character limit never gets its usage chunk
+    usage.record_response(model, stream_usage, messages, ''.join(parts), replies=0)
+    stats = {
+        'time_to_first_token': first_token_at,
+        'total_latency': time.monotonic() - start,
+        'chunks': chunks,
+        'stopped_early': stopped_early,
+        'cancelled': cancelled,
+    }
+    return _trim_to_sentence(''.join(parts), char_limit), stats
+
+def generate_response(tweet_text: str, max_retries: int = 3, model: str = "gpt-3.5-turbo",
+                      stream: bool = False, cache=None, skip_on_failure: bool = None,
+                      char_limit: int = TWITTER_CHAR_LIMIT) -> str:
     """
     Generate a response to a tweet using OpenAI's GPT model
     Args:
         tweet_text: The text of the tweet to respond to
         max_retries: Maximum number of retries on API failure
+        stream: Stream the completion and stop at the character limit
+        cache: Optional ReplyCache consulted before calling the API
+        skip_on_failure: Return None instead of DEFAULT_RESPONSE when every
+            attempt fails; defaults to SKIP_ON_FAILURE
+        char_limit: Maximum reply length, e.g. what is left of the tweet once
+            the reply is prefixed with the author's handle
     Returns:
-        str: Generated response that fits Twitter's character limit
-    """
-    DEFAULT_RESPONSE = "[Test Reply] Thanks for sharing! This is a test response while monitoring functionality is being verified."
-    TWITTER_CHAR_LIMIT = 280
-    SYSTEM_PROMPT = """You are a friendly and engaging Twitter bot that generates thoughtful replies.
-    Your responses should be:
-    1. Concise and under 280 characters
-    2. Relevant to the tweet's content
-    3. Engaging but professional
-    4. Free of hashtags or @mentions
-    5. Natural and conversational
-    Never include URLs or promotional content."""
-    
+        str: Generated response that fits char_limit, or None if generation
+            failed and skipping is enabled
+    """
     if not OPENAI_API_KEY:
         return DEFAULT_RESPONSE
-    
+
+    if cache is not None:
+        cached = cache.get(tweet_text, model)
+        if cached is not None:
+            return _trim_to_sentence(cached, char_limit)
+
+    start = time.monotonic()
+    reply = _generate_with_retries(tweet_text, max_retries, model, stream, skip_on_failure, char_limit)
+    if cache is not None and reply is not None and reply != DEFAULT_RESPONSE:
+        cache.put(tweet_text, model, reply, time.monotonic() - start)
+    return reply
+
+def _complete(tweet_text: str, model: str, char_limit: int = TWITTER_CHAR_LIMIT,
+              cancel: threading.Event = None) -> str:
+    if cancel is not None and cancel.is_set():
+        # Cancelled while queued for a worker; a request already sent cannot be aborted
+        return ""
+    messages = _build_messages(tweet_text, char_limit)
+    response = get_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=completion_budget(char_limit),
+        temperature=TEMPERATURE,
+        timeout=ATTEMPT_TIMEOUT
+    )
+
+    reply = response.choices[0].message.content.strip()
+    usage.record_response(model, getattr(response, 'usage', None), messages, reply, replies=0)
+
+    # Ensure response fits the character limit
+    if len(reply) > char_limit:
+        reply = reply[:char_limit-3] + "..."
+
+    return reply
+
+def _generate_with_retries(tweet_text: str, max_retries: int, model: str, stream: bool,
+                           skip_on_failure: bool = None, char_limit: int = TWITTER_CHAR_LIMIT) -> str:
+    """
+    Generate one reply with hedging, per-attempt timeouts and the circuit
+    breaker, retrying failed attempts with a short backoff
+    """
+    if skip_on_failure is None:
+        skip_on_failure = SKIP_ON_FAILURE
     for attempt in range(max_retries):
+        attempt_model = _select_model(model)
+        breaker = _breaker(attempt_model)
         try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": f"Generate a brief, engaging reply to this tweet (must be under {TWITTER_CHAR_LIMIT} characters): {tweet_text}"}
-                ],
-                max_tokens=100,
-                temperature=0.7  # Slightly creative but still focused
-            )
-            
-            reply = response.choices[0].message.content.strip()
-            
-            # Ensure response fits Twitter's character limit
-            if len(reply) > TWITTER_CHAR_LIMIT:
-                reply = reply[:TWITTER_CHAR_LIMIT-3] + "..."
-            
+            if stream:
+                reply, stats = _call_with_hedge(
+                    lambda cancel: stream_response(tweet_text, model=attempt_model, char_limit=char_limit,
+                                                   cancel=cancel),
+                    attempt_model
+                )
+                logger.debug(f"Streamed reply in {stats['total_latency']:.2f}s "
+                             f"(first token after {stats['time_to_first_token'] or 0:.2f}s, "
+                             f"stopped early: {stats['stopped_early']})")
+                metrics.histogram('llm_time_to_first_token_seconds').observe(stats['time_to_first_token'] or 0)
+                metrics.counter('llm_streams_stopped_early_total').inc(stats['stopped_early'])
+                if not reply:
+                    raise ValueError("Empty streamed completion")
+            else:
+                reply = _call_with_hedge(
+                    lambda cancel: _complete(tweet_text, attempt_model, char_limit, cancel=cancel), attempt_model
+                )
+            breaker.record_success()
+            usage.add_replies(attempt_model)
             return reply
-            
+
         except Exception as e:
-            print(f"Error generating response (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt == max_retries - 1:  # Last attempt failed
-                return DEFAULT_RESPONSE
-            time.sleep(2 ** attempt)  # Exponential backoff
-    
-    return DEFAULT_RESPONSE  # Ensure we always return a string
+            breaker.record_failure()
+            logger.warning(f"Error generating response with {attempt_model} (attempt {attempt + 1}/{max_retries}): {e}")
+            # Back off before retrying the same model; switching to the fallback needs no wait
+            if attempt < max_retries - 1 and _breaker(model).state == 'closed':
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)  # Exponential backoff
+
+    metrics.counter('llm_failures_total').inc()
+    if skip_on_failure:
+        logger.warning("All attempts failed; skipping the reply")
+        return None
+    return DEFAULT_RESPONSE
+
+def _build_batch_messages(tweet_texts: list, char_limit: int = TWITTER_CHAR_LIMIT) -> list:
+    return PROMPT.batch_messages(tweet_texts, char_limit)
+
+def _parse_batch_replies(content: str, count: int, char_limit: int = TWITTER_CHAR_LIMIT) -> dict:
+    """
+    Validate a batch completion
+    Returns:
+        dict: Tweet number (1-based) -> reply, for every valid entry
+    """
+    replies = {}
+    try:
+        entries = json.loads(content)["replies"]
+    except (TypeError, ValueError, KeyError) as e:
+        logger.warning(f"Invalid batch completion: {e}")
+        return replies
+    if not isinstance(entries, list):
+        return replies
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        number, reply = entry.get("id"), entry.get("reply")
+        if isinstance(number, int) and 1 <= number <= count and isinstance(reply, str) and reply.strip():
+            replies[number] = _trim_to_sentence(reply, char_limit)
+    return replies
+
+def generate_responses(tweet_texts: list, batch_size: int = 5, model: str = "gpt-3.5-turbo",
+                       stream: bool = False, cache=None, skip_on_failure: bool = None,
+                       char_limits: list = None) -> list:
+    """
+    Generate replies to several tweets, packing up to batch_size tweets into
+    one completion so the system prompt is sent once per batch
+    Args:
+        tweet_texts: Texts of the tweets to respond to
+        batch_size: Maximum number of tweets per completion request
+        model: OpenAI model name
+        stream: Stream the per-tweet fallback calls
+        cache: Optional ReplyCache; only tweets without a cached reply are sent
+        skip_on_failure: Use None for tweets whose generation failed instead
+            of DEFAULT_RESPONSE; defaults to SKIP_ON_FAILURE
+        char_limits: Maximum length of each reply, TWITTER_CHAR_LIMIT for all by default
+    Returns:
+        list: One reply per tweet, in the same order. Tweets whose reply is
+            missing or invalid in the batch result fall back to generate_response
+    """
+    if not OPENAI_API_KEY:
+        return [DEFAULT_RESPONSE] * len(tweet_texts)
+
+    char_limits = char_limits or [TWITTER_CHAR_LIMIT] * len(tweet_texts)
+    replies = [None] * len(tweet_texts)
+    if cache is not None:
+        for index, tweet_text in enumerate(tweet_texts):
+            cached = cache.get(tweet_text, model)
+            replies[index] = _trim_to_sentence(cached, char_limits[index]) if cached is not None else None
+    pending = [index for index, reply in enumerate(replies) if reply is None]
+
+    for start in range(0, len(pending), batch_size):
+        indexes = pending[start:start + batch_size]
+        batch = [tweet_texts[index] for index in indexes]
+        if len(batch) == 1:
+            single_start = time.monotonic()
+            replies[indexes[0]] = _generate_with_retries(
+                batch[0], 3, model, stream, skip_on_failure, char_limits[indexes[0]]
+            )
+            if cache is not None and replies[indexes[0]] not in (None, DEFAULT_RESPONSE):
+                cache.put(batch[0], model, replies[indexes[0]], time.monotonic() - single_start)
+            continue
+
+        parsed = {}
+        batch_start = time.monotonic()
+        batch_model = _select_model(model)
+        # One limit for the whole batch: the tightest of its tweets
+        batch_limit = min(char_limits[index] for index in indexes)
+        messages = _build_batch_messages(batch, batch_limit)
+        try:
+            response = get_client().chat.completions.create(
+                model=batch_model,
+                messages=messages,
+                max_tokens=completion_budget(batch_limit, len(batch)),
+                temperature=TEMPERATURE,
+                response_format={"type": "json_object"},
+                timeout=ATTEMPT_TIMEOUT
+            )
+            content = response.choices[0].message.content
+            parsed = _parse_batch_replies(content, len(batch), batch_limit)
+            usage.record_response(batch_model, getattr(response, 'usage', None), messages, content,
+                                  replies=len(parsed))
+            _breaker(batch_model).record_success()
+        except Exception as e:
+            _breaker(batch_model).record_failure()
+            logger.error(f"Error generating batch of {len(batch)} responses: {e}")
+
+        if len(parsed) < len(batch):
+            logger.info(f"Batch returned {len(parsed)}/{len(batch)} valid replies, generating the rest individually")
+        latency = (time.monotonic() - batch_start) / len(batch)
+        for number, (index, tweet_text) in enumerate(zip(indexes, batch), 1):
+            reply = parsed.get(number)
+            if reply is None:
+                reply = _generate_with_retries(tweet_text, 3, model, stream, skip_on_failure, char_limits[index])
+            if cache is not None and reply not in (None, DEFAULT_RESPONSE):
+                cache.put(tweet_text, model, reply, latency)
+            replies[index] = reply
+    return replies
@@ -1,34 +1,222 @@
+import atexit
+import contextvars
+import itertools
+import json
 import logging
-from datetime import datetime
+import logging.handlers
 import os
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+LOG_DIR = os.getenv('BOT_LOG_DIR', 'logs')
+LOG_FILE = 'twitter_bot.log'
+MAX_BYTES = int(os.getenv('BOT_LOG_MAX_BYTES', 10 * 1024 * 1024))
+BACKUP_COUNT = int(os.getenv('BOT_LOG_BACKUPS', 7))
+JSON_LOGS = os.getenv('BOT_LOG_JSON', '').lower() in ('1', 'true', 'yes')
+DEBUG_SAMPLE_RATE = float(os.getenv('BOT_LOG_DEBUG_SAMPLE', 0.01))
+# extra= of per-tweet debug records, the only ones sampled
+HIGH_VOLUME = {'high_volume': True}
+
+# Correlation ID of the tweet currently being processed, attached to every record
+_correlation_id = contextvars.ContextVar('correlation_id', default=None)
+
+_queue = queue.SimpleQueue()
+_listener = None
+_listener_lock = threading.Lock()
+_json_format = JSON_LOGS
+
+
+@contextmanager
+def log_context(tweet_id):
+    """
+    Tag every log record emitted inside the block (including from threads
+    started with asyncio.to_thread) with the tweet's correlation ID
+    """
+    token = _correlation_id.set(str(tweet_id))
+    try:
+        yield
+    finally:
+        _correlation_id.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the current correlation ID onto the record in the emitting thread"""
+
+    def filter(self, record):
+        record.correlation_id = _correlation_id.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Keep only a deterministic fraction of the DEBUG records logged with
+    extra=HIGH_VOLUME, so per-tweet debug events cannot flood the queue;
+    every other record passes
+    """
+
+    def __init__(self, rate: float = DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.every = max(int(round(1 / rate)), 1) if rate > 0 else 0
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno != logging.DEBUG or not getattr(record, 'high_volume', False):
+            return True
+        if not self.every:
+            return False
+        return next(self._counter) % self.every == 0
+
+
+class JSONFormatter(logging.Formatter):
+    """Compact one-object-per-line formatter"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        correlation_id = getattr(record, 'correlation_id', None)
+        if correlation_id:
+            entry['tweet_id'] = correlation_id
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+
+
+class TextFormatter(logging.Formatter):
+    """The classic text format, with the correlation ID when there is one"""
+
+    def format(self, record):
+        message = super().format(record)
+        correlation_id = getattr(record, 'correlation_id', None)
+        if correlation_id:
+            return f"[tweet {correlation_id}] {message}"
+        return message
+
+
+class SizedTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """Rotates at the configured time boundary or once the file exceeds max_bytes"""
+
+    def __init__(self, filename, max_bytes: int = MAX_BYTES, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+        self._formatted = None  # (record, message) measured by shouldRollover, written by emit
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes and self.stream is not None:
+            message = self.format(record)
+            self._formatted = (record, message)
+            self.stream.seek(0, os.SEEK_END)
+            return self.stream.tell() + len(message) + 1 >= self.max_bytes
+        return False
+
+    def format(self, record):
+        # emit() runs right after shouldRollover() under the handler lock, so
+        # the message measured there is reused instead of formatted again
+        formatted, self._formatted = self._formatted, None
+        if formatted is not None and formatted[0] is record:
+            return formatted[1]
+        return super().format(record)
+
+    def rotation_filename(self, default_name):
+        # Several size rollovers on one day get numbered instead of overwriting
+        # each other; the suffix still matches the handler's backup pattern
+        name, index = default_name, 0
+        while os.path.exists(name):
+            index += 1
+            name = f"{default_name}.{index:03d}"
+        return name
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that starts the background listener on the first record,
+    so creating a logger costs nothing: no log directory, file or thread
+    exists until something is actually logged
+    """
+
+    def emit(self, record):
+        if _listener is None:
+            _start_listener()
+        super().emit(record)
+
+
+def _start_listener():
+    """
+    Start the shared background thread that formats records and does all
+    file and console I/O
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        if not os.path.exists(LOG_DIR):
+            os.makedirs(LOG_DIR)
 
-def setup_logger(name='twitter_bot'):
-    """Set up logger with file and console handlers"""
-    # Create logs directory if it doesn't exist
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
-    
-    # Create logger
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    # Prevent adding handlers multiple times
-    if not logger.handlers:
         # Create console handler
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
-        console_formatter = logging.Formatter('%(levelname)s - %(message)s')
-        console_handler.setFormatter(console_formatter)
-        
-        # Create file handler
-        log_file = f'logs/twitter_bot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
-        file_handler = logging.FileHandler(log_file)
+        console_handler.setFormatter(TextFormatter('%(levelname)s - %(message)s'))
+
+        # Create file handler, rotated daily and by size
+        file_handler = SizedTimedRotatingFileHandler(
+            os.path.join(LOG_DIR, LOG_FILE), when='midnight', backupCount=BACKUP_COUNT,
+            encoding='utf-8', delay=True
+        )
         file_handler.setLevel(logging.DEBUG)
-        file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(file_formatter)
-        
-        # Add handlers to logger
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
-    
+        if _json_format:
+            file_handler.setFormatter(JSONFormatter())
+        else:
+            file_handler.setFormatter(TextFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+        listener = logging.handlers.QueueListener(
+            _queue, console_handler, file_handler, respect_handler_level=True
+        )
+        listener.start()
+        atexit.register(stop_logging)
+        _listener = listener
+
+
+def stop_logging():
+    """Flush queued records and stop the background logging thread"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def setup_logger(name='twitter_bot', json_format: bool = None):
+    """
+    Set up a logger whose records are handed to a background thread through
+    a queue, so logging never blocks the monitor loop on disk or console I/O.
+    All loggers share one rotating file, logs/twitter_bot.log, which is only
+    created when the first record is logged.
+    Args:
+        name: Logger name
+        json_format: Write the log file as JSON lines instead of text;
+            defaults to BOT_LOG_JSON. Takes effect if given before the first record
+    """
+    global _json_format
+    if json_format is not None and _listener is None:
+        _json_format = json_format
+
+    # Create logger
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)
+
+    # Prevent adding handlers multiple times
+    if not logger.handlers:
+        queue_handler = LazyQueueHandler(_queue)
+        queue_handler.addFilter(DebugSamplingFilter())
+        queue_handler.addFilter(ContextFilter())
+        logger.addHandler(queue_handler)
+        logger.propagate = False
+
     return logger
@@ -0,0 +1,120 @@
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logger import setup_logger
+from src.metrics import metrics
+
+logger = setup_logger('twitter_bot')
+
+
+class ListMembership:
+    """
+    Index of the members of the monitored lists.
+
+    Each list is downloaded in full once; later refreshes compare the new
+    member set with the index and apply only the added and removed members
+    in place. The changes are kept for the state store, so a restarted bot
+    loads the index instead of paginating every list again. monitored_users
+    merges all lists into one author_id -> username dict for O(1) lookups.
+    """
+
+    def __init__(self, clock=time.time):
+        """
+        Args:
+            clock (callable): Wall-clock time source, injectable for tests
+        """
+        self.clock = clock
+        self.members = {}  # list_id -> {user_id: username}
+        self.synced_at = {}  # list_id -> time of the last full download
+        self.monitored_users = {}  # user_id -> username, across all lists
+        self._list_counts = {}  # user_id -> number of lists the user is on
+        self._changed = {}
+        metrics.gauge('list_members', fn=lambda: len(self.monitored_users))
+
+    def load(self, entries: dict):
+        """
+        Load an index saved by the state store
+        Args:
+            entries (dict): list_id -> {'members': {user_id: username}, 'synced_at': float}
+        """
+        for list_id, entry in entries.items():
+            self._apply(list_id, entry['members'])
+            self.synced_at[list_id] = entry['synced_at']
+        self._changed.clear()
+
+    def due(self, list_id: str, max_age: float = 0) -> bool:
+        """Whether a list has never been downloaded or its copy is older than max_age seconds"""
+        synced_at = self.synced_at.get(list_id)
+        return synced_at is None or self.clock() - synced_at >= max_age
+
+    def mark_stale(self, list_id: str):
+        """Have the next due() check refresh the list, e.g. after seeing an unknown author"""
+        if list_id in self.synced_at:
+            self.synced_at[list_id] = float('-inf')
+
+    def update(self, list_id: str, current: dict) -> dict:
+        """
+        Replace a list's members with a fresh download, applying only the differences
+        Args:
+            list_id (str): List ID
+            current (dict): user_id -> username of every member
+        Returns:
+            dict: The 'added' (user_id -> username, including renamed users)
+                and 'removed' (user IDs) members
+        """
+        diff = self._apply(list_id, current)
+        self.synced_at[list_id] = self.clock()
+        change = self._changed.setdefault(list_id, {'added': {}, 'removed': set()})
+        for user_id, username in diff['added'].items():
+            change['added'][user_id] = username
+            change['removed'].discard(user_id)
+        for user_id in diff['removed']:
+            change['added'].pop(user_id, None)
+            change['removed'].add(user_id)
+        change['synced_at'] = self.synced_at[list_id]
+        if diff['added'] or diff['removed']:
+            metrics.counter('list_member_changes_total').inc(len(diff['added']) + len(diff['removed']))
+            logger.info(f"List {list_id} membership: {len(diff['added'])} added, {len(diff['removed'])} removed")
+        return diff
+
+    def _apply(self, list_id: str, current: dict) -> dict:
+        members = self.members.setdefault(list_id, {})
+        added = {user_id: username for user_id, username in current.items() if members.get(user_id) != username}
+        removed = [user_id for user_id in members if user_id not in current]
+        for user_id, username in added.items():
+            if user_id not in members:
+                self._list_counts[user_id] = self._list_counts.get(user_id, 0) + 1
+            members[user_id] = username
+            self.monitored_users[user_id] = username
+        for user_id in removed:
+            del members[user_id]
+            self._list_counts[user_id] -= 1
+            if not self._list_counts[user_id]:
+                del self._list_counts[user_id]
+                del self.monitored_users[user_id]
+        return {'added': added, 'removed': removed}
+
+    def is_member(self, user_id: str, list_id: str = None) -> bool:
+        """Whether a user is on the given list, or on any monitored list"""
+        if list_id is None:
+            return user_id in self.monitored_users
+        return user_id in self.members.get(list_id, ())
+
+    def usernames(self, list_id: str) -> list:
+        return list(self.members.get(list_id, {}).values())
+
+    def drain_changed(self) -> dict:
+        """
+        Return the membership changes since the last call, for the state store
+        Returns:
+            dict: list_id -> {'added': {user_id: username}, 'removed': [user_id], 'synced_at': float}
+        """
+        changed, self._changed = self._changed, {}
+        for change in changed.values():
+            change['removed'] = sorted(change['removed'])
+        return changed
+
+    def __contains__(self, list_id) -> bool:
+        return list_id in self.synced_at
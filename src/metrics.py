@@ -0,0 +1,276 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = 'twitter_bot_'
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+class Counter:
+    """Monotonically increasing count"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Point-in-time value, either set directly or read from a callback"""
+
+    def __init__(self, fn=None):
+        self.fn = fn
+        self._value = 0
+
+    def set(self, value: float):
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        if self.fn is not None:
+            try:
+                return self.fn()
+            except Exception:
+                return float('nan')
+        return self._value
+
+
+class Histogram:
+    """
+    Latency distribution over a bounded reservoir of the most recent samples.
+
+    Percentiles are computed on demand from the reservoir, so recording a
+    sample is O(1) and memory stays fixed; count and sum cover all samples.
+    """
+
+    def __init__(self, reservoir_size: int = 2048):
+        self.count = 0
+        self.sum = 0.0
+        self._samples = deque(maxlen=reservoir_size)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self._samples.append(value)
+
+    def percentiles(self, quantiles=QUANTILES) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {quantile: 0.0 for quantile in quantiles}
+        return {
+            quantile: samples[min(int(quantile * len(samples)), len(samples) - 1)]
+            for quantile in quantiles
+        }
+
+
+class MetricsRegistry:
+    """
+    Process-wide registry of counters, gauges and latency histograms.
+
+    Metrics are identified by name plus optional labels, e.g.
+    histogram('stage_latency_seconds', stage='create_tweet'), and are
+    created on first use.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._help = {}
+        self._lock = threading.Lock()
+        self._last_summary = time.monotonic()
+        self._in_flight = {}  # Token -> (stage, thread ID, start) of the timed blocks still running
+
+    def _get(self, kind, name: str, labels: dict, factory):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = self._metrics[key] = factory()
+        if not isinstance(metric, kind):
+            raise TypeError(f"Metric {name} is already registered as {type(metric).__name__}")
+        return metric
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get(Counter, name, labels, Counter)
+
+    def gauge(self, name: str, fn=None, **labels) -> Gauge:
+        """Get a gauge; passing fn (re)binds it to a callback read at export time"""
+        gauge = self._get(Gauge, name, labels, Gauge)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        return self._get(Histogram, name, labels, Histogram)
+
+    def describe(self, name: str, help_text: str):
+        """Attach a HELP line to a metric family"""
+        self._help[name] = help_text
+
+    @contextmanager
+    def time(self, stage: str):
+        """Record the duration of the with-block in the stage latency histogram"""
+        start = time.monotonic()
+        token = object()
+        self._in_flight[token] = (stage, threading.get_ident(), start)
+        try:
+            yield
+        finally:
+            del self._in_flight[token]
+            self.histogram('stage_latency_seconds', stage=stage).observe(time.monotonic() - start)
+
+    def in_flight(self) -> list:
+        """
+        Timed blocks that have not finished yet, e.g. to find stuck API calls
+        Returns:
+            list: (stage, thread ID, seconds running) tuples, longest running first
+        """
+        now = time.monotonic()
+        running = [(stage, thread_id, now - start) for stage, thread_id, start in list(self._in_flight.values())]
+        return sorted(running, key=lambda call: call[2], reverse=True)
+
+    def _items(self) -> list:
+        """Snapshot of the metrics sorted by key, safe while other threads create metrics"""
+        with self._lock:
+            items = list(self._metrics.items())
+        return sorted(items, key=lambda item: item[0])
+
+    def render_prometheus(self) -> str:
+        """Export every metric in the Prometheus text exposition format"""
+        families = {}
+        for (name, labels), metric in self._items():
+            families.setdefault(name, []).append((labels, metric))
+
+        lines = []
+        for name, members in families.items():
+            full_name = PREFIX + name
+            kind = {Counter: 'counter', Gauge: 'gauge', Histogram: 'summary'}[type(members[0][1])]
+            if name in self._help:
+                lines.append(f"# HELP {full_name} {self._help[name]}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for labels, metric in members:
+                if isinstance(metric, Histogram):
+                    for quantile, value in metric.percentiles().items():
+                        quantile_labels = labels + (('quantile', quantile),)
+                        lines.append(f"{full_name}{_format_labels(quantile_labels)} {value}")
+                    lines.append(f"{full_name}_sum{_format_labels(labels)} {metric.sum}")
+                    lines.append(f"{full_name}_count{_format_labels(labels)} {metric.count}")
+                else:
+                    lines.append(f"{full_name}{_format_labels(labels)} {metric.value}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> str:
+        """One-line human-readable summary for periodic log output"""
+        parts = []
+        for (name, labels), metric in self._items():
+            label = name + ''.join(f"[{value}]" for _, value in labels)
+            if isinstance(metric, Histogram):
+                if not metric.count:
+                    continue
+                p = metric.percentiles()
+                parts.append(
+                    f"{label} n={metric.count} p50={p[0.5] * 1000:.0f}ms "
+                    f"p95={p[0.95] * 1000:.0f}ms p99={p[0.99] * 1000:.0f}ms"
+                )
+            else:
+                parts.append(f"{label}={metric.value:g}")
+        return 'Metrics: ' + '; '.join(parts)
+
+    def maybe_log_summary(self, logger, interval: float = 300):
+        """Log summary() if at least interval seconds passed since the last one"""
+        now = time.monotonic()
+        if now - self._last_summary >= interval:
+            self._last_summary = now
+            logger.info(self.summary())
+
+    def reset(self):
+        """Drop every metric (used by tests and benchmarks)"""
+        with self._lock:
+            self._metrics.clear()
+
+
+metrics = MetricsRegistry()
+metrics.describe('stage_latency_seconds', 'Latency of each monitoring stage')
+metrics.describe('tweets_fetched_total', 'New tweets returned by list polls')
+metrics.describe('tweets_filtered_total', 'Retweets and replies dropped before processing')
+metrics.describe('tweets_deduplicated_total', 'Tweets skipped because they were already processed')
+metrics.describe('replies_posted_total', 'Replies posted successfully')
+metrics.describe('reply_errors_total', 'Replies that failed to post')
+metrics.describe('rate_limited_total', 'Twitter API 429 responses')
+metrics.describe('stream_tweets_total', 'Tweets received from the filtered stream')
+metrics.describe('stream_reconnects_total', 'Filtered stream disconnects followed by a reconnect')
+metrics.describe('reply_queue_depth', 'Reply jobs waiting in each worker pool stage')
+metrics.describe('reply_job_wait_seconds', 'Time reply jobs wait in each worker pool queue')
+metrics.describe('reply_jobs_expired_total', 'Reply jobs dropped after missing their deadline')
+metrics.describe('priority_queue_depth', 'Candidate replies waiting in the priority queue')
+metrics.describe('priority_queue_evicted_total', 'Candidate replies dropped for being too old')
+metrics.describe('priority_quota_skipped_total', 'Candidate replies skipped because the author hit the daily limit')
+metrics.describe('priority_score', 'Scores of the candidate replies taken from the queue')
+metrics.describe('filter_rejected_total', 'Tweets discarded by each tweet filter rule before any API call')
+metrics.describe('llm_request_seconds', 'Latency of successful OpenAI requests per model')
+metrics.describe('llm_hedged_requests_total', 'Hedged second requests sent after the p95 latency')
+metrics.describe('llm_hedge_wins_total', 'Hedged requests that answered first')
+metrics.describe('llm_requests_cancelled_total', 'Hedged or timed-out requests told to stop because their result was no longer needed')
+metrics.describe('llm_fallback_requests_total', 'Requests routed to the fallback model by an open breaker')
+metrics.describe('llm_circuit_opened_total', 'Times a model circuit breaker opened')
+metrics.describe('llm_circuit_open', 'Whether the model circuit breaker is open or half-open')
+metrics.describe('llm_failures_total', 'Replies whose generation failed on every attempt')
+metrics.describe('processed_tweets', 'Size of the processed tweet dedup set')
+metrics.describe('quota_tracked_users', 'Authors with replies inside the rolling quota window')
+metrics.describe('quota_denied_total', 'Replies refused by the reply quota, by limit')
+metrics.describe('list_members', 'Distinct members of the monitored lists')
+metrics.describe('list_member_changes_total', 'Members added to or removed from monitored lists')
+metrics.describe('stream_non_member_total', 'Streamed tweets dropped because the author left the list')
+metrics.describe('stream_dropped_total', 'Streamed tweets dropped because the reply queue was full')
+metrics.describe('stream_reply_queue_depth', 'Streamed tweet batches waiting for the reply thread')
+metrics.describe('tweet_claims_lost_total', 'Tweets skipped because another worker process claimed them')
+metrics.describe('supervisor_workers_alive', 'Worker processes currently running')
+metrics.describe('supervisor_worker_failures_total', 'Worker processes that exited with an error')
+metrics.describe('profile_dumps_total', 'Profiles, memory reports and stack dumps written, by kind')
+metrics.describe('stuck_calls_total', 'API calls that ran past the stuck-call threshold')
+metrics.describe('llm_tokens_total', 'OpenAI tokens billed, by model and kind (prompt, cached prompt, completion)')
+metrics.describe('llm_cost_usd_total', 'Estimated OpenAI spend in USD, by model')
+
+
+def start_metrics_server(port: int = 9108, host: str = '127.0.0.1', registry: MetricsRegistry = None):
+    """
+    Serve the registry at http://host:port/metrics from a daemon thread
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it
+    """
+    registry = registry or metrics
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep scrapes out of the bot's console output
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics_server', daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,64 @@
+"""
+Sample list tweets and authors used by the tests and the offline benchmark.
+
+Shapes mirror the Twitter API v2 payloads the bot requests: tweets carry
+id, text, author_id and referenced_tweets; users carry id and username.
+"""
+
+MOCK_USERS = {
+    '1001': {'id': '1001', 'username': 'ada_builds'},
+    '1002': {'id': '1002', 'username': 'grace_ships'},
+    '1003': {'id': '1003', 'username': 'linus_reviews'},
+    '1004': {'id': '1004', 'username': 'margaret_tests'},
+}
+
+MOCK_TWEETS = [
+    {
+        'id': '1872300000000000008',
+        'text': 'Just shipped a new release of our open-source scheduler. Feedback welcome!',
+        'author_id': '1001',
+        'referenced_tweets': None,
+    },
+    {
+        'id': '1872300000000000007',
+        'text': 'Hot take: most performance problems are really queueing problems.',
+        'author_id': '1002',
+        'referenced_tweets': None,
+    },
+    {
+        'id': '1872300000000000006',
+        'text': 'RT @someone: Conference talks are now online https://t.co/talks',
+        'author_id': '1003',
+        'referenced_tweets': [{'type': 'retweeted', 'id': '1872299999999999990'}],
+    },
+    {
+        'id': '1872300000000000005',
+        'text': 'Agreed, measuring first saved us weeks.',
+        'author_id': '1004',
+        'referenced_tweets': [{'type': 'replied_to', 'id': '1872299999999999991'}],
+    },
+    {
+        'id': '1872300000000000004',
+        'text': 'Reading about tail latency today. Hedged requests are a neat trick.',
+        'author_id': '1003',
+        'referenced_tweets': None,
+    },
+    {
+        'id': '1872300000000000003',
+        'text': 'What is your favourite profiling tool for Python services?',
+        'author_id': '1004',
+        'referenced_tweets': None,
+    },
+    {
+        'id': '1872300000000000002',
+        'text': 'Second release this week, the CI pipeline finally got faster.',
+        'author_id': '1001',
+        'referenced_tweets': None,
+    },
+    {
+        'id': '1872300000000000001',
+        'text': 'Small teams can move surprisingly fast with good tooling.',
+        'author_id': '1002',
+        'referenced_tweets': None,
+    },
+]
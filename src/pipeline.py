@@ -0,0 +1,240 @@
+import asyncio
+import tweepy
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm import generate_response
+from src.prompt import reply_char_limit
+from src.logger import log_context, setup_logger
+from src.metrics import metrics
+from src.scheduler import LIST_TWEETS_ENDPOINT
+
+logger = setup_logger('twitter_bot')
+
+# Sentinel pushed through the queues to stop stage workers
+_STOP = object()
+
+
+class TweetPipeline:
+    """
+    Asyncio version of TwitterBot.monitor_list_tweets.
+
+    Tweets flow through four stages joined by bounded queues:
+    fetch -> enrich (batched author lookup and quota check) -> generate (LLM) -> post.
+    Each stage runs its own pool of workers, so a slow OpenAI call only holds
+    up one generate worker instead of the whole cycle. Blocking tweepy and
+    OpenAI calls run in a thread pool sized to the total stage concurrency.
+    """
+
+    def __init__(self, bot, list_id: str, interval: int = 60,
+                 enrich_concurrency: int = 4, generate_concurrency: int = 4,
+                 post_concurrency: int = 2, queue_size: int = 50):
+        """
+        Args:
+            bot (TwitterBot): Bot providing the Twitter client and reply tracking
+            list_id (str): ID of the Twitter list to monitor
+            interval (int): Time between list fetches on a quiet list, adapted by the bot's scheduler
+            enrich_concurrency (int): Concurrent author lookups
+            generate_concurrency (int): Concurrent LLM calls
+            post_concurrency (int): Concurrent create_tweet calls
+            queue_size (int): Capacity of each inter-stage queue
+        """
+        self.bot = bot
+        self.list_id = list_id
+        self.interval = interval
+        bot.scheduler.base_interval = interval
+        self.concurrency = {
+            'enrich': enrich_concurrency,
+            'generate': generate_concurrency,
+            'post': post_concurrency,
+        }
+        self.queue_size = queue_size
+        # Tweets currently inside the pipeline, so the next fetch does not
+        # enqueue them a second time while they are still being answered
+        self.in_flight = set()
+
+    async def run(self, max_cycles: int = None):
+        """
+        Run the pipeline until cancelled, or for max_cycles fetches
+        Args:
+            max_cycles (int): Number of fetch cycles to run, None for forever
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(
+            max_workers=1 + sum(self.concurrency.values()),
+            thread_name_prefix='tweet_pipeline'
+        )
+        loop.set_default_executor(executor)
+
+        self.enrich_queue = asyncio.Queue(maxsize=self.queue_size)
+        self.generate_queue = asyncio.Queue(maxsize=self.queue_size)
+        self.post_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        stages = [
+            ('enrich', self._enrich_worker, self.enrich_queue),
+            ('generate', self._generate_worker, self.generate_queue),
+            ('post', self._post_worker, self.post_queue),
+        ]
+        workers = {
+            name: [asyncio.create_task(worker(queue)) for _ in range(self.concurrency[name])]
+            for name, worker, queue in stages
+        }
+
+        try:
+            await self._fetch_stage(max_cycles)
+            # Drain the stages in order so every fetched tweet is finished
+            for name, _, queue in stages:
+                for _ in workers[name]:
+                    await queue.put(_STOP)
+                await asyncio.gather(*workers[name])
+        finally:
+            self.bot.save_state()
+            for tasks in workers.values():
+                for task in tasks:
+                    task.cancel()
+            executor.shutdown(wait=False)
+        return True
+
+    async def _fetch_stage(self, max_cycles: int = None):
+        """Fetch list tweets on the scheduler's cadence and feed new ones to the enrich stage"""
+        logger.info(f"Starting async monitoring of list {self.list_id} at {datetime.now(timezone.utc)}")
+        cycles = 0
+        while max_cycles is None or cycles < max_cycles:
+            cycles += 1
+            try:
+                logger.debug(f"Checking for new tweets at {datetime.now(timezone.utc)}")
+                tweets = await asyncio.to_thread(self.bot._fetch_list_tweets, self.list_id)
+                # Fetched tweets are tracked in flight from here on
+                self.bot._advance_high_water()
+                new_tweets = [
+                    tweet for tweet in tweets
+                    if tweet.id not in self.bot.processed_tweets
+                    and tweet.id not in self.in_flight
+                ]
+                metrics.counter('tweets_deduplicated_total').inc(len(tweets) - len(new_tweets))
+                if not new_tweets:
+                    logger.debug("No new tweets found")
+                for tweet in new_tweets:
+                    self.in_flight.add(tweet.id)
+                    # Blocks when the enrich queue is full (backpressure)
+                    await self.enrich_queue.put(tweet)
+
+                # Persist replies posted since the previous cycle
+                self.bot.save_state()
+                metrics.maybe_log_summary(logger)
+                delay = self.bot.scheduler.next_delay(LIST_TWEETS_ENDPOINT)
+
+            except tweepy.TooManyRequests as e:
+                metrics.counter('rate_limited_total').inc()
+                reset_time = int(e.response.headers.get('x-rate-limit-reset', 900))
+                current_time = int(datetime.now(timezone.utc).timestamp())
+                delay = max(reset_time - current_time, 60)
+                logger.warning(f"Rate limit exceeded. Waiting {delay} seconds...")
+
+            except tweepy.TwitterServerError as e:
+                logger.error(f"Twitter server error: {e}", exc_info=True)
+                delay = 60
+
+            except Exception as e:
+                logger.error(f"Error fetching tweets: {e}", exc_info=True)
+                delay = 30
+
+            if max_cycles is None or cycles < max_cycles:
+                await asyncio.sleep(delay)
+
+    async def _enrich_worker(self, queue: asyncio.Queue):
+        """Resolve tweet authors in batches and drop tweets over the reply limit"""
+        while True:
+            tweet = await queue.get()
+            if tweet is _STOP:
+                return
+            # Drain whatever else is waiting so authors resolve in one bulk call
+            batch = [tweet]
+            while len(batch) < 100 and not queue.empty():
+                tweet = queue.get_nowait()
+                if tweet is _STOP:
+                    queue.put_nowait(tweet)
+                    break
+                batch.append(tweet)
+
+            try:
+                usernames = await asyncio.to_thread(
+                    self.bot._resolve_usernames, [str(tweet.author_id) for tweet in batch]
+                )
+            except Exception as e:
+                logger.error(f"Error resolving tweet authors: {e}", exc_info=True)
+                for tweet in batch:
+                    self.in_flight.discard(tweet.id)
+                continue
+
+            for tweet in batch:
+                tweet_id = tweet.id
+                author_id = str(tweet.author_id)
+                username = usernames.get(author_id)
+                if not username:
+                    logger.warning(f"Could not fetch author information for tweet {tweet_id}")
+                    self.in_flight.discard(tweet_id)
+                    continue
+                if not self.bot.can_reply_to_user(author_id):
+                    logger.info(f"Reply limit reached for user {username}")
+                    self.in_flight.discard(tweet_id)
+                    continue
+                if self.bot.coordinator is not None and \
+                        not await asyncio.to_thread(self.bot.coordinator.claim, tweet_id):
+                    self.in_flight.discard(tweet_id)
+                    continue
+                logger.info(f"New tweet from @{username}: {tweet.text[:50]}...")
+                await self.generate_queue.put((tweet_id, author_id, username, tweet.text))
+
+    async def _generate_worker(self, queue: asyncio.Queue):
+        """Generate a reply for each tweet with the LLM"""
+        while True:
+            job = await queue.get()
+            if job is _STOP:
+                return
+            tweet_id, author_id, username, text = job
+            try:
+                # to_thread copies the context, so the worker thread's records carry the tweet ID
+                with log_context(tweet_id):
+                    response = await asyncio.to_thread(
+                        self._timed_generate, text, stream=self.bot.stream_replies, cache=self.bot.reply_cache,
+                        char_limit=reply_char_limit(username)
+                    )
+                if response is None:
+                    logger.info(f"Skipping reply to tweet {tweet_id}: no response was generated")
+                    self.in_flight.discard(tweet_id)
+                    continue
+                await self.post_queue.put((tweet_id, author_id, username, text, response))
+            except Exception as e:
+                logger.error(f"Error generating reply for tweet {tweet_id}: {e}", exc_info=True)
+                self.in_flight.discard(tweet_id)
+
+    def _timed_generate(self, text: str, **kwargs):
+        with metrics.time('generate_response'):
+            return generate_response(text, **kwargs)
+
+    async def _post_worker(self, queue: asyncio.Queue):
+        """Post generated replies, charging them against the reply quota"""
+        while True:
+            job = await queue.get()
+            if job is _STOP:
+                return
+            tweet_id, author_id, username, text, response = job
+            try:
+                # The quota is charged atomically before posting: several tweets
+                # from one author may have been generated concurrently
+                with log_context(tweet_id):
+                    posted = await asyncio.to_thread(
+                        self.bot._post_within_quota, tweet_id, author_id, username, response
+                    )
+                if posted:
+                    # Bookkeeping stays on the event loop thread
+                    self.bot.processed_tweets.add(tweet_id)
+                    logger.info(f"Successfully replied to @{username}'s tweet: {text[:50]}...")
+            except Exception as e:
+                logger.error(f"Error posting reply to tweet {tweet_id}: {e}", exc_info=True)
+            finally:
+                self.in_flight.discard(tweet_id)
@@ -0,0 +1,154 @@
+import heapq
+import itertools
+import math
+import time
+from datetime import datetime
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logger import HIGH_VOLUME, setup_logger
+from src.metrics import metrics
+from src.records import TweetRecord, _engagement
+
+logger = setup_logger('twitter_bot')
+
+
+def tweet_timestamp(tweet):
+    """
+    Posting time of a tweet as a Unix timestamp
+    Returns:
+        float: Timestamp, or None if the tweet has no created_at
+    """
+    if isinstance(tweet, TweetRecord):
+        return tweet.timestamp
+    created_at = getattr(tweet, 'created_at', None)
+    return created_at.timestamp() if isinstance(created_at, datetime) else None
+
+
+def engagement(tweet) -> int:
+    """Weighted engagement from the tweet's public_metrics, 0 if they were not requested"""
+    if isinstance(tweet, TweetRecord):
+        return tweet.engagement  # Computed on ingestion
+    return _engagement(getattr(tweet, 'public_metrics', None))
+
+
+def make_scorer(half_life: float = 600, engagement_weight: float = 1.0, author_weights: dict = None):
+    """
+    Build the default scoring function: an exponentially decaying freshness
+    term times a value term from engagement and an optional per-author weight.
+
+    Because freshness decays by the same factor for every tweet, the relative
+    order of two scored tweets never changes as they wait, so scores can be
+    computed once on arrival.
+    Args:
+        half_life (float): Seconds after which a tweet's score halves
+        engagement_weight (float): Weight of log engagement in the value term
+        author_weights (dict): author_id -> multiplier for favoured or muted authors
+    Returns:
+        callable: score(tweet, now) -> float, higher is answered first
+    """
+    author_weights = author_weights or {}
+
+    def score(tweet, now: float) -> float:
+        posted = tweet_timestamp(tweet)
+        age = max(now - posted, 0) if posted is not None else 0
+        freshness = 0.5 ** (age / half_life)
+        value = 1 + engagement_weight * math.log1p(engagement(tweet))
+        return freshness * value * author_weights.get(str(tweet.author_id), 1.0)
+
+    return score
+
+
+class ReplyQueue:
+    """
+    Max-heap of candidate replies ordered by a pluggable score.
+
+    push and pop are O(log n). Items older than max_age (by tweet creation
+    time, or by arrival time when that is unknown) are evicted lazily as
+    they reach the top, and by evict_expired() between cycles.
+    """
+
+    def __init__(self, score_fn=None, max_age: float = 900, clock=time.time):
+        """
+        Args:
+            score_fn (callable): score(tweet, now) -> float; defaults to make_scorer()
+            max_age (float): Seconds after which a queued tweet is no longer worth answering
+            clock (callable): Wall-clock time source, injectable for tests
+        """
+        self.score_fn = score_fn or make_scorer()
+        self.max_age = max_age
+        self.clock = clock
+        self._heap = []
+        self._ids = set()
+        self._seq = itertools.count()  # Ties go to the earlier arrival
+        self.evicted = 0
+        metrics.gauge('priority_queue_depth', fn=lambda: len(self._ids))
+
+    def push(self, tweet_id: int, item, tweet) -> float:
+        """
+        Queue an item for a tweet unless that tweet is already queued
+        Args:
+            tweet_id (int): Tweet ID, used for deduplication
+            item: Payload returned by pop(), e.g. a reply job tuple
+            tweet: Tweet object passed to the score function
+        Returns:
+            float: The tweet's score
+        """
+        now = self.clock()
+        score = self.score_fn(tweet, now)
+        if tweet_id in self._ids:
+            return score
+        posted = tweet_timestamp(tweet)
+        expires_at = (posted if posted is not None else now) + self.max_age
+        heapq.heappush(self._heap, (-score, next(self._seq), tweet_id, expires_at, item))
+        self._ids.add(tweet_id)
+        return score
+
+    def pop(self):
+        """
+        Remove the highest-scoring item that has not aged out
+        Returns:
+            tuple: (item, score), or None if the queue is empty
+        """
+        now = self.clock()
+        while self._heap:
+            neg_score, _, tweet_id, expires_at, item = heapq.heappop(self._heap)
+            self._ids.discard(tweet_id)
+            if expires_at <= now:
+                self._evict(tweet_id)
+                continue
+            metrics.histogram('priority_score').observe(-neg_score)
+            return item, -neg_score
+        return None
+
+    def evict_expired(self) -> int:
+        """
+        Drop every aged-out item (O(n), meant for once per cycle)
+        Returns:
+            int: Number of items evicted
+        """
+        now = self.clock()
+        keep = []
+        for entry in self._heap:
+            if entry[3] <= now:
+                self._ids.discard(entry[2])
+                self._evict(entry[2])
+            else:
+                keep.append(entry)
+        evicted = len(self._heap) - len(keep)
+        if evicted:
+            heapq.heapify(keep)
+            self._heap = keep
+        return evicted
+
+    def _evict(self, tweet_id: int):
+        self.evicted += 1
+        metrics.counter('priority_queue_evicted_total').inc()
+        logger.debug(f"Evicted tweet {tweet_id} from the reply queue: older than {self.max_age}s", extra=HIGH_VOLUME)
+
+    def __contains__(self, tweet_id) -> bool:
+        return tweet_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
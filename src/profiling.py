@@ -0,0 +1,384 @@
+import cProfile
+import json
+import linecache
+import pstats
+import signal
+import socketserver
+import threading
+import time
+import traceback
+import tracemalloc
+import sys
+import os
+from contextlib import contextmanager
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logger import setup_logger
+from src.metrics import metrics
+
+logger = setup_logger('twitter_bot')
+
+TOP_ENTRIES = 40  # Functions or allocation sites listed in the text reports
+
+
+def _timestamp() -> str:
+    return datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+
+
+class Profiler:
+    """
+    On-demand profiling of a running bot, driven by signals or the control
+    socket; every report is written to output_dir for offline analysis.
+
+    - profile: a cProfile session over the monitor_lists cycles between a
+      start and a stop request, saved as a .prof file (for pstats or
+      snakeviz) plus a text summary. cProfile only sees the monitoring
+      thread; reply workers show up as the time spent waiting for them.
+    - memory: tracemalloc traces allocations between a start and a stop
+      request, and the stop writes the snapshot with a report of the
+      biggest growth and the sizes of the registered collections, e.g.
+      the processed tweet set and the reply quota.
+    - stacks: the stack of every thread, headed by the API calls that are
+      still running; the watchdog writes one on its own when a call runs
+      past stuck_after.
+
+    While nothing is requested the only cost is one attribute check per
+    cycle and the watchdog waking up every few seconds.
+    """
+
+    def __init__(self, output_dir: str = 'profiles', name: str = None, stuck_after: float = None,
+                 check_every: float = 5.0):
+        """
+        Args:
+            output_dir (str): Directory for the reports, created on first write
+            name (str): Prefix of the report files, e.g. the worker name;
+                defaults to the process ID
+            stuck_after (float): Seconds after which a running API call counts
+                as stuck and its stacks are dumped, None for no watchdog
+            check_every (float): Seconds between watchdog checks
+        """
+        self.output_dir = output_dir
+        self.name = name or f"pid-{os.getpid()}"
+        self.stuck_after = stuck_after
+        self.check_every = check_every
+        self.sizes = {}  # Collection name -> callable returning its current size
+        self._profile_wanted = False
+        self._profile = None
+        self._profile_started = None
+        self._profile_cycles = 0
+        self._memory_baseline = None
+        self._memory_sizes = {}
+        self._started_tracing = False  # Whether tracemalloc was started by us rather than e.g. -X tracemalloc
+        self._reported_stuck = set()
+        self._lock = threading.Lock()
+        self._watchdog = None
+        self._stopped = threading.Event()
+
+    def _path(self, kind: str, suffix: str) -> str:
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, f"{self.name}-{kind}-{_timestamp()}.{suffix}")
+
+    # cProfile sessions
+
+    @property
+    def profiling(self) -> bool:
+        return self._profile_wanted or self._profile is not None
+
+    def start_profile(self):
+        """Profile from the start of the next monitoring cycle"""
+        self._profile_wanted = True
+        logger.info("Profiling requested; starting with the next cycle")
+
+    def stop_profile(self):
+        """End the session at the end of the current cycle and write it out"""
+        self._profile_wanted = False
+        logger.info("Profiling stop requested")
+
+    def toggle_profile(self):
+        if self._profile_wanted:
+            self.stop_profile()
+        else:
+            self.start_profile()
+
+    @contextmanager
+    def cycle(self):
+        """Wrap one monitoring cycle; profiles it while a session is requested"""
+        if not self._profile_wanted and self._profile is None:
+            yield
+            return
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._profile_started = time.monotonic()
+            self._profile_cycles = 0
+        self._profile.enable()
+        try:
+            yield
+        finally:
+            self._profile.disable()
+            self._profile_cycles += 1
+            if not self._profile_wanted:
+                self._write_profile()
+
+    def _write_profile(self) -> str:
+        profile, self._profile = self._profile, None
+        if profile is None:
+            return None
+        path = self._path('profile', 'prof')
+        profile.dump_stats(path)
+        with open(path[:-len('.prof')] + '.txt', 'w') as f:
+            f.write(f"{self._profile_cycles} cycles over {time.monotonic() - self._profile_started:.1f}s\n\n")
+            pstats.Stats(profile, stream=f).sort_stats('cumulative').print_stats(TOP_ENTRIES)
+        metrics.counter('profile_dumps_total', kind='profile').inc()
+        logger.info(f"Wrote profile of {self._profile_cycles} cycles to {path}")
+        return path
+
+    # tracemalloc sessions
+
+    @property
+    def tracing_memory(self) -> bool:
+        return self._memory_baseline is not None
+
+    def start_memory(self, frames: int = 10):
+        """
+        Start tracing allocations; until stop_memory() every allocation
+        costs extra time and memory
+        Args:
+            frames (int): Stack frames kept per allocation
+        """
+        with self._lock:
+            if self._memory_baseline is not None:
+                return
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start(frames)
+            self._memory_baseline = tracemalloc.take_snapshot()
+            self._memory_sizes = self._collection_sizes()
+        logger.info("Memory tracing started")
+
+    def stop_memory(self) -> str:
+        """
+        Take a snapshot, write it with a report of the growth since
+        start_memory() and stop tracing, unless tracing was already on
+        before start_memory()
+        Returns:
+            str: Path of the report, None if no session was running
+        """
+        with self._lock:
+            baseline, self._memory_baseline = self._memory_baseline, None
+            if baseline is None:
+                return None
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+            snapshot_path = self._path('memory', 'tracemalloc')
+            snapshot.dump(snapshot_path)
+            sizes = self._collection_sizes()
+            path = snapshot_path[:-len('.tracemalloc')] + '.txt'
+            with open(path, 'w') as f:
+                f.write(self._memory_report(baseline, snapshot, sizes, peak))
+        metrics.counter('profile_dumps_total', kind='memory').inc()
+        logger.info(f"Wrote memory report to {path}")
+        return path
+
+    def toggle_memory(self):
+        if self.tracing_memory:
+            self.stop_memory()
+        else:
+            self.start_memory()
+
+    def _collection_sizes(self) -> dict:
+        sizes = {}
+        for name, size in self.sizes.items():
+            try:
+                sizes[name] = size()
+            except Exception as e:
+                sizes[name] = f"error: {e}"
+        return sizes
+
+    def _memory_report(self, baseline, snapshot, sizes: dict, peak: int) -> str:
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, '<frozen *>')]
+        baseline, snapshot = baseline.filter_traces(filters), snapshot.filter_traces(filters)
+        lines = [
+            f"Traced memory: {sum(stat.size for stat in snapshot.statistics('filename')) / 1024:.1f} KiB "
+            f"(peak {peak / 1024:.1f} KiB)",
+            "",
+        ]
+        lines.append("Collection sizes (start -> end):")
+        for name, size in sizes.items():
+            lines.append(f"  {name}: {self._memory_sizes.get(name)} -> {size}")
+        lines.append("")
+        lines.append(f"Top {TOP_ENTRIES} allocation sites by growth:")
+        for stat in snapshot.compare_to(baseline, 'lineno')[:TOP_ENTRIES]:
+            frame = stat.traceback[0]
+            lines.append(f"  {frame.filename}:{frame.lineno}: {stat.size_diff / 1024:+.1f} KiB "
+                         f"({stat.count_diff:+d} blocks, {stat.size / 1024:.1f} KiB total)")
+            source = linecache.getline(frame.filename, frame.lineno).strip()
+            if source:
+                lines.append(f"      {source}")
+        return '\n'.join(lines) + '\n'
+
+    # Stack dumps
+
+    def dump_stacks(self, reason: str = 'requested') -> str:
+        """
+        Write the stack of every thread, listing the running API calls first
+        Returns:
+            str: Path of the dump
+        """
+        threads = {thread.ident: thread.name for thread in threading.enumerate()}
+        calls = metrics.in_flight()
+        lines = [f"Stack dump ({reason}) at {datetime.now().isoformat()}", "", "Calls in flight:"]
+        for stage, thread_id, seconds in calls:
+            lines.append(f"  {stage}: {seconds:.1f}s in {threads.get(thread_id, thread_id)}")
+        if not calls:
+            lines.append("  none")
+        running = {thread_id: stage for stage, thread_id, _ in calls}
+        for thread_id, frame in sys._current_frames().items():
+            title = threads.get(thread_id, thread_id)
+            if thread_id in running:
+                title = f"{title} [{running[thread_id]}]"
+            lines.append("")
+            lines.append(f"Thread {title}:")
+            lines.extend(line.rstrip('\n') for line in traceback.format_stack(frame))
+        path = self._path('stacks', 'txt')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        metrics.counter('profile_dumps_total', kind='stacks').inc()
+        logger.info(f"Wrote stack dump ({reason}) to {path}")
+        return path
+
+    def check_stuck_calls(self) -> str:
+        """
+        Dump the stacks once for every API call running longer than stuck_after
+        Returns:
+            str: Path of the dump, None if nothing new is stuck
+        """
+        if self.stuck_after is None:
+            return None
+        stuck = {(stage, thread_id) for stage, thread_id, seconds in metrics.in_flight()
+                 if seconds >= self.stuck_after}
+        new = stuck - self._reported_stuck
+        self._reported_stuck = stuck  # Calls that finished can be reported again next time
+        if not new:
+            return None
+        metrics.counter('stuck_calls_total').inc(len(new))
+        stages = ', '.join(sorted(stage for stage, _ in new))
+        logger.warning(f"Calls running longer than {self.stuck_after:.0f}s: {stages}")
+        return self.dump_stacks(f"stuck: {stages}")
+
+    def start_watchdog(self):
+        """Check for stuck calls every check_every seconds in a daemon thread"""
+        if self.stuck_after is None or self._watchdog is not None:
+            return
+
+        def watch():
+            while not self._stopped.wait(self.check_every):
+                try:
+                    self.check_stuck_calls()
+                except Exception as e:
+                    logger.error(f"Stuck call check failed: {e}")
+
+        self._watchdog = threading.Thread(target=watch, name='profiler-watchdog', daemon=True)
+        self._watchdog.start()
+
+    # Control
+
+    def command(self, line: str) -> dict:
+        """
+        Run a control command: 'profile [start|stop|toggle]', 'memory
+        [start|stop|toggle]', 'stacks' or 'status'
+        Returns:
+            dict: The result, including the path of any file written
+        """
+        words = line.split()
+        action = words[1] if len(words) > 1 else 'toggle'
+        if not words or words[0] == 'status':
+            return self.status()
+        if words[0] == 'stacks':
+            return {'ok': True, 'path': self.dump_stacks()}
+        if words[0] == 'profile' and action in ('start', 'stop', 'toggle'):
+            getattr(self, f"{action}_profile")()
+            return {'ok': True, 'profiling': self._profile_wanted}
+        if words[0] == 'memory' and action in ('start', 'stop', 'toggle'):
+            if action == 'toggle':
+                action = 'stop' if self.tracing_memory else 'start'
+            path = getattr(self, f"{action}_memory")()
+            return {'ok': True, 'tracing_memory': self.tracing_memory, 'path': path}
+        return {'ok': False, 'error': f"unknown command: {line.strip()}"}
+
+    def status(self) -> dict:
+        return {
+            'ok': True,
+            'profiling': self.profiling,
+            'tracing_memory': self.tracing_memory,
+            'in_flight': [{'stage': stage, 'seconds': round(seconds, 3)}
+                          for stage, _, seconds in metrics.in_flight()],
+        }
+
+    def close(self):
+        """Stop the watchdog and write out any session still running"""
+        self._stopped.set()
+        self._profile_wanted = False
+        if self._profile is not None:
+            self._write_profile()
+        if self.tracing_memory:
+            self.stop_memory()
+
+
+def install_signal_handlers(profiler: Profiler) -> list:
+    """
+    Toggle profiling with SIGUSR1 and memory tracing with SIGUSR2. The
+    handlers run on the main thread between bytecodes, possibly inside a
+    locked section, so the work is handed to a short-lived thread.
+    Returns:
+        list: The signals installed; none on platforms without them
+    """
+    def run(action):
+        def handler(signum, frame):
+            threading.Thread(target=action, name='profiler-signal', daemon=True).start()
+        return handler
+
+    installed = []
+    for name, action in (('SIGUSR1', profiler.toggle_profile), ('SIGUSR2', profiler.toggle_memory)):
+        signum = getattr(signal, name, None)
+        if signum is not None:
+            signal.signal(signum, run(action))
+            installed.append(signum)
+    return installed
+
+
+def start_control_server(profiler: Profiler, path: str):
+    """
+    Serve profiler commands on a local Unix socket in a daemon thread, one
+    command per line, answered with one line of JSON, e.g.
+    `echo 'memory start' | nc -U state/control.sock`
+    Returns:
+        socketserver.UnixStreamServer: The running server; call shutdown() to stop it
+    """
+    if os.path.exists(path):
+        os.unlink(path)  # Left behind by a previous process
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                line = raw.decode('utf-8', 'replace').strip()
+                if not line:
+                    continue
+                try:
+                    result = profiler.command(line)
+                except Exception as e:
+                    result = {'ok': False, 'error': str(e)}
+                self.wfile.write((json.dumps(result) + '\n').encode('utf-8'))
+
+    server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    server.daemon_threads = True
+    os.chmod(path, 0o600)
+    threading.Thread(target=server.serve_forever, name='profiler-control', daemon=True).start()
+    return server
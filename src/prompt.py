@@ -0,0 +1,131 @@
+import hashlib
+import html
+import math
+import re
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TWITTER_CHAR_LIMIT = 280
+TEMPERATURE = 0.7  # Slightly creative but still focused
+
+SYSTEM_PROMPT = """You are a friendly and engaging Twitter bot that generates thoughtful replies.
+Your responses should be:
+1. Concise and within the character limit given with each tweet
+2. Relevant to the tweet's content
+3. Engaging but professional
+4. Free of hashtags or @mentions
+5. Natural and conversational
+Never include URLs or promotional content."""
+
+REPLY_INSTRUCTIONS = "Reply to the tweet in the user message with one brief, engaging reply."
+
+BATCH_INSTRUCTIONS = """Write one reply for each numbered tweet in the user message, following the same rules.
+Respond with a JSON object of the form {"replies": [{"id": <tweet number>, "reply": "<reply text>"}]}
+containing exactly one entry per tweet."""
+
+# Rough size of a token in English text, used where exact counts are not available
+CHARS_PER_TOKEN = 4
+MAX_TWEET_TOKENS = int(os.getenv('OPENAI_MAX_TWEET_TOKENS', 120))  # Longer tweets are cut
+COMPLETION_MARGIN = 1.25  # Headroom over the estimated tokens of a reply at the character limit
+BATCH_ENTRY_TOKENS = 12  # JSON structure around each reply in a batch completion
+
+URL = re.compile(r'https?://\S+|\bpic\.twitter\.com/\S+')
+RETWEET_PREFIX = re.compile(r'^RT @\w+:\s*')
+LEADING_MENTIONS = re.compile(r'^(?:@\w+\s+)+')
+TRAILING_TAGS = re.compile(r'(?:(?:^|\s+)[#@]\w+)+\s*$')
+WHITESPACE = re.compile(r'\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def clean_tweet(text: str, max_tokens: int = MAX_TWEET_TOKENS) -> str:
+    """
+    Strip what costs input tokens without changing what a tweet says: links,
+    a retweet prefix, the @mentions that open a reply chain and the hashtag
+    or mention block at the end, then cut it to max_tokens at a word boundary
+    Args:
+        text (str): Tweet text as returned by the API
+        max_tokens (int): Estimated tokens the tweet may use
+    Returns:
+        str: Cleaned tweet, or the original text if nothing would be left
+    """
+    cleaned = html.unescape(text)
+    cleaned = URL.sub('', cleaned)
+    cleaned = RETWEET_PREFIX.sub('', cleaned)
+    cleaned = LEADING_MENTIONS.sub('', cleaned.strip())
+    without_tags = TRAILING_TAGS.sub('', cleaned)
+    if without_tags.strip():
+        cleaned = without_tags
+    cleaned = WHITESPACE.sub(' ', cleaned).strip()
+    if not cleaned:
+        return WHITESPACE.sub(' ', text).strip()
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(cleaned) > limit:
+        cut = cleaned[:limit]
+        cleaned = (cut.rsplit(' ', 1)[0] if ' ' in cut else cut) + '...'
+    return cleaned
+
+
+def reply_char_limit(user_handle: str = None) -> int:
+    """Characters left for the reply once it is prefixed with "@user_handle " """
+    if not user_handle:
+        return TWITTER_CHAR_LIMIT
+    return TWITTER_CHAR_LIMIT - len(user_handle) - 2
+
+
+def completion_budget(char_limit: int = TWITTER_CHAR_LIMIT, replies: int = 1) -> int:
+    """
+    max_tokens for a completion of replies replies of up to char_limit
+    characters each, so the model is not paid to write text that is cut
+    """
+    per_reply = math.ceil(char_limit / CHARS_PER_TOKEN * COMPLETION_MARGIN)
+    if replies == 1:
+        return per_reply
+    return replies * (per_reply + BATCH_ENTRY_TOKENS)
+
+
+class PromptBuilder:
+    """
+    Assembles the chat messages of a completion request.
+
+    Everything that does not depend on the tweet lives in a system message
+    built once, so every request starts with an identical prefix and the
+    provider's prompt cache can reuse it; the tweets and their character
+    limits follow in the user message. Tweets are cleaned and cut to their
+    token budget first.
+    """
+
+    def __init__(self, system_prompt: str = SYSTEM_PROMPT, max_tweet_tokens: int = MAX_TWEET_TOKENS):
+        """
+        Args:
+            system_prompt (str): Rules every reply follows
+            max_tweet_tokens (int): Estimated input tokens allowed per tweet
+        """
+        self.max_tweet_tokens = max_tweet_tokens
+        self.system_message = {"role": "system", "content": f"{system_prompt}\n\n{REPLY_INSTRUCTIONS}"}
+        self.batch_system_message = {"role": "system", "content": f"{system_prompt}\n\n{BATCH_INSTRUCTIONS}"}
+        # Changes whenever the prompt changes, so cached replies from an older prompt are not reused
+        self.version = hashlib.sha256(
+            (self.system_message['content'] + self.batch_system_message['content']).encode('utf-8')
+        ).hexdigest()[:12]
+
+    def messages(self, tweet_text: str, char_limit: int = TWITTER_CHAR_LIMIT) -> list:
+        """Messages asking for one reply of at most char_limit characters"""
+        tweet = clean_tweet(tweet_text, self.max_tweet_tokens)
+        return [
+            self.system_message,
+            {"role": "user", "content": f"Character limit: {char_limit}\nTweet: {tweet}"},
+        ]
+
+    def batch_messages(self, tweet_texts: list, char_limit: int = TWITTER_CHAR_LIMIT) -> list:
+        """Messages asking for one reply per tweet, each of at most char_limit characters"""
+        tweets = "\n".join(
+            f"{number}. {clean_tweet(text, self.max_tweet_tokens)}" for number, text in enumerate(tweet_texts, 1)
+        )
+        return [
+            self.batch_system_message,
+            {"role": "user", "content": f"Character limit per reply: {char_limit}\n\n{tweets}"},
+        ]
@@ -0,0 +1,209 @@
+import threading
+import time
+from collections import OrderedDict, deque
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logger import setup_logger
+from src.metrics import metrics
+
+logger = setup_logger('twitter_bot')
+
+# Keys under which the all-authors logs are persisted next to the per-author ones
+GLOBAL_KEY = '*global'
+HOURLY_KEY = '*hourly'
+
+
+class ReplyQuota:
+    """
+    Reply limits over rolling windows: per author, across all authors and
+    per hour, instead of counters that reset at a calendar day boundary.
+
+    Each author is stored as a tuple of the timestamps of their replies
+    inside the window, never longer than the per-author limit, so checks
+    and charges are O(1) for a fixed limit. Authors are kept in order of
+    their last reply; those whose newest reply has left the window are
+    dropped from the front as time passes, and max_users bounds the total.
+    The all-authors logs are deques capped at their limits. Every operation
+    takes one lock, so concurrent reply workers can check and charge
+    atomically with try_charge().
+    """
+
+    def __init__(self, per_user: int = 3, user_window: float = 24 * 3600, global_limit: int = None,
+                 global_window: float = 24 * 3600, hourly_limit: int = None, max_users: int = 100000,
+                 clock=time.time):
+        """
+        Args:
+            per_user (int): Replies allowed per author within user_window
+            user_window (float): Seconds of the per-author window
+            global_limit (int): Replies allowed across all authors within
+                global_window, None for no limit
+            global_window (float): Seconds of the all-authors window
+            hourly_limit (int): Replies allowed across all authors within any
+                hour, None for no limit
+            max_users (int): Authors tracked at most; the least recently
+                answered are forgotten first
+            clock (callable): Wall-clock time source, injectable for tests
+        """
+        self.per_user = per_user
+        self.user_window = user_window
+        self.global_limit = global_limit
+        self.global_window = global_window
+        self.hourly_limit = hourly_limit
+        self.max_users = max_users
+        self.clock = clock
+        self._users = OrderedDict()  # user_id -> reply timestamps, oldest first
+        self._global = deque()
+        self._hourly = deque()
+        self._changed = set()
+        self._lock = threading.Lock()
+        metrics.gauge('quota_tracked_users', fn=lambda: len(self._users))
+
+    def _recent(self, user_id: str, now: float) -> tuple:
+        cutoff = now - self.user_window
+        return tuple(t for t in self._users.get(user_id, ()) if t > cutoff)
+
+    def _expire(self, now: float):
+        """Forget authors whose newest reply has left the window, oldest first"""
+        cutoff = now - self.user_window
+        while self._users:
+            user_id, times = next(iter(self._users.items()))
+            if times and times[-1] > cutoff:
+                break
+            del self._users[user_id]
+            self._changed.add(user_id)
+        for log, window in ((self._global, self.global_window), (self._hourly, 3600)):
+            while log and log[0] <= now - window:
+                log.popleft()
+
+    def _blocked_by(self, user_id: str, now: float, pending: int = 0, pending_total: int = 0) -> str:
+        self._expire(now)
+        if len(self._recent(user_id, now)) + pending >= self.per_user:
+            return 'user'
+        if self.global_limit is not None and len(self._global) + pending_total >= self.global_limit:
+            return 'global'
+        if self.hourly_limit is not None and len(self._hourly) + pending_total >= self.hourly_limit:
+            return 'hourly'
+        return None
+
+    def blocked_by(self, user_id: str, pending: int = 0, pending_total: int = 0) -> str:
+        """
+        Find the limit that stops another reply to a user
+        Args:
+            user_id (str): Author ID
+            pending (int): Replies to this author already planned but not charged
+            pending_total (int): Replies to all authors already planned but not charged
+        Returns:
+            str: 'user', 'global' or 'hourly', or None if a reply is allowed
+        """
+        with self._lock:
+            return self._blocked_by(user_id, self.clock(), pending, pending_total)
+
+    def allows(self, user_id: str, pending: int = 0, pending_total: int = 0) -> bool:
+        return self.blocked_by(user_id, pending, pending_total) is None
+
+    def try_charge(self, user_id: str) -> bool:
+        """
+        Atomically check the limits and, if a reply is allowed, count it
+        Returns:
+            bool: True if the reply was charged and may be posted
+        """
+        with self._lock:
+            now = self.clock()
+            scope = self._blocked_by(user_id, now)
+            if scope is not None:
+                metrics.counter('quota_denied_total', scope=scope).inc()
+                return False
+            self._charge(user_id, now)
+            return True
+
+    def charge(self, user_id: str):
+        """Count a reply against the limits without checking them"""
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            self._charge(user_id, now)
+
+    def _charge(self, user_id: str, now: float):
+        times = self._recent(user_id, now) + (now,)
+        self._users[user_id] = times[-max(self.per_user, 1):]
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            evicted, _ = self._users.popitem(last=False)
+            self._changed.add(evicted)
+            logger.debug(f"Reply quota full: forgot user {evicted}")
+        if self.global_limit is not None:
+            self._global.append(now)
+        if self.hourly_limit is not None:
+            self._hourly.append(now)
+        self._changed.update((user_id, GLOBAL_KEY, HOURLY_KEY))
+
+    def refund(self, user_id: str):
+        """Take back the most recent charge, e.g. after the reply failed to post"""
+        with self._lock:
+            times = self._users.get(user_id)
+            if times:
+                self._users[user_id] = times[:-1]
+            if self.global_limit is not None and self._global:
+                self._global.pop()
+            if self.hourly_limit is not None and self._hourly:
+                self._hourly.pop()
+            self._changed.update((user_id, GLOBAL_KEY, HOURLY_KEY))
+
+    def used(self, user_id: str) -> int:
+        """Replies to a user within the current window"""
+        with self._lock:
+            return len(self._recent(user_id, self.clock()))
+
+    def drain_changed(self) -> dict:
+        """
+        Return the logs changed since the last call, for the state store
+        Returns:
+            dict: key -> reply timestamps; an empty list means the key expired
+        """
+        with self._lock:
+            changed, self._changed = self._changed, set()
+            snapshot = {}
+            for key in changed:
+                if key == GLOBAL_KEY:
+                    snapshot[key] = list(self._global)
+                elif key == HOURLY_KEY:
+                    snapshot[key] = list(self._hourly)
+                else:
+                    snapshot[key] = list(self._users.get(key, ()))
+            return snapshot
+
+    def restore(self, entries: dict):
+        """
+        Load logs saved by drain_changed(), dropping replies that have
+        already left their window
+        Args:
+            entries (dict): key -> reply timestamps
+        """
+        with self._lock:
+            now = self.clock()
+            for key, times in sorted(entries.items(), key=lambda entry: max(entry[1], default=0)):
+                times = sorted(times)
+                if key == GLOBAL_KEY:
+                    self._global.extend(t for t in times if t > now - self.global_window)
+                elif key == HOURLY_KEY:
+                    self._hourly.extend(t for t in times if t > now - 3600)
+                else:
+                    recent = tuple(t for t in times if t > now - self.user_window)[-max(self.per_user, 1):]
+                    if recent:
+                        self._users[key] = recent
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire(self.clock())
+            return {
+                'tracked_users': len(self._users),
+                'global_used': len(self._global) if self.global_limit is not None else None,
+                'hourly_used': len(self._hourly) if self.hourly_limit is not None else None,
+            }
+
+    def __len__(self) -> int:
+        return len(self._users)
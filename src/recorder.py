@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+Record and replay the bot's Twitter and OpenAI traffic.
+
+Recording wraps the tweepy client's HTTP session and the OpenAI client and
+appends every request and response, with its start offset and duration,
+to a gzip-compressed JSONL trace. Replaying serves the bot the recorded
+responses instead of calling the APIs, at the original speed or as fast
+as possible, and reports how poll-to-reply latency, throughput and API
+call counts differ from the recording.
+
+    python -m src.run_bot --record traces/hour.jsonl.gz
+    python -m src.recorder traces/hour.jsonl.gz --speed fast
+"""
+import argparse
+import gzip
+import json
+import re
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict, deque
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from src.logger import setup_logger
+
+logger = setup_logger('twitter_bot')
+
+# Response headers worth keeping: the scheduler reads the rate-limit ones.
+# Request headers are never recorded, so credentials stay out of traces.
+RECORDED_HEADERS = ('content-type', 'retry-after', 'x-rate-limit-limit', 'x-rate-limit-remaining',
+                    'x-rate-limit-reset')
+OPENAI_ROUTE = 'POST /v1/chat/completions'
+REPLY_ROUTE = 'POST /2/tweets'
+TWITTER_HOST = 'https://api.twitter.com'  # tweepy.Client's fixed base URL
+LIST_TWEETS_ROUTE = re.compile(r'GET /2/lists/(\d+)/tweets')
+NUMERIC_SEGMENT = re.compile(r'/\d{3,}(?=/|$)')  # IDs, not the /2 version prefix
+
+
+def route(method: str, path: str) -> str:
+    """Endpoint name with numeric IDs replaced, e.g. 'GET /2/lists/:id/tweets'"""
+    return f"{method} {NUMERIC_SEGMENT.sub('/:id', path)}"
+
+
+def _decode_body(body):
+    if body is None:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', 'replace')
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body
+
+
+def _percentile(values: list, quantile: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(quantile * len(values)), len(values) - 1)]
+
+
+class TraceRecorder:
+    """
+    Append-only writer for a gzip JSONL trace. Entries are written from any
+    thread as their responses complete; offsets are seconds since the
+    recorder was created.
+    """
+
+    def __init__(self, path: str, flush_every: int = 50):
+        """
+        Args:
+            path (str): Trace file; appended to if it exists (gzip members concatenate)
+            flush_every (int): Entries between flushes of the compressed stream
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.flush_every = flush_every
+        self.started = time.monotonic()
+        self.entries = 0
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def offset(self) -> float:
+        return time.monotonic() - self.started
+
+    def write(self, entry: dict):
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + '\n')
+            self.entries += 1
+            if self.entries % self.flush_every == 0:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def load_trace(path: str) -> list:
+    """
+    Read a trace written by TraceRecorder. A trace whose recorder was never
+    closed, e.g. after a crash, ends in a truncated gzip member; the entries
+    flushed before it are kept.
+    Returns:
+        list: Entries ordered by start offset
+    """
+    entries = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                if line.strip():
+                    entries.append(json.loads(line))
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            logger.warning(f"Trace {path} is truncated after {len(entries)} entries: {e}")
+    return sorted(entries, key=lambda entry: entry['t'])
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    requests transport adapter that records every exchange sent through the
+    adapter it wraps
+    """
+
+    def __init__(self, recorder: TraceRecorder, adapter: BaseAdapter = None):
+        """
+        Args:
+            recorder (TraceRecorder): Trace to append to
+            adapter (BaseAdapter): Adapter that does the sending; defaults to a new HTTPAdapter
+        """
+        super().__init__()
+        self.recorder = recorder
+        self.adapter = adapter or HTTPAdapter()
+
+    def close(self):
+        self.adapter.close()
+
+    def send(self, request, **kwargs):
+        t = self.recorder.offset()
+        start = time.monotonic()
+        url = urlsplit(request.url)
+        entry = {
+            't': round(t, 4),
+            'service': 'twitter',
+            'method': request.method,
+            'path': url.path,
+            'query': sorted(parse_qsl(url.query)),
+            'body': _decode_body(request.body),
+        }
+        try:
+            response = self.adapter.send(request, **kwargs)
+            content = response.content  # Read now so the duration covers the body
+        except Exception as e:
+            entry.update(duration=round(time.monotonic() - start, 4), error=f"{type(e).__name__}: {e}")
+            self.recorder.write(entry)
+            raise
+        entry.update(
+            duration=round(time.monotonic() - start, 4),
+            status=response.status_code,
+            headers={name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+            response=content.decode('utf-8', 'replace'),
+        )
+        self.recorder.write(entry)
+        return response
+
+
+class _RecordingStream:
+    """Passes completion chunks through while noting when each arrived"""
+
+    def __init__(self, stream, entry: dict, start: float, recorder: TraceRecorder):
+        self._stream = stream
+        self._entry = entry
+        self._start = start
+        self._recorder = recorder
+        self._chunks = []
+        self._written = False
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                self._chunks.append([round(time.monotonic() - self._start, 4), chunk.model_dump(mode='json')])
+                yield chunk
+        finally:
+            self._write()
+
+    def _write(self):
+        if self._written:
+            return
+        self._written = True
+        self._entry.update(duration=round(time.monotonic() - self._start, 4), status=200, chunks=self._chunks)
+        self._recorder.write(self._entry)
+
+    def close(self):
+        close = getattr(self._stream, 'close', None)
+        if close:
+            close()
+        self._write()
+
+
+class _Completions:
+    def __init__(self, create):
+        self.create = create
+
+
+class _Chat:
+    def __init__(self, create):
+        self.completions = _Completions(create)
+
+
+class RecordingOpenAI:
+    """
+    Stands in for the OpenAI client in src.llm, recording each chat
+    completion call (streamed or not) made through it
+    """
+
+    def __init__(self, client, recorder: TraceRecorder):
+        self._client = client
+        self.recorder = recorder
+        self.chat = _Chat(self._create)
+
+    def _create(self, **kwargs):
+        t = self.recorder.offset()
+        start = time.monotonic()
+        entry = {
+            't': round(t, 4),
+            'service': 'openai',
+            'method': 'POST',
+            'path': '/v1/chat/completions',
+            'query': [],
+            'body': {key: value for key, value in kwargs.items() if key != 'timeout'},
+        }
+        try:
+            response = self._client.chat.completions.create(**kwargs)
+        except Exception as e:
+            entry.update(duration=round(time.monotonic() - start, 4), error=f"{type(e).__name__}: {e}")
+            self.recorder.write(entry)
+            raise
+        if kwargs.get('stream'):
+            return _RecordingStream(response, entry, start, self.recorder)
+        entry.update(duration=round(time.monotonic() - start, 4), status=200,
+                     response=response.model_dump(mode='json'))
+        self.recorder.write(entry)
+        return response
+
+
+def start_recording(bot, path: str) -> TraceRecorder:
+    """
+    Record a bot's Twitter and OpenAI traffic to a trace file
+    Args:
+        bot (TwitterBot): Bot whose client session is recorded
+        path (str): Trace file to append to
+    Returns:
+        TraceRecorder: Close it to flush the trace
+    """
+    from src import llm
+
+    recorder = TraceRecorder(path)
+    session = bot.client.session
+    session.mount(TWITTER_HOST, RecordingAdapter(recorder, session.get_adapter(TWITTER_HOST)))
+    llm.client = RecordingOpenAI(llm.get_client(), recorder)
+    logger.info(f"Recording API traffic to {path}")
+    return recorder
+
+
+class ReplayedError(Exception):
+    """An error that was raised by the API call at recording time"""
+
+
+class TracePlayer:
+    """
+    Serves recorded responses for the requests of a replayed run.
+
+    A request is answered by the first unused entry with the same method,
+    path, query and body; failing that, by the next unused entry for the
+    same endpoint, so a changed prompt or page size still gets a realistic
+    response. Requests with no recorded endpoint get a 404. Every served
+    exchange is logged with its replay offset for the diff report.
+    """
+
+    def __init__(self, entries: list, realtime: bool = False):
+        """
+        Args:
+            entries (list): Trace entries from load_trace()
+            realtime (bool): Wait the recorded duration (and chunk gaps) before
+                answering, instead of answering at once
+        """
+        self.realtime = realtime
+        self._exact = defaultdict(deque)
+        self._by_route = defaultdict(deque)
+        for index, entry in enumerate(entries):
+            self._exact[self._key(entry['method'], entry['path'], entry['query'], entry['body'])].append(index)
+            self._by_route[route(entry['method'], entry['path'])].append(index)
+        self.entries = entries
+        self._used = set()
+        self._lock = threading.Lock()
+        self.matches = Counter()
+        self.served = []
+        self.started = time.monotonic()
+
+    @staticmethod
+    def _key(method: str, path: str, query, body) -> str:
+        return json.dumps([method, path, sorted(map(list, query)), body], sort_keys=True, default=str)
+
+    def match(self, method: str, path: str, query, body) -> dict:
+        """
+        Find the recorded exchange for a request
+        Returns:
+            dict: The trace entry, or None if the endpoint was never recorded
+        """
+        key = self._key(method, path, query, body)
+        with self._lock:
+            for kind, candidates in (('exact', self._exact.get(key)), ('endpoint', self._by_route.get(route(method, path)))):
+                while candidates:
+                    index = candidates.popleft()
+                    if index not in self._used:
+                        self._used.add(index)
+                        self.matches[kind] += 1
+                        return self.entries[index]
+            self.matches['unmatched'] += 1
+            return None
+
+    def log(self, entry: dict, t: float, duration: float, method: str, path: str, body):
+        self.served.append({
+            't': t, 'duration': duration, 'service': entry['service'] if entry else 'twitter',
+            'method': method, 'path': path, 'body': body,
+            'response': entry.get('response') if entry else None,
+        })
+
+    def offset(self) -> float:
+        return time.monotonic() - self.started
+
+
+class ReplayAdapter(HTTPAdapter):
+    """requests transport adapter that answers from a TracePlayer"""
+
+    def __init__(self, player: TracePlayer, **kwargs):
+        super().__init__(**kwargs)
+        self.player = player
+
+    def send(self, request, **kwargs):
+        t = self.player.offset()
+        start = time.monotonic()
+        url = urlsplit(request.url)
+        body = _decode_body(request.body)
+        entry = self.player.match(request.method, url.path, parse_qsl(url.query), body)
+        if entry is not None and self.player.realtime:
+            time.sleep(entry['duration'])
+        if entry is not None and 'error' in entry:
+            self.player.log(entry, t, time.monotonic() - start, request.method, url.path, body)
+            raise requests.exceptions.ConnectionError(f"Replayed: {entry['error']}", request=request)
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = 'utf-8'
+        if entry is None:
+            response.status_code = 404
+            response.headers = CaseInsensitiveDict({'content-type': 'application/json'})
+            response._content = b'{"title": "Not Found", "detail": "Not in the replayed trace"}'
+        else:
+            response.status_code = entry['status']
+            response.headers = CaseInsensitiveDict(entry['headers'])
+            response._content = entry['response'].encode('utf-8')
+        response.reason = HTTPStatus(response.status_code).phrase
+        self.player.log(entry, t, time.monotonic() - start, request.method, url.path, body)
+        return response
+
+
+class _ReplayStream:
+    def __init__(self, chunks: list, realtime: bool, on_close):
+        self._chunks = chunks
+        self._realtime = realtime
+        self._on_close = on_close
+
+    def __iter__(self):
+        from openai.types.chat import ChatCompletionChunk
+
+        start = time.monotonic()
+        try:
+            for offset, chunk in self._chunks:
+                if self._realtime:
+                    time.sleep(max(offset - (time.monotonic() - start), 0))
+                yield ChatCompletionChunk.model_validate(chunk)
+        finally:
+            self.close()
+
+    def close(self):
+        if self._on_close is not None:
+            self._on_close()
+            self._on_close = None
+
+
+class ReplayOpenAI:
+    """Stands in for the OpenAI client in src.llm, answering from a TracePlayer"""
+
+    def __init__(self, player: TracePlayer):
+        self.player = player
+        self.chat = _Chat(self._create)
+
+    def _create(self, **kwargs):
+        from openai.types.chat import ChatCompletion
+
+        t = self.player.offset()
+        start = time.monotonic()
+        body = {key: value for key, value in kwargs.items() if key != 'timeout'}
+        entry = self.player.match('POST', '/v1/chat/completions', [], body)
+        if entry is None or 'error' in entry:
+            if entry is not None and self.player.realtime:
+                time.sleep(entry['duration'])
+            self.player.log(entry, t, time.monotonic() - start, 'POST', '/v1/chat/completions', body)
+            raise ReplayedError(entry['error'] if entry else 'No recorded completion left')
+        if 'chunks' in entry:
+            return _ReplayStream(entry['chunks'], self.player.realtime, lambda: self.player.log(
+                entry, t, time.monotonic() - start, 'POST', '/v1/chat/completions', body
+            ))
+        if self.player.realtime:
+            time.sleep(entry['duration'])
+        self.player.log(entry, t, time.monotonic() - start, 'POST', '/v1/chat/completions', body)
+        return ChatCompletion.model_validate(entry['response'])
+
+
+def summarize(entries: list, elapsed: float = None) -> dict:
+    """
+    Traffic statistics of a recorded or replayed run
+    Args:
+        entries (list): Exchanges with t, duration, method, path, body and response
+        elapsed (float): Run length in seconds; defaults to the span of the entries
+    Returns:
+        dict: Call counts, request latency, poll-to-reply latency and reply throughput
+    """
+    if elapsed is None:
+        elapsed = max((entry['t'] + entry['duration'] for entry in entries), default=0.0)
+    calls = Counter(route(entry['method'], entry['path']) for entry in entries)
+    fetched_at = {}
+    reply_latencies = []
+    for entry in sorted(entries, key=lambda entry: entry['t']):
+        name = route(entry['method'], entry['path'])
+        done = entry['t'] + entry['duration']
+        if LIST_TWEETS_ROUTE.fullmatch(f"{entry['method']} {entry['path']}"):
+            response = _decode_body(entry.get('response'))
+            for tweet in (response.get('data') or []) if isinstance(response, dict) else []:
+                fetched_at.setdefault(str(tweet['id']), done)
+        elif name == REPLY_ROUTE and isinstance(entry.get('body'), dict):
+            tweet_id = str((entry['body'].get('reply') or {}).get('in_reply_to_tweet_id'))
+            if tweet_id in fetched_at:
+                reply_latencies.append(done - fetched_at[tweet_id])
+    openai_latencies = [entry['duration'] for entry in entries if entry['service'] == 'openai']
+    twitter_latencies = [entry['duration'] for entry in entries if entry['service'] == 'twitter']
+    replies = calls[REPLY_ROUTE]
+    return {
+        'elapsed_seconds': round(elapsed, 3),
+        'replies': replies,
+        'replies_per_second': round(replies / elapsed, 3) if elapsed else 0.0,
+        'reply_latency_p50': round(_percentile(reply_latencies, 0.5), 3),
+        'reply_latency_p95': round(_percentile(reply_latencies, 0.95), 3),
+        'twitter_calls': sum(count for name, count in calls.items() if name != OPENAI_ROUTE),
+        'twitter_latency_p50': round(_percentile(twitter_latencies, 0.5), 4),
+        'openai_calls': calls[OPENAI_ROUTE],
+        'openai_latency_p50': round(_percentile(openai_latencies, 0.5), 4),
+        'calls': dict(calls),
+    }
+
+
+def diff_report(recorded: dict, replayed: dict) -> str:
+    """Format the change of each metric from the recording to the replay"""
+    lines = [f"{'metric':<34}{'recorded':>12}{'replayed':>12}{'change':>10}"]
+    rows = [(key, recorded.get(key), value) for key, value in replayed.items() if key != 'calls']
+    rows += [(f"calls {name}", recorded['calls'].get(name, 0), replayed['calls'].get(name, 0))
+             for name in sorted(set(recorded['calls']) | set(replayed['calls']))]
+    for key, before, after in rows:
+        if not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+            continue
+        change = f"{(after - before) / before * 100:+.1f}%" if before else 'n/a'
+        lines.append(f"{key:<34}{before:>12}{after:>12}{change:>10}")
+    return '\n'.join(lines)
+
+
+def replay(path: str, list_id: str = None, realtime: bool = False, bot=None) -> dict:
+    """
+    Feed a recorded trace back through monitor_list_tweets and generate_response
+    Args:
+        path (str): Trace file written by start_recording()
+        list_id (str): List to monitor; defaults to the first list in the trace
+        realtime (bool): Replay at the original speed instead of as fast as possible
+        bot (TwitterBot): Bot to drive; defaults to a fresh in-memory bot
+    Returns:
+        dict: 'recorded' and 'replayed' summaries and the 'matches' by kind
+    """
+    from src import llm
+    from src.bot import TwitterBot, create_twitter_client
+
+    entries = load_trace(path)
+    polls = [LIST_TWEETS_ROUTE.fullmatch(f"{entry['method']} {entry['path']}") for entry in entries]
+    first_pages = [
+        match.group(1) for match, entry in zip(polls, entries)
+        if match and 'pagination_token' not in dict(entry['query'])
+    ]
+    if list_id is None:
+        if not first_pages:
+            raise ValueError(f"{path} contains no list polls")
+        list_id = first_pages[0]
+    cycles = max(sum(1 for polled in first_pages if polled == list_id), 1)
+
+    player = TracePlayer(entries, realtime=realtime)
+    bot = bot or TwitterBot(client=create_twitter_client())
+    bot.client.session.mount(TWITTER_HOST, ReplayAdapter(player))
+    if not realtime:
+        bot.sleep = lambda seconds: None
+    original_client, original_key = llm.client, llm.OPENAI_API_KEY
+    llm.client, llm.OPENAI_API_KEY = ReplayOpenAI(player), llm.OPENAI_API_KEY or 'replay'
+    try:
+        player.started = time.monotonic()
+        bot.monitor_list_tweets(list_id, max_cycles=cycles)
+        elapsed = player.offset()
+    finally:
+        llm.client, llm.OPENAI_API_KEY = original_client, original_key
+    return {
+        'recorded': summarize(entries),
+        'replayed': summarize(player.served, elapsed),
+        'matches': dict(player.matches),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a recorded API trace through the bot')
+    parser.add_argument('trace', help='Trace file written with run_bot --record')
+    parser.add_argument('--list', dest='list_id', help='List to replay; defaults to the first one recorded')
+    parser.add_argument('--speed', choices=['original', 'fast'], default='fast')
+    parser.add_argument('--json', action='store_true', help='Print the summaries as JSON')
+    args = parser.parse_args(argv)
+
+    result = replay(args.trace, list_id=args.list_id, realtime=args.speed == 'original')
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(diff_report(result['recorded'], result['replayed']))
+        print(f"Responses matched: {result['matches']}")
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+import json
+from collections import namedtuple
+from datetime import datetime
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import orjson  # Optional; decodes API payloads several times faster than json
+except ImportError:
+    orjson = None
+
+FAST_JSON = orjson is not None and os.getenv('BOT_FAST_JSON', '1').lower() not in ('0', 'false', 'no')
+
+# Author from a response's includes
+User = namedtuple('User', ('id', 'username'))
+
+
+def loads(payload):
+    """Decode a JSON API payload (bytes or str), with orjson when available"""
+    if FAST_JSON:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def _engagement(public_metrics) -> int:
+    """Weighted engagement used to rank replies; retweets and quotes spread further"""
+    if not isinstance(public_metrics, dict):
+        return 0
+    return (
+        public_metrics.get('like_count', 0)
+        + 2 * public_metrics.get('retweet_count', 0)
+        + 2 * public_metrics.get('quote_count', 0)
+        + public_metrics.get('reply_count', 0)
+    )
+
+
+def _timestamp(created_at) -> float:
+    if isinstance(created_at, datetime):
+        return created_at.timestamp()
+    if isinstance(created_at, str):
+        return datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
+    return None
+
+
+class TweetRecord:
+    """
+    The fields of a tweet the bot uses, and nothing else.
+
+    IDs are ints, the posting time a Unix timestamp and the public metrics
+    are folded into one engagement score on ingestion, so a record costs a
+    fraction of a tweepy Tweet, which keeps its whole JSON payload plus
+    parsed copies of every field.
+    """
+
+    __slots__ = ('id', 'author_id', 'text', 'timestamp', 'engagement', 'lang', 'is_reference')
+
+    def __init__(self, id: int, author_id: int, text: str, timestamp: float = None, engagement: int = 0,
+                 lang: str = None, is_reference: bool = False):
+        """
+        Args:
+            id (int): Tweet ID
+            author_id (int): Author's user ID
+            text (str): Tweet text
+            timestamp (float): Posting time as a Unix timestamp, None if unknown
+            engagement (int): Weighted likes, retweets, quotes and replies
+            lang (str): Language code detected by Twitter, None if not requested
+            is_reference (bool): Whether the tweet is a retweet, quote or reply
+        """
+        self.id = id
+        self.author_id = author_id
+        self.text = text
+        self.timestamp = timestamp
+        self.engagement = engagement
+        self.lang = lang
+        self.is_reference = is_reference
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'TweetRecord':
+        """Build a record from a tweet object of an API v2 payload"""
+        author_id = data.get('author_id')
+        return cls(
+            int(data['id']),
+            int(author_id) if author_id is not None else None,
+            data.get('text', ''),
+            _timestamp(data.get('created_at')),
+            _engagement(data.get('public_metrics')),
+            data.get('lang'),
+            bool(data.get('referenced_tweets')),
+        )
+
+    @classmethod
+    def from_tweet(cls, tweet) -> 'TweetRecord':
+        """Build a record from a tweepy Tweet or any object with the same attributes"""
+        lang = getattr(tweet, 'lang', None)
+        author_id = getattr(tweet, 'author_id', None)
+        return cls(
+            int(tweet.id),
+            int(author_id) if author_id is not None else None,
+            tweet.text or '',
+            _timestamp(getattr(tweet, 'created_at', None)),
+            _engagement(getattr(tweet, 'public_metrics', None)),
+            lang if isinstance(lang, str) else None,
+            bool(getattr(tweet, 'referenced_tweets', None)),
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, TweetRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"TweetRecord(id={self.id}, author_id={self.author_id}, text={self.text[:30]!r})"
+
+
+def to_record(tweet) -> TweetRecord:
+    """Return tweet as a TweetRecord, converting tweepy Tweets and similar objects"""
+    if isinstance(tweet, TweetRecord):
+        return tweet
+    return TweetRecord.from_tweet(tweet)
+
+
+class TweetPage:
+    """
+    One page of a tweet listing decoded straight into records, shaped like a
+    tweepy Response (data, includes, meta) so callers take either
+    """
+
+    __slots__ = ('data', 'includes', 'meta')
+
+    def __init__(self, data: list, includes: dict, meta: dict):
+        self.data = data
+        self.includes = includes
+        self.meta = meta
+
+    @classmethod
+    def decode(cls, payload, decoder=None) -> 'TweetPage':
+        """
+        Decode a raw API response body
+        Args:
+            payload (bytes): JSON body of e.g. GET /2/lists/:id/tweets
+            decoder (callable): JSON decoder, loads() by default
+        Returns:
+            TweetPage: Tweets as TweetRecords, included users as Users
+        """
+        body = (decoder or loads)(payload)
+        includes = body.get('includes') or {}
+        return cls(
+            [TweetRecord.from_json(tweet) for tweet in body.get('data') or ()],
+            {'users': [User(user['id'], user['username']) for user in includes.get('users') or ()]},
+            body.get('meta') or {},
+        )
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from src.cache import TTLCache
+from src.text import URL_PATTERN, WHITESPACE
+
+
+def normalize_tweet_text(text: str) -> str:
+    """
+    Reduce tweet text to what determines the reply: URLs are dropped,
+    whitespace is collapsed and case is folded, so cross-posts and repeated
+    announcements map to the same cache entry
+    """
+    text = URL_PATTERN.sub(' ', text)
+    return WHITESPACE.sub(' ', text).strip().casefold()
+
+
+def cache_key(text: str, model: str, prompt_version: str) -> str:
+    """Content address of a reply: normalized tweet text plus model and prompt version"""
+    material = f"{model}\0{prompt_version}\0{normalize_tweet_text(text)}"
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ReplyCache:
+    """
+    Two-tier cache of generated replies keyed by cache_key().
+
+    The memory tier is an LRU+TTL cache; the optional disk tier is a SQLite
+    file that survives restarts. With max_variants=1 a cached reply is reused
+    as-is. With max_variants>1 new replies are generated (and stored) until a
+    key has that many variants, after which the variants are served in
+    rotation, so repeated content does not always get the identical reply.
+    The disk tier is purged every purge_every stores: expired rows, rows
+    beyond max_variants per key and the oldest rows beyond max_rows go.
+    """
+
+    def __init__(self, maxsize: int = 2000, ttl: float = 24 * 3600, path: str = None,
+                 max_variants: int = 1, prompt_version: str = '', clock=time.time,
+                 max_rows: int = 50000, purge_every: int = 100):
+        """
+        Args:
+            maxsize (int): Entries kept in the memory tier
+            ttl (float): Seconds a cached reply stays valid, in both tiers
+            path (str): SQLite file for the disk tier, None for memory only
+            max_variants (int): Replies kept per key before cached ones are reused
+            prompt_version (str): Part of every key, so prompt changes invalidate the cache
+            clock (callable): Wall-clock time source, injectable for tests
+            max_rows (int): Rows kept in the disk tier, oldest deleted first
+            purge_every (int): Stores between purges of the disk tier
+        """
+        self.ttl = ttl
+        self.max_variants = max_variants
+        self.max_rows = max_rows
+        self.purge_every = purge_every
+        self._stores = 0
+        self.prompt_version = prompt_version
+        self.clock = clock
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._rotation = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)  # Next variant per key, bounded like the replies
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            with self._conn:
+                self._conn.execute('''
+                    CREATE TABLE IF NOT EXISTS reply_cache (
+                        key TEXT NOT NULL,
+                        reply TEXT NOT NULL,
+                        latency REAL NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                ''')
+                self._conn.execute('CREATE INDEX IF NOT EXISTS reply_cache_key ON reply_cache (key)')
+            self.purge_expired()  # Rows left behind by earlier runs
+
+    def get(self, text: str, model: str):
+        """
+        Return a cached reply for text, or None if a new one should be generated
+        """
+        key = cache_key(text, model, self.prompt_version)
+        variants = self._load(key)
+        with self._lock:
+            if len(variants) < self.max_variants or not variants:
+                self.misses += 1
+                return None
+            index = self._rotation.get(key, 0) % len(variants)
+            self._rotation.set(key, index + 1)
+            reply, latency = variants[index]
+            self.hits += 1
+            self.saved_seconds += latency
+            return reply
+
+    def put(self, text: str, model: str, reply: str, latency: float = 0.0):
+        """
+        Store a generated reply
+        Args:
+            latency (float): Seconds it took to generate, counted as saved on each hit
+        """
+        key = cache_key(text, model, self.prompt_version)
+        variants = self._load(key)
+        if len(variants) >= self.max_variants or any(cached == reply for cached, _ in variants):
+            return
+        variants = variants + [(reply, latency)]
+        self.memory.set(key, variants)
+        if self._conn is not None:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    'INSERT INTO reply_cache (key, reply, latency, created_at) VALUES (?, ?, ?, ?)',
+                    (key, reply, latency, self.clock())
+                )
+                self._stores += 1
+                purge = self._stores % self.purge_every == 0
+            if purge:
+                self.purge_expired()
+
+    def _load(self, key: str) -> list:
+        """Variants for key from the memory tier, falling back to the disk tier"""
+        variants = self.memory.get(key)
+        if variants is not None:
+            return variants
+        if self._conn is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT reply, latency FROM reply_cache WHERE key = ? AND created_at > ? ORDER BY rowid',
+                (key, self.clock() - self.ttl)
+            ).fetchall()
+        variants = [(reply, latency) for reply, latency in rows]
+        if variants:
+            self.memory.set(key, variants)
+        return variants
+
+    def purge_expired(self) -> int:
+        """
+        Delete disk entries older than the TTL, variants beyond max_variants
+        per key (other processes sharing the file may have added them) and
+        the oldest entries beyond max_rows
+        Returns:
+            int: Rows deleted
+        """
+        if self._conn is None:
+            return 0
+        with self._lock, self._conn:
+            deleted = self._conn.execute(
+                'DELETE FROM reply_cache WHERE created_at <= ?', (self.clock() - self.ttl,)
+            ).rowcount
+            deleted += self._conn.execute('''
+                DELETE FROM reply_cache WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, ROW_NUMBER() OVER (PARTITION BY key ORDER BY rowid) AS n FROM reply_cache
+                    ) WHERE n > ?
+                )
+            ''', (self.max_variants,)).rowcount
+            deleted += self._conn.execute(
+                'DELETE FROM reply_cache WHERE rowid <= '
+                '(SELECT rowid FROM reply_cache ORDER BY rowid DESC LIMIT 1 OFFSET ?)',
+                (self.max_rows,)
+            ).rowcount
+        return deleted
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the generation time saved by hits"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hit_ratio, 3),
+            'saved_seconds': round(self.saved_seconds, 3),
+            'memory_entries': len(self.memory),
+        }
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
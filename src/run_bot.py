@@ -1,14 +1,85 @@
 #!/usr/bin/env python3
 
+import argparse
+import atexit
+import os
+import signal
+import sys
+
 from .bot import TwitterBot
+from .llm import PROMPT_VERSION
+from .quota import ReplyQuota
+from .reply_cache import ReplyCache
+from .state import SQLiteStateStore
+from .supervisor import DEFAULT_LIST_ID, parse_list_ids
+from .workers import ReplyWorkerPool
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Twitter list auto-reply bot')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Run the asyncio pipeline instead of the sequential loop')
+    parser.add_argument('--stream', dest='use_stream', action='store_true',
+                        help='Follow the list through the filtered stream instead of polling')
+    parser.add_argument('--workers', dest='use_workers', action='store_true',
+                        help='Generate and post replies on bounded worker pools in the sequential loop')
+    parser.add_argument('--generate-concurrency', type=int, default=4,
+                        help='Concurrent LLM calls in async and worker mode')
+    parser.add_argument('--post-concurrency', type=int, default=2,
+                        help='Concurrent create_tweet calls in worker mode')
+    parser.add_argument('--lists', default=os.getenv('BOT_LIST_IDS', DEFAULT_LIST_ID),
+                        help='Comma-separated IDs of the lists to monitor; async and stream mode take one')
+    parser.add_argument('--record', metavar='TRACE',
+                        help='Append all Twitter and OpenAI traffic to this gzip JSONL trace')
+    parser.add_argument('--max-replies-per-user', type=int, default=3,
+                        help='Replies per author in any 24 hours')
+    parser.add_argument('--max-replies-per-day', type=int, default=None,
+                        help='Replies across all authors in any 24 hours')
+    parser.add_argument('--max-replies-per-hour', type=int, default=None,
+                        help='Replies across all authors in any hour')
+    args = parser.parse_args(argv)
+    list_ids = parse_list_ids(args.lists)
+    if (args.use_async or args.use_stream) and len(list_ids) != 1:
+        parser.error('--async and --stream monitor exactly one list')
 
-def main():
-    bot = TwitterBot()
-    list_id = '1872292999155040454'
+    bot = TwitterBot(
+        state_store=SQLiteStateStore(os.getenv('BOT_STATE_PATH', 'state/bot_state.db')),
+        reply_cache=ReplyCache(
+            path=os.getenv('BOT_REPLY_CACHE_PATH', 'state/reply_cache.db'),
+            prompt_version=PROMPT_VERSION
+        ),
+        quota=ReplyQuota(
+            per_user=args.max_replies_per_user,
+            global_limit=args.max_replies_per_day,
+            hourly_limit=args.max_replies_per_hour
+        )
+    )
+    recorder = None
+    if args.record:
+        from .recorder import start_recording
+        recorder = start_recording(bot, args.record)
+        # Close the gzip stream however the process ends, or the trace has no trailer;
+        # SIGTERM would otherwise skip both the finally block and atexit
+        atexit.register(recorder.close)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    bot.member_refresh = 6 * 3600  # Membership changes slowly; refresh the index a few times a day
+    if args.use_workers:
+        bot.reply_pool = ReplyWorkerPool(
+            bot, generate_concurrency=args.generate_concurrency, post_concurrency=args.post_concurrency
+        )
+    list_id = list_ids[0]
     print('Starting Twitter bot with GPT-4 integration...')
-    print('Monitoring list:', list_id)
+    print('Monitoring lists:', ', '.join(list_ids))
     print('Maximum replies per user per day:', bot.max_daily_replies)
-    bot.monitor_list_tweets(list_id)
+    try:
+        if args.use_stream:
+            bot.monitor_list_stream(list_id)
+        elif args.use_async:
+            bot.monitor_list_tweets_async(list_id, generate_concurrency=args.generate_concurrency)
+        else:
+            bot.monitor_lists(list_ids)
+    finally:
+        if recorder is not None:
+            recorder.close()
 
 if __name__ == '__main__':
     main()
@@ -1,13 +1,18 @@
 #!/usr/bin/env python3
 
+import argparse
+import atexit
 import sys
 import time
-import traceback
 from datetime import datetime
 import signal
 import os
 
 from src.logger import setup_logger
+from src.metrics import metrics, start_metrics_server
+from src.profiling import Profiler, install_signal_handlers, start_control_server
+from src.supervisor import DEFAULT_LIST_ID, PROFILING_SIGNALS, RESIZE_SIGNALS, Supervisor, parse_list_ids
+from src.usage import usage
 
 logger = setup_logger('continuous_bot')
 
@@ -15,9 +20,58 @@ def signal_handler(signum, frame):
     logger.info("Received shutdown signal. Exiting gracefully...")
     sys.exit(0)
 
-def run_bot_with_restart():
-    """Run the bot continuously with automatic restart on errors"""
+def setup_profiling(name=None):
+    """
+    Install the on-demand profiling hooks of this process: SIGUSR1 toggles a
+    cProfile session, SIGUSR2 memory tracing, and BOT_CONTROL_SOCKET adds a
+    control socket that can also dump thread stacks
+    Args:
+        name (str): Worker name, used in the report and socket file names
+    Returns:
+        Profiler: The profiler to attach to each bot
+    """
+    stuck_after = float(os.getenv('BOT_STUCK_CALL_SECONDS', 300))
+    profiler = Profiler(os.getenv('BOT_PROFILE_DIR', 'profiles'), name=name, stuck_after=stuck_after or None)
+    install_signal_handlers(profiler)
+    profiler.start_watchdog()
+    atexit.register(profiler.close)  # Write out sessions still running at shutdown
+    socket_path = os.getenv('BOT_CONTROL_SOCKET')
+    if socket_path:
+        if name:
+            socket_path = f"{socket_path}.{name}"
+        start_control_server(profiler, socket_path)
+        logger.info(f"Profiler control socket at {socket_path}")
+    return profiler
+
+def run_bot_with_restart(list_ids=None, worker_name=None):
+    """
+    Run the bot continuously with automatic restart on errors
+    Args:
+        list_ids (list): IDs of the lists to monitor; defaults to the main list
+        worker_name (str): Name of this worker process under the supervisor;
+            the bot then claims tweets and charges the reply quota through
+            the coordination database shared with the other workers
+    """
     from src.bot import TwitterBot
+    from src.coordination import Coordinator, SharedReplyQuota
+    from src.llm import PROMPT_VERSION
+    from src.reply_cache import ReplyCache
+    from src.state import SQLiteStateStore
+    
+    list_ids = list_ids or [DEFAULT_LIST_ID]
+    # Shared across restarts (and persisted across processes) so a crash does
+    # not cause repeat LLM calls or duplicate replies; workers keep their own
+    # processed tweets in it
+    state_store = SQLiteStateStore(os.getenv('BOT_STATE_PATH', 'state/bot_state.db'), owner=worker_name or '')
+    reply_cache = ReplyCache(
+        path=os.getenv('BOT_REPLY_CACHE_PATH', 'state/reply_cache.db'),
+        prompt_version=PROMPT_VERSION
+    )
+    coordinator = quota = None
+    if worker_name is not None:
+        coordinator = Coordinator(os.getenv('BOT_COORDINATION_PATH', 'state/coordination.db'), owner=worker_name)
+        quota = SharedReplyQuota(coordinator)
+    profiler = setup_profiling(worker_name)
     
     max_retries = 3  # Maximum number of quick retries before cooling down
     retry_count = 0
@@ -26,14 +80,21 @@ def run_bot_with_restart():
     while True:
         try:
             logger.info(f"=== Starting bot at {datetime.now()} ===")
-            bot = TwitterBot()
-            list_id = '1872292999155040454'
+            bot = TwitterBot(state_store=state_store, reply_cache=reply_cache, quota=quota,
+                             coordinator=coordinator)
+            bot.member_refresh = 6 * 3600  # Membership changes slowly; refresh the index a few times a day
+            bot.profiler = profiler
+            profiler.sizes = {
+                'processed_tweets': lambda: len(bot.processed_tweets),
+                'reply_quota_users': lambda: len(bot.quota),
+                'list_members': lambda: len(bot.monitored_users),
+            }
             logger.info('Twitter bot with GPT-4 integration initialized')
-            logger.info(f'Monitoring list: {list_id}')
+            logger.info(f'Monitoring lists: {", ".join(list_ids)}')
             logger.info(f'Maximum replies per user per day: {bot.max_daily_replies}')
             
             # Main monitoring loop
-            bot.monitor_list_tweets(list_id)
+            bot.monitor_lists(list_ids)
             
         except KeyboardInterrupt:
             logger.info("Received keyboard interrupt. Shutting down gracefully...")
@@ -45,6 +106,9 @@ def run_bot_with_restart():
             logger.error(f"Error type: {type(e).__name__}")
             logger.error(f"Error message: {str(e)}")
             
+            logger.info(metrics.summary())
+            logger.info(usage.format_report())
+            
             retry_count += 1
             if retry_count >= max_retries:
                 logger.warning(f"Maximum retries ({max_retries}) reached. Entering cooldown period...")
@@ -54,10 +118,51 @@ def run_bot_with_restart():
                 logger.info(f"Retrying in 60 seconds... (Attempt {retry_count}/{max_retries})")
                 time.sleep(60)
 
-if __name__ == '__main__':
+def run_worker(worker_name, list_ids):
+    """Entry point of a worker process started by the supervisor"""
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    metrics_port = os.getenv('BOT_METRICS_PORT')
+    if metrics_port:
+        # The supervisor serves the base port; each worker the port after it plus its index
+        port = int(metrics_port) + 1 + Supervisor.index(worker_name)
+        start_metrics_server(port)
+        logger.info(f"{worker_name} serving metrics at http://127.0.0.1:{port}/metrics")
+    logger.info(f"{worker_name} monitoring lists: {', '.join(list_ids)}")
+    run_bot_with_restart(list_ids, worker_name=worker_name)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the bot continuously, restarting it on errors')
+    parser.add_argument('--lists', default=os.getenv('BOT_LIST_IDS', DEFAULT_LIST_ID),
+                        help='Comma-separated IDs of the lists to monitor')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('BOT_WORKERS', 1)),
+                        help='Worker processes; lists are spread over them by consistent hashing')
+    args = parser.parse_args(argv)
+    list_ids = parse_list_ids(args.lists)
+
     # Set up signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
     logger.info("Starting continuous bot operation...")
-    run_bot_with_restart()
+    metrics_port = os.getenv('BOT_METRICS_PORT')
+    if metrics_port:
+        start_metrics_server(int(metrics_port))
+        logger.info(f"Serving metrics at http://127.0.0.1:{metrics_port}/metrics")
+    if args.workers > 1 and len(list_ids) > 1:
+        supervisor = Supervisor(run_worker, list_ids, workers=args.workers)
+        # Profiling signals sent to the supervisor reach every worker
+        for name in PROFILING_SIGNALS:
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), lambda signum, frame: supervisor.signal_workers(signum))
+        # SIGTTIN adds a worker and SIGTTOU removes one, moving as few lists as possible
+        for name, step in RESIZE_SIGNALS.items():
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name),
+                              lambda signum, frame, step=step: supervisor.request_resize(supervisor.target_size + step))
+        supervisor.run()
+    else:
+        run_bot_with_restart(list_ids)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+LIST_TWEETS_ENDPOINT = 'GET /2/lists/:id/tweets'
+
+
+def endpoint_key(method: str, url: str) -> str:
+    """
+    Normalize a request into an endpoint key such as 'GET /2/lists/:id/tweets'
+    so every list shares the same rate-limit bucket
+    """
+    segments = urlparse(url).path.split('/')
+    # Keep the API version ('/2/...'), replace numeric IDs after it
+    segments = [
+        ':id' if index > 1 and segment.isdigit() else segment
+        for index, segment in enumerate(segments)
+    ]
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+class RateLimitBucket:
+    """
+    Token bucket mirroring one endpoint's Twitter rate-limit window.
+
+    The bucket is resynchronized from the x-rate-limit-* headers of every
+    response and refills to its limit when the window resets.
+    """
+
+    def __init__(self, limit: int, remaining: int, reset_at: float):
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_at = reset_at
+
+    def update(self, limit: int, remaining: int, reset_at: float):
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_at = reset_at
+
+    def tokens(self, now: float) -> int:
+        """Requests still available at time now"""
+        if now >= self.reset_at:
+            return self.limit
+        return self.remaining
+
+    def reset_in(self, now: float) -> float:
+        """Seconds until the window resets"""
+        return max(self.reset_at - now, 0.0)
+
+
+class PollScheduler:
+    """
+    Adaptive replacement for the fixed polling interval.
+
+    Polling speeds up from base_interval towards min_interval while the list
+    is busy, and is never faster than the remaining rate-limit budget allows:
+    the remaining requests (minus a safety reserve) are spread evenly over
+    the time left in the window. As the budget runs out the delay grows
+    smoothly until the window resets, so polling never runs into a 429.
+    """
+
+    def __init__(self, base_interval: float = 60, min_interval: float = 5,
+                 max_interval: float = 900, reserve_fraction: float = 0.1,
+                 activity_smoothing: float = 0.3, clock=time.time):
+        """
+        Args:
+            base_interval (float): Delay between polls on a quiet list
+            min_interval (float): Shortest delay, used while the list is busy
+            max_interval (float): Longest delay chosen for activity reasons
+            reserve_fraction (float): Share of each window's limit kept unused
+            activity_smoothing (float): Weight of the newest poll in the activity average
+            clock (callable): Wall-clock time source (epoch seconds), injectable for tests
+        """
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.reserve_fraction = reserve_fraction
+        self.activity_smoothing = activity_smoothing
+        self.clock = clock
+        self.buckets = {}
+        self.activity = 0.0  # Moving average of new tweets per poll
+        self._requests_since_poll = {}
+        self._requests_per_poll = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, headers):
+        """
+        Update an endpoint's bucket from a response's rate-limit headers
+        Args:
+            endpoint (str): Endpoint key, see endpoint_key()
+            headers (Mapping): Response headers
+        """
+        try:
+            limit = int(headers['x-rate-limit-limit'])
+            remaining = int(headers['x-rate-limit-remaining'])
+            reset_at = float(headers['x-rate-limit-reset'])
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            bucket = self.buckets.get(endpoint)
+            if bucket is None:
+                self.buckets[endpoint] = RateLimitBucket(limit, remaining, reset_at)
+            else:
+                bucket.update(limit, remaining, reset_at)
+            self._requests_since_poll[endpoint] = self._requests_since_poll.get(endpoint, 0) + 1
+
+    def observe_response(self, response, *args, **kwargs):
+        """requests response hook: feed every Twitter API response into the scheduler"""
+        self.observe(endpoint_key(response.request.method, response.url), response.headers)
+        return response
+
+    def attach(self, session):
+        """
+        Install the response hook on a requests session (e.g. tweepy.Client.session),
+        replacing the hook of any scheduler attached earlier, since a shared
+        session outlives the bots that used it
+        """
+        hooks = session.hooks['response']
+        hooks[:] = [hook for hook in hooks if not isinstance(getattr(hook, '__self__', None), PollScheduler)]
+        hooks.append(self.observe_response)
+
+    def record_activity(self, new_tweets: int):
+        """Fold the number of new tweets found by the latest poll into the activity average"""
+        with self._lock:
+            self.activity += self.activity_smoothing * (new_tweets - self.activity)
+
+    def next_delay(self, endpoint: str = LIST_TWEETS_ENDPOINT) -> float:
+        """
+        Seconds to wait before polling endpoint again
+        """
+        # Busy lists are polled faster, down to min_interval
+        floor = min(self.min_interval, self.base_interval)
+        desired = self.base_interval / (1.0 + self.activity)
+        desired = min(max(desired, floor), self.max_interval)
+
+        with self._lock:
+            # A poll may page through several requests; budget for the recent average
+            made = self._requests_since_poll.pop(endpoint, 0)
+            if made:
+                average = self._requests_per_poll.get(endpoint, made)
+                self._requests_per_poll[endpoint] = average + 0.5 * (made - average)
+            per_poll = max(self._requests_per_poll.get(endpoint, 1.0), 1.0)
+
+            bucket = self.buckets.get(endpoint)
+            if bucket is None:
+                return desired
+            now = self.clock()
+            reset_in = bucket.reset_in(now)
+            if reset_in <= 0:
+                return desired
+            reserve = int(bucket.limit * self.reserve_fraction)
+            usable = bucket.tokens(now) - reserve
+            if usable < per_poll:
+                # Budget exhausted: wait for the window to reset
+                return reset_in + 1
+            pace = reset_in / (usable / per_poll)
+        return max(desired, pace)
+
+    def stats(self) -> dict:
+        """Snapshot of the activity average and each endpoint's remaining budget"""
+        now = self.clock()
+        with self._lock:
+            return {
+                'activity': round(self.activity, 2),
+                'buckets': {
+                    endpoint: {
+                        'remaining': bucket.tokens(now),
+                        'limit': bucket.limit,
+                        'reset_in': round(bucket.reset_in(now)),
+                    }
+                    for endpoint, bucket in self.buckets.items()
+                },
+            }
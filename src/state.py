@@ -0,0 +1,277 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class ProcessedTweets:
+    """
+    Insertion-ordered, bounded set of processed tweet IDs.
+
+    Membership checks and inserts are O(1). Once maxlen is exceeded the
+    oldest IDs are dropped first, unlike trimming a plain set, which drops
+    arbitrary entries. IDs added since the last drain_new() call are
+    tracked so the state store can persist them in one batch per cycle.
+    IDs are kept as ints, which benchmarks/records.py measures at about
+    15% less memory per processed ID than strings (most of the cost is
+    the ordered dict itself); they are accepted in either form and
+    returned as strings.
+    """
+
+    def __init__(self, tweet_ids=(), maxlen: int = 1000):
+        self.maxlen = maxlen
+        self._ids = OrderedDict()
+        self._new = []
+        for tweet_id in tweet_ids:
+            self._ids[int(tweet_id)] = None
+        self._trim()
+
+    def add(self, tweet_id):
+        tweet_id = int(tweet_id)
+        if tweet_id in self._ids:
+            return
+        self._ids[tweet_id] = None
+        self._new.append(tweet_id)
+        self._trim()
+
+    def drain_new(self) -> list:
+        """Return the IDs added since the last call and reset the list"""
+        new, self._new = self._new, []
+        return [str(tweet_id) for tweet_id in new]
+
+    def _trim(self):
+        while len(self._ids) > self.maxlen:
+            self._ids.popitem(last=False)
+
+    def __contains__(self, tweet_id):
+        return int(tweet_id) in self._ids
+
+    def __iter__(self):
+        return (str(tweet_id) for tweet_id in self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+
+class StateStore:
+    """
+    Backend that persists bot state between runs: processed tweet IDs,
+    reply quota logs, per-list high-water marks and list members.
+
+    TwitterBot loads the state once at start-up and calls save() once per
+    polling cycle with only what changed, so writes are batched.
+    """
+
+    def load_processed(self, limit: int) -> list:
+        """Return up to limit most recent processed tweet IDs, oldest first"""
+        raise NotImplementedError
+
+    def load_reply_log(self) -> dict:
+        """Return key -> reply timestamps, as saved from ReplyQuota.drain_changed()"""
+        raise NotImplementedError
+
+    def load_high_water(self) -> dict:
+        """Return list_id -> newest tweet ID seen"""
+        raise NotImplementedError
+
+    def load_list_members(self) -> dict:
+        """Return list_id -> {'members': {user_id: username}, 'synced_at': float}"""
+        raise NotImplementedError
+
+    def save(self, processed=(), reply_log=None, high_water=None, list_members=None, keep: int = 1000):
+        """
+        Persist one cycle's changes
+        Args:
+            processed (iterable): Tweet IDs processed since the last save
+            reply_log (dict): Changed key -> reply timestamps; an empty list deletes the key
+            high_water (dict): list_id -> newest tweet ID seen
+            list_members (dict): list_id -> membership changes from ListMembership.drain_changed()
+            keep (int): Number of most recent processed IDs to retain
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryStateStore(StateStore):
+    """State store that lives only as long as the process"""
+
+    def __init__(self):
+        self.processed = ProcessedTweets(maxlen=1000)
+        self.reply_log = {}
+        self.high_water = {}
+        self.list_members = {}
+
+    def load_processed(self, limit: int) -> list:
+        return list(self.processed)[-limit:]
+
+    def load_reply_log(self) -> dict:
+        return {key: list(times) for key, times in self.reply_log.items()}
+
+    def load_high_water(self) -> dict:
+        return dict(self.high_water)
+
+    def load_list_members(self) -> dict:
+        return {
+            list_id: {'members': dict(entry['members']), 'synced_at': entry['synced_at']}
+            for list_id, entry in self.list_members.items()
+        }
+
+    def save(self, processed=(), reply_log=None, high_water=None, list_members=None, keep: int = 1000):
+        self.processed.maxlen = keep
+        for tweet_id in processed:
+            self.processed.add(tweet_id)
+        self.processed.drain_new()
+        for key, times in (reply_log or {}).items():
+            if times:
+                self.reply_log[key] = list(times)
+            else:
+                self.reply_log.pop(key, None)
+        self.high_water.update(high_water or {})
+        for list_id, change in (list_members or {}).items():
+            entry = self.list_members.setdefault(list_id, {'members': {}, 'synced_at': None})
+            entry['members'].update(change['added'])
+            for user_id in change['removed']:
+                entry['members'].pop(user_id, None)
+            entry['synced_at'] = change['synced_at']
+
+
+class SQLiteStateStore(StateStore):
+    """
+    State store backed by an embedded SQLite database in WAL mode, so the
+    bot resumes where it left off after a crash or restart.
+
+    Worker processes may share one database: each processed tweet row is
+    tagged with the owner that saved it, and each owner loads and trims
+    only its own rows, so a busy worker cannot push another's out of `keep`.
+    """
+
+    def __init__(self, path: str = 'state/bot_state.db', owner: str = ''):
+        """
+        Args:
+            path (str): Database file, created along with its directory if missing
+            owner (str): Name of the worker whose processed tweets this store
+                handles, e.g. worker-2; empty for a single process
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.owner = owner
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            self._conn.executescript('''
+                CREATE TABLE IF NOT EXISTS processed_tweets (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    tweet_id TEXT NOT NULL UNIQUE
+                );
+                CREATE TABLE IF NOT EXISTS reply_log (
+                    key TEXT PRIMARY KEY,
+                    timestamps TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS list_high_water (
+                    list_id TEXT PRIMARY KEY,
+                    tweet_id INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS list_members (
+                    list_id TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    PRIMARY KEY (list_id, user_id)
+                );
+                CREATE TABLE IF NOT EXISTS list_syncs (
+                    list_id TEXT PRIMARY KEY,
+                    synced_at REAL NOT NULL
+                );
+            ''')
+            columns = [row[1] for row in self._conn.execute('PRAGMA table_info(processed_tweets)')]
+            if 'owner' not in columns:
+                # Databases written before workers had their own rows
+                self._conn.execute("ALTER TABLE processed_tweets ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+            self._conn.execute('CREATE INDEX IF NOT EXISTS processed_tweets_owner ON processed_tweets (owner, seq)')
+
+    def load_processed(self, limit: int) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT tweet_id FROM processed_tweets WHERE owner = ? ORDER BY seq DESC LIMIT ?',
+                (self.owner, limit)
+            ).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def load_reply_log(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute('SELECT key, timestamps FROM reply_log').fetchall()
+        return {key: json.loads(timestamps) for key, timestamps in rows}
+
+    def load_high_water(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute('SELECT list_id, tweet_id FROM list_high_water').fetchall()
+        return dict(rows)
+
+    def load_list_members(self) -> dict:
+        with self._lock:
+            syncs = self._conn.execute('SELECT list_id, synced_at FROM list_syncs').fetchall()
+            rows = self._conn.execute('SELECT list_id, user_id, username FROM list_members').fetchall()
+        lists = {list_id: {'members': {}, 'synced_at': synced_at} for list_id, synced_at in syncs}
+        for list_id, user_id, username in rows:
+            if list_id in lists:
+                lists[list_id]['members'][user_id] = username
+        return lists
+
+    def save(self, processed=(), reply_log=None, high_water=None, list_members=None, keep: int = 1000):
+        processed = list(processed)
+        reply_log = reply_log or {}
+        high_water = high_water or {}
+        list_members = list_members or {}
+        if not (processed or reply_log or high_water or list_members):
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO processed_tweets (tweet_id, owner) VALUES (?, ?)',
+                [(tweet_id, self.owner) for tweet_id in processed]
+            )
+            if processed:
+                # Other owners' rows interleave with ours, so count rows rather than seq numbers
+                self._conn.execute(
+                    'DELETE FROM processed_tweets WHERE owner = ? AND seq <= '
+                    '(SELECT seq FROM processed_tweets WHERE owner = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)',
+                    (self.owner, self.owner, keep)
+                )
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO reply_log (key, timestamps) VALUES (?, ?)',
+                [(key, json.dumps(times)) for key, times in reply_log.items() if times]
+            )
+            self._conn.executemany(
+                'DELETE FROM reply_log WHERE key = ?',
+                [(key,) for key, times in reply_log.items() if not times]
+            )
+            # High-water marks only move forward, which keeps a stale copy
+            # from another worker process from winding one back
+            self._conn.executemany(
+                'INSERT INTO list_high_water (list_id, tweet_id) VALUES (?, ?) '
+                'ON CONFLICT(list_id) DO UPDATE SET tweet_id = MAX(tweet_id, excluded.tweet_id)',
+                list(high_water.items())
+            )
+            # Membership is written as diffs: only changed members touch the table
+            for list_id, change in list_members.items():
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO list_members (list_id, user_id, username) VALUES (?, ?, ?)',
+                    [(list_id, user_id, username) for user_id, username in change['added'].items()]
+                )
+                self._conn.executemany(
+                    'DELETE FROM list_members WHERE list_id = ? AND user_id = ?',
+                    [(list_id, user_id) for user_id in change['removed']]
+                )
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO list_syncs (list_id, synced_at) VALUES (?, ?)',
+                    (list_id, change['synced_at'])
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
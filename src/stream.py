@@ -0,0 +1,335 @@
+import queue
+import threading
+import time
+from contextlib import nullcontext
+import sys
+import os
+import requests
+import tweepy
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logger import HIGH_VOLUME, log_context, setup_logger
+from src.metrics import metrics
+from src.records import TweetRecord, loads
+
+logger = setup_logger('twitter_bot')
+
+TWITTER_API_URL = os.getenv('TWITTER_API_URL', 'https://api.twitter.com')
+RULES_PATH = '/2/tweets/search/stream/rules'
+STREAM_PATH = '/2/tweets/search/stream'
+MAX_RULE_LENGTH = 512  # Rule length limit of the filtered stream on the basic tiers
+_STOP = object()  # Tells the reply thread to finish
+STREAM_PARAMS = {
+    'tweet.fields': 'author_id,referenced_tweets,text,created_at,public_metrics,lang',
+    'expansions': 'author_id',
+    'user.fields': 'username',
+}
+
+
+def build_member_rules(usernames, max_length: int = MAX_RULE_LENGTH) -> list:
+    """
+    Pack list members into as few 'from:a OR from:b' rules as fit the rule
+    length limit
+    Args:
+        usernames (iterable): Member usernames
+        max_length (int): Maximum characters per rule
+    Returns:
+        list: Rule values, each matching tweets from a subset of the members
+    """
+    rules = []
+    current = ''
+    for username in sorted(set(usernames), key=str.lower):
+        clause = f"from:{username}"
+        candidate = f"{current} OR {clause}" if current else clause
+        if len(candidate) > max_length and current:
+            rules.append(current)
+            candidate = clause
+        current = candidate
+    if current:
+        rules.append(current)
+    return rules
+
+
+class StreamDisconnected(Exception):
+    """The stream connection ended or failed; status is the HTTP status if there was one"""
+
+    def __init__(self, message: str, status: int = None):
+        super().__init__(message)
+        self.status = status
+
+
+class ListStream:
+    """
+    Push-based alternative to list polling: the list's members become
+    filtered-stream 'from:' rules and matching tweets are handed to the bot
+    as they arrive.
+
+    Rules are tagged with the list ID and re-synced every member_refresh
+    seconds, so only added and removed members cause rule changes. After a
+    disconnect the stream reconnects with the backoff Twitter recommends and
+    fills the gap with a list poll bounded by the list's high-water mark.
+
+    Replies are generated on a separate thread fed by a bounded queue, so
+    LLM latency never holds up reading the stream; Twitter disconnects
+    clients that fall behind. If the queue is full, streamed tweets are
+    dropped and counted rather than stalling the connection.
+    """
+
+    def __init__(self, bot, list_id: str, base_url: str = TWITTER_API_URL, session: requests.Session = None,
+                 max_rule_length: int = MAX_RULE_LENGTH, member_refresh: float = 900,
+                 read_timeout: float = 30, max_backoff: float = 320, queue_size: int = 100):
+        """
+        Args:
+            bot (TwitterBot): Bot whose filter, dedup and reply path handles the tweets
+            list_id (str): ID of the Twitter list to follow
+            base_url (str): Twitter API base URL for the rules and stream endpoints
+            session (requests.Session): Session to use; defaults to a new one with
+                the bot's bearer token
+            max_rule_length (int): Maximum characters per stream rule
+            member_refresh (float): Seconds between list membership checks
+            read_timeout (float): Seconds without data (including keep-alive
+                heartbeats) before the connection is treated as stalled
+            max_backoff (float): Upper bound for reconnect delays in seconds
+            queue_size (int): Tweet batches waiting for the reply thread
+        """
+        self.bot = bot
+        self.list_id = list_id
+        self.base_url = base_url.rstrip('/')
+        self.tag = f"list:{list_id}"
+        self.max_rule_length = max_rule_length
+        self.member_refresh = member_refresh
+        self.read_timeout = read_timeout
+        self.max_backoff = max_backoff
+        self.session = session or requests.Session()
+        if 'Authorization' not in self.session.headers:
+            self.session.headers['Authorization'] = f"Bearer {bot.client.bearer_token}"
+        self._last_member_sync = None
+        self.received = 0
+        self._attempt = 0
+        self._response = None
+        self._stopped = threading.Event()
+        self.replies = queue.Queue(maxsize=queue_size)  # (tweets, high-water mark) batches
+        self._reply_thread = None
+        metrics.gauge('stream_reply_queue_depth', fn=self.replies.qsize)
+
+    def _request(self, method: str, path: str, **kwargs):
+        response = self.session.request(method, self.base_url + path, timeout=self.read_timeout, **kwargs)
+        if response.status_code >= 400:
+            raise StreamDisconnected(f"{method} {path} returned {response.status_code}", response.status_code)
+        return response.json()
+
+    def fetch_member_usernames(self) -> list:
+        """
+        Usernames of every list member from the bot's member index. The first
+        call reuses a persisted index younger than member_refresh; later
+        calls refresh it from the API.
+        Returns:
+            list: Member usernames
+        """
+        max_age = self.member_refresh if self._last_member_sync is None else 0
+        if not self.bot.get_list_members(self.list_id, max_age=max_age):
+            raise StreamDisconnected(f"Could not fetch the members of list {self.list_id}")
+        return self.bot.membership.usernames(self.list_id)
+
+    def sync_rules(self) -> dict:
+        """
+        Make the stream rules tagged with this list match its current members,
+        adding and deleting only the rules that changed
+        Returns:
+            dict: Number of rules 'added' and 'deleted'
+        """
+        desired = set(build_member_rules(self.fetch_member_usernames(), self.max_rule_length))
+        existing = {
+            rule['value']: rule['id']
+            for rule in self._request('GET', RULES_PATH).get('data') or []
+            if rule.get('tag') == self.tag
+        }
+
+        stale = [rule_id for value, rule_id in existing.items() if value not in desired]
+        new = [{'value': value, 'tag': self.tag} for value in sorted(desired - existing.keys())]
+        if stale:
+            self._request('POST', RULES_PATH, json={'delete': {'ids': stale}})
+        if new:
+            self._request('POST', RULES_PATH, json={'add': new})
+        self._last_member_sync = time.monotonic()
+        if stale or new:
+            logger.info(f"Stream rules for list {self.list_id}: added {len(new)}, deleted {len(stale)}")
+        return {'added': len(new), 'deleted': len(stale)}
+
+    def _members_due(self) -> bool:
+        return self._last_member_sync is None or time.monotonic() - self._last_member_sync >= self.member_refresh
+
+    def handle_message(self, message: dict) -> bool:
+        """
+        Filter one stream message and queue it for the reply thread
+        Returns:
+            bool: Whether a tweet was queued
+        """
+        for user in (message.get('includes') or {}).get('users', []):
+            self.bot.user_cache.set(str(user['id']), user['username'])
+        data = message.get('data')
+        if not data:
+            if message.get('errors'):
+                logger.warning(f"Stream error message: {message['errors']}")
+            return False
+
+        tweet = TweetRecord.from_json(data)
+        metrics.counter('stream_tweets_total').inc()
+        if self.list_id in self.bot.membership and not self.bot.membership.is_member(str(tweet.author_id), self.list_id):
+            # The rules lag behind the list until the next sync
+            metrics.counter('stream_non_member_total').inc()
+            logger.debug(f"Ignoring tweet {tweet.id}: author {tweet.author_id} is no longer on list {self.list_id}",
+                         extra=HIGH_VOLUME)
+            return False
+        try:
+            self.replies.put_nowait((self.bot._filter_tweets([tweet]), tweet.id))
+        except queue.Full:
+            metrics.counter('stream_dropped_total').inc()
+            logger.warning(f"Reply queue full; dropping streamed tweet {tweet.id}")
+            return False
+        return True
+
+    def fill_gap(self) -> int:
+        """
+        Poll the list for tweets posted while the stream was down and queue
+        them for the reply thread; the poll stops at the newest tweet already
+        seen. Waits for room in the queue, as nothing is streaming yet.
+        Returns:
+            int: Number of tweets queued
+        """
+        with metrics.time('stream_gap_fill'):
+            tweets = self.bot._fetch_list_tweets(self.list_id)
+        self.replies.put((tweets, self.bot._pending_high_water.pop(self.list_id, None)))
+        return len(tweets)
+
+    def _reply_worker(self):
+        """Reply to queued tweets, a batch of everything waiting at a time, and record their high-water mark"""
+        while True:
+            batch = [self.replies.get()]
+            while batch[-1] is not _STOP and not self.replies.empty():
+                batch.append(self.replies.get_nowait())
+            stop = batch[-1] is _STOP
+            batch = [item for item in batch if item is not _STOP]
+            tweets = [tweet for item_tweets, _ in batch for tweet in item_tweets]
+            marks = [mark for _, mark in batch if mark is not None]
+            try:
+                if tweets:
+                    with log_context(tweets[0].id) if len(tweets) == 1 else nullcontext():
+                        self.bot._process_tweets(tweets)
+                if marks:
+                    high_water = self.bot.list_high_water.get(self.list_id)
+                    if high_water is None or max(marks) > high_water:
+                        self.bot.list_high_water[self.list_id] = max(marks)
+                self.bot.save_state()
+            except Exception as e:
+                logger.error(f"Error replying to streamed tweets: {e}", exc_info=True)
+            if stop:
+                return
+
+    def _consume(self, max_tweets: int = None):
+        """
+        Read one stream connection until it ends, the stream is stopped or
+        max_tweets tweets were received in total
+        """
+        with self.session.get(self.base_url + STREAM_PATH, params=STREAM_PARAMS, stream=True,
+                              timeout=(10, self.read_timeout)) as response:
+            if response.status_code >= 400:
+                raise StreamDisconnected(f"Stream returned {response.status_code}", response.status_code)
+            self._response = response
+            self._attempt = 0  # Back off from scratch after every successful connect
+            logger.info(f"Connected to the filtered stream for list {self.list_id}")
+            try:
+                for line in response.iter_lines():
+                    if self._stopped.is_set():
+                        return
+                    if self._members_due():
+                        self.sync_rules()
+                    if not line:
+                        continue  # Keep-alive heartbeat
+                    try:
+                        message = loads(line)
+                    except ValueError:
+                        logger.warning(f"Skipping malformed stream message: {line[:100]!r}")
+                        continue
+                    if message.get('data'):
+                        self.received += 1
+                    self.handle_message(message)
+                    if max_tweets is not None and self.received >= max_tweets:
+                        self._stopped.set()
+                        return
+            except Exception as e:
+                if self._stopped.is_set():
+                    return  # stop() closed the connection under us
+                if isinstance(e, requests.exceptions.RequestException):
+                    raise StreamDisconnected(f"Stream connection lost: {e}") from e
+                raise
+            finally:
+                self._response = None
+        if not self._stopped.is_set():
+            raise StreamDisconnected("Stream closed by the server")
+
+    def _backoff(self, error: StreamDisconnected, attempt: int) -> float:
+        """
+        Reconnect delay following Twitter's guidance: linear from 250ms for
+        network errors, exponential from 5s for HTTP errors and from 60s for 429
+        """
+        if error.status == 429:
+            delay = 60 * 2 ** attempt
+        elif error.status is not None:
+            delay = 5 * 2 ** attempt
+        else:
+            delay = 0.25 * (attempt + 1)
+        return min(delay, self.max_backoff)
+
+    def run(self, max_tweets: int = None, max_connections: int = None) -> int:
+        """
+        Follow the list until stopped, reconnecting after disconnects
+        Args:
+            max_tweets (int): Stop after receiving this many tweets, None to run until stopped
+            max_connections (int): Stop after this many connection attempts
+        Returns:
+            int: Number of tweets received
+        """
+        self._stopped.clear()
+        self.received = 0
+        connections = 0
+        self._attempt = 0
+        self._reply_thread = threading.Thread(target=self._reply_worker, name='stream-replies', daemon=True)
+        self._reply_thread.start()
+        try:
+            while not self._stopped.is_set():
+                if max_connections is not None and connections >= max_connections:
+                    break
+                connections += 1
+                try:
+                    if self._members_due():
+                        self.sync_rules()
+                    # Catch up on tweets posted while disconnected (or since the last run)
+                    if connections > 1 or self.list_id in self.bot.list_high_water:
+                        self.fill_gap()
+                    self._consume(max_tweets)
+                except (StreamDisconnected, tweepy.TweepyException, requests.exceptions.RequestException) as e:
+                    if isinstance(e, tweepy.HTTPException):
+                        e = StreamDisconnected(str(e), e.response.status_code)
+                    elif not isinstance(e, StreamDisconnected):
+                        e = StreamDisconnected(str(e))
+                    if e.status == 429:
+                        metrics.counter('rate_limited_total').inc()
+                    metrics.counter('stream_reconnects_total').inc()
+                    delay = self._backoff(e, self._attempt)
+                    self._attempt += 1
+                    logger.warning(f"{e}; reconnecting in {delay:.2f}s")
+                    self._stopped.wait(delay)
+        finally:
+            # Tweets already queued are still answered
+            self.replies.put(_STOP)
+            self._reply_thread.join()
+            self.bot.save_state()
+        return self.received
+
+    def stop(self):
+        """Stop run() and close the open stream connection"""
+        self._stopped.set()
+        response = self._response
+        if response is not None:
+            response.close()
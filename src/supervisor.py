@@ -0,0 +1,292 @@
+import bisect
+import hashlib
+import multiprocessing
+import signal
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logger import setup_logger
+from src.metrics import metrics
+
+logger = setup_logger('continuous_bot')
+
+DEFAULT_LIST_ID = '1872292999155040454'
+PROFILING_SIGNALS = ('SIGUSR1', 'SIGUSR2')  # Forwarded to the workers by signal_workers()
+RESIZE_SIGNALS = {'SIGTTIN': 1, 'SIGTTOU': -1}  # Add or remove one worker, as in gunicorn
+
+
+def parse_list_ids(value: str) -> list:
+    """
+    Split a comma-separated list ID option, dropping blanks and duplicates
+    Returns:
+        list: List IDs in the order given
+    """
+    return list(dict.fromkeys(part.strip() for part in (value or '').split(',') if part.strip()))
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping keys (list IDs) to nodes (worker names).
+
+    Each node owns `replicas` points on the ring and a key belongs to the
+    first point at or after its hash, so adding or removing a node only
+    moves the keys of that node's arcs, about 1/N of them, instead of
+    reshuffling every key as modulo hashing would.
+    """
+
+    def __init__(self, nodes=(), replicas: int = 100):
+        self.replicas = replicas
+        self._points = []  # Sorted (hash, node)
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        for i in range(self.replicas):
+            bisect.insort(self._points, (_hash(f"{node}#{i}"), node))
+
+    def remove(self, node: str):
+        self._points = [point for point in self._points if point[1] != node]
+
+    def node_for(self, key: str) -> str:
+        """Node that owns a key, None if the ring is empty"""
+        if not self._points:
+            return None
+        index = bisect.bisect_left(self._points, (_hash(key), ''))
+        return self._points[index % len(self._points)][1]
+
+    def assign(self, keys) -> dict:
+        """
+        Group keys by owning node
+        Returns:
+            dict: node -> keys, in the order given; nodes without keys are omitted
+        """
+        assignment = {}
+        for key in keys:
+            assignment.setdefault(self.node_for(key), []).append(key)
+        return assignment
+
+
+def _run_worker(target, worker_name: str, list_ids: list, ready):
+    """
+    Process entry point of every worker. The default action of the
+    profiling signals terminates a process, so they are ignored before the
+    target runs (it installs its own handlers) and only then is the worker
+    reported ready to receive them.
+    """
+    for name in PROFILING_SIGNALS:
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), signal.SIG_IGN)
+    ready.set()
+    target(worker_name, list_ids)
+
+
+class WorkerProcess:
+    """A supervised worker: its lists, current process and restart bookkeeping"""
+
+    def __init__(self, name: str, list_ids: list):
+        self.name = name
+        self.list_ids = list_ids
+        self.process = None
+        self.ready = None  # Set by the process once signals cannot kill it
+        self.started_at = None
+        self.failures = 0
+        self.restart_at = None
+
+
+class Supervisor:
+    """
+    Runs the monitored lists on a set of worker processes.
+
+    Lists are assigned to workers through a HashRing. A worker that exits
+    with an error is restarted on its own, with exponential backoff if it
+    keeps failing, while the others keep running; resize() restarts only
+    the workers whose lists changed. request_resize() is safe to call from
+    a signal handler and takes effect on the next check().
+    """
+
+    def __init__(self, target, list_ids: list, workers: int = 2, restart_backoff: float = 1.0,
+                 max_backoff: float = 300, stable_after: float = 60, start_method: str = 'spawn',
+                 clock=time.monotonic):
+        """
+        Args:
+            target (callable): Module-level function run in each worker as
+                target(worker_name, list_ids)
+            list_ids (list): IDs of every list to monitor
+            workers (int): Number of worker processes
+            restart_backoff (float): Delay before the first restart of a failed worker
+            max_backoff (float): Upper bound for restart delays in seconds
+            stable_after (float): Seconds a worker must run before its failure
+                count is reset
+            start_method (str): multiprocessing start method; spawn keeps the
+                parent's threads and connections out of the workers
+            clock (callable): Monotonic time source, injectable for tests
+        """
+        self.target = target
+        self.list_ids = list(list_ids)
+        self.restart_backoff = restart_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.clock = clock
+        self._context = multiprocessing.get_context(start_method)
+        self.ring = HashRing()
+        self.workers = {}
+        self.restarts = 0
+        self._stopping = False
+        self._requested_size = None
+        for i in range(workers):
+            self.ring.add(self._name(i))
+        self.size = workers
+        metrics.gauge('supervisor_workers_alive', fn=lambda: sum(
+            1 for worker in self.workers.values() if worker.process is not None and worker.process.is_alive()
+        ))
+
+    @staticmethod
+    def _name(index: int) -> str:
+        return f"worker-{index}"
+
+    @staticmethod
+    def index(worker_name: str) -> int:
+        """Position of a worker, e.g. 2 for worker-2"""
+        return int(worker_name.rsplit('-', 1)[1])
+
+    def assignments(self) -> dict:
+        """Worker name -> list IDs under the current ring"""
+        return self.ring.assign(self.list_ids)
+
+    def start(self):
+        """Start one process per worker that has lists assigned"""
+        for name, list_ids in self.assignments().items():
+            worker = WorkerProcess(name, list_ids)
+            self.workers[name] = worker
+            self._spawn(worker)
+
+    def _spawn(self, worker: WorkerProcess):
+        worker.ready = self._context.Event()
+        worker.process = self._context.Process(
+            target=_run_worker, args=(self.target, worker.name, worker.list_ids, worker.ready),
+            name=worker.name, daemon=False
+        )
+        worker.process.start()
+        worker.started_at = self.clock()
+        worker.restart_at = None
+        logger.info(f"Started {worker.name} (pid {worker.process.pid}) for lists {', '.join(worker.list_ids)}")
+
+    def check(self) -> list:
+        """
+        One supervision pass: schedule restarts for workers that failed and
+        start those whose backoff has passed
+        Returns:
+            list: Names of the workers restarted in this pass
+        """
+        requested, self._requested_size = self._requested_size, None
+        if requested is not None and requested != self.size and not self._stopping:
+            self.resize(requested)
+        now = self.clock()
+        restarted = []
+        for worker in self.workers.values():
+            process = worker.process
+            if process is None or self._stopping:
+                continue
+            if process.is_alive():
+                if worker.failures and now - worker.started_at >= self.stable_after:
+                    worker.failures = 0
+                continue
+            if process.exitcode == 0:
+                continue  # Finished on its own; nothing to recover
+            if worker.restart_at is None:
+                worker.failures += 1
+                delay = min(self.restart_backoff * 2 ** (worker.failures - 1), self.max_backoff)
+                worker.restart_at = now + delay
+                metrics.counter('supervisor_worker_failures_total').inc()
+                logger.error(f"{worker.name} exited with code {process.exitcode}; restarting in {delay:.1f}s")
+            if now >= worker.restart_at:
+                self._spawn(worker)
+                self.restarts += 1
+                restarted.append(worker.name)
+        return restarted
+
+    def resize(self, workers: int) -> list:
+        """
+        Change the number of workers, moving as few lists as possible
+        Returns:
+            list: Names of the workers started, restarted or stopped
+        """
+        for i in range(self.size, workers):
+            self.ring.add(self._name(i))
+        for i in range(workers, self.size):
+            self.ring.remove(self._name(i))
+        self.size = workers
+
+        assignments = self.assignments()
+        changed = []
+        for name in list(self.workers):
+            if name not in assignments:
+                self._terminate(self.workers.pop(name))
+                changed.append(name)
+        for name, list_ids in assignments.items():
+            worker = self.workers.get(name)
+            if worker is not None and worker.list_ids == list_ids:
+                continue
+            if worker is not None:
+                self._terminate(worker)
+            worker = self.workers[name] = WorkerProcess(name, list_ids)
+            self._spawn(worker)
+            changed.append(name)
+        logger.info(f"Resized to {workers} workers; restarted {', '.join(changed) or 'none'}")
+        return changed
+
+    @property
+    def target_size(self) -> int:
+        """Number of workers once any requested resize is applied"""
+        return self.size if self._requested_size is None else self._requested_size
+
+    def request_resize(self, workers: int):
+        """Resize to the given number of workers (at least one) on the next check()"""
+        self._requested_size = max(workers, 1)
+
+    def signal_workers(self, signum: int) -> list:
+        """
+        Send a signal to every running worker, e.g. to toggle their profilers.
+        Workers still starting up are skipped until they report ready.
+        Returns:
+            list: Names of the workers signalled
+        """
+        signalled = []
+        for worker in self.workers.values():
+            if worker.process is not None and worker.process.is_alive() and worker.ready.is_set():
+                os.kill(worker.process.pid, signum)
+                signalled.append(worker.name)
+        return signalled
+
+    def _terminate(self, worker: WorkerProcess, timeout: float = 10):
+        process = worker.process
+        if process is None or not process.is_alive():
+            return
+        process.terminate()
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def run(self, poll_interval: float = 1.0):
+        """Start the workers and supervise them until interrupted"""
+        self.start()
+        try:
+            while any(worker.process.is_alive() or worker.process.exitcode != 0
+                      for worker in self.workers.values()):
+                self.check()
+                time.sleep(poll_interval)
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 10):
+        """Terminate every worker, letting each save its state first"""
+        self._stopping = True
+        for worker in self.workers.values():
+            self._terminate(worker, timeout)
@@ -0,0 +1,6 @@
+import re
+
+# Patterns shared by the modules that look at tweet text
+URL_PATTERN = re.compile(r'https?://\S+')
+MENTION_PATTERN = re.compile(r'@\w+')
+WHITESPACE = re.compile(r'\s+')
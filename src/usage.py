@@ -0,0 +1,183 @@
+import threading
+from collections import deque
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import metrics
+from src.prompt import estimate_tokens
+
+# USD per million tokens: (input, cached input, output). Models missing here
+# are counted in tokens but not costed.
+PRICES = {
+    'gpt-3.5-turbo': (0.50, 0.50, 1.50),
+    'gpt-4o-mini': (0.15, 0.075, 0.60),
+    'gpt-4o': (2.50, 1.25, 10.00),
+    'gpt-4': (30.00, 30.00, 60.00),
+}
+
+
+def _empty_totals() -> dict:
+    return {'requests': 0, 'replies': 0, 'prompt_tokens': 0, 'cached_tokens': 0,
+            'completion_tokens': 0, 'cost': 0.0, 'estimated_requests': 0}
+
+
+def _per_reply(totals: dict) -> dict:
+    replies = totals['replies'] or 1
+    return {
+        **totals,
+        'cost': round(totals['cost'], 6),
+        'cost_per_reply': round(totals['cost'] / replies, 6),
+        'prompt_tokens_per_reply': round(totals['prompt_tokens'] / replies, 1),
+        'completion_tokens_per_reply': round(totals['completion_tokens'] / replies, 1),
+    }
+
+
+def usage_counts(usage) -> tuple:
+    """
+    Read the token counts of an API usage object
+    Returns:
+        tuple: (prompt_tokens, completion_tokens, cached_tokens), or None if
+            the object carries no counts
+    """
+    prompt = getattr(usage, 'prompt_tokens', None)
+    completion = getattr(usage, 'completion_tokens', None)
+    if not isinstance(prompt, int) or not isinstance(completion, int):
+        return None
+    cached = getattr(getattr(usage, 'prompt_tokens_details', None), 'cached_tokens', 0)
+    return prompt, completion, cached if isinstance(cached, int) else 0
+
+
+class UsageTracker:
+    """
+    Token usage and cost of the OpenAI requests, in total, per model and
+    per monitoring cycle.
+
+    Requests report the usage returned by the API; streams cut short at the
+    character limit never receive it, so their tokens are estimated from
+    the text and counted as estimated. Both requests of a hedged attempt
+    are billed and counted, but only the reply that is used counts as one.
+    """
+
+    def __init__(self, prices: dict = PRICES, history: int = 100):
+        """
+        Args:
+            prices (dict): Model -> USD per million (input, cached input, output) tokens
+            history (int): Completed cycles kept for the report
+        """
+        self.prices = prices
+        self.totals = _empty_totals()
+        self.models = {}
+        self.cycles = deque(maxlen=history)
+        self._cycle = _empty_totals()
+        self._lock = threading.Lock()
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+        price = self.prices.get(model)
+        if price is None:
+            # Dated snapshots such as gpt-4o-mini-2024-07-18 cost the same as their family
+            family = max((name for name in self.prices if model.startswith(name)), key=len, default=None)
+            price = self.prices.get(family)
+        if price is None:
+            return 0.0
+        uncached = prompt_tokens - cached_tokens
+        return (uncached * price[0] + cached_tokens * price[1] + completion_tokens * price[2]) / 1_000_000
+
+    def record(self, model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0,
+               replies: int = 1, estimated: bool = False) -> float:
+        """
+        Count one completion request
+        Args:
+            model (str): Model that answered
+            replies (int): Replies the request produced
+            estimated (bool): Whether the token counts are estimates
+        Returns:
+            float: Cost of the request in USD
+        """
+        cost = self.cost(model, prompt_tokens, completion_tokens, cached_tokens)
+        with self._lock:
+            for totals in (self.totals, self._cycle, self.models.setdefault(model, _empty_totals())):
+                totals['requests'] += 1
+                totals['replies'] += replies
+                totals['prompt_tokens'] += prompt_tokens
+                totals['cached_tokens'] += cached_tokens
+                totals['completion_tokens'] += completion_tokens
+                totals['cost'] += cost
+                totals['estimated_requests'] += estimated
+        metrics.counter('llm_tokens_total', model=model, kind='prompt').inc(prompt_tokens - cached_tokens)
+        metrics.counter('llm_tokens_total', model=model, kind='cached').inc(cached_tokens)
+        metrics.counter('llm_tokens_total', model=model, kind='completion').inc(completion_tokens)
+        metrics.counter('llm_cost_usd_total', model=model).inc(cost)
+        return cost
+
+    def record_response(self, model: str, usage, messages: list, reply: str, replies: int = 1) -> float:
+        """
+        Count a request from the usage the API returned, estimating it from
+        the messages and reply when there is none
+        Returns:
+            float: Cost of the request in USD
+        """
+        counts = usage_counts(usage)
+        if counts is None:
+            prompt = sum(estimate_tokens(message['content']) for message in messages)
+            return self.record(model, prompt, estimate_tokens(reply or ''), replies=replies, estimated=True)
+        prompt, completion, cached = counts
+        return self.record(model, prompt, completion, cached, replies=replies)
+
+    def add_replies(self, model: str, replies: int = 1):
+        """Count replies whose requests were recorded with replies=0, e.g. the winner of a hedge"""
+        with self._lock:
+            for totals in (self.totals, self._cycle, self.models.setdefault(model, _empty_totals())):
+                totals['replies'] += replies
+
+    def end_cycle(self) -> dict:
+        """
+        Close the current monitoring cycle
+        Returns:
+            dict: The cycle's totals with per-reply figures
+        """
+        with self._lock:
+            cycle, self._cycle = self._cycle, _empty_totals()
+            if cycle['requests']:
+                self.cycles.append(cycle)
+        return _per_reply(cycle)
+
+    def report(self) -> dict:
+        """
+        Aggregate usage since start or the last reset
+        Returns:
+            dict: Totals with per-reply figures, the same per model, and the
+                mean and maximum cost of the recent cycles that made requests
+        """
+        with self._lock:
+            cycles = list(self.cycles)
+            report = _per_reply(dict(self.totals))
+            report['models'] = {model: _per_reply(dict(totals)) for model, totals in self.models.items()}
+        report['cycles'] = len(cycles)
+        report['cost_per_cycle'] = round(sum(c['cost'] for c in cycles) / len(cycles), 6) if cycles else 0.0
+        report['max_cycle_cost'] = round(max((c['cost'] for c in cycles), default=0.0), 6)
+        return report
+
+    def format_report(self) -> str:
+        report = self.report()
+        lines = [
+            f"LLM usage: {report['requests']} requests, {report['replies']} replies, ${report['cost']:.4f} "
+            f"(${report['cost_per_reply']:.6f} per reply, ${report['cost_per_cycle']:.6f} per cycle)",
+            f"  tokens per reply: {report['prompt_tokens_per_reply']} prompt "
+            f"({report['cached_tokens']} cached in total), {report['completion_tokens_per_reply']} completion",
+        ]
+        for model, totals in sorted(report['models'].items()):
+            lines.append(f"  {model}: {totals['requests']} requests, ${totals['cost']:.4f}, "
+                         f"{totals['estimated_requests']} estimated")
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self.totals = _empty_totals()
+            self.models = {}
+            self.cycles.clear()
+            self._cycle = _empty_totals()
+
+
+# Shared by every request of the process, like the metrics registry
+usage = UsageTracker()
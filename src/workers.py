@@ -0,0 +1,179 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm import generate_response
+from src.prompt import reply_char_limit
+from src.logger import log_context, setup_logger
+from src.metrics import metrics
+
+logger = setup_logger('twitter_bot')
+
+STAGES = ('generate', 'post')
+
+
+class ReplyJob:
+    """A tweet waiting for its reply, with the time it was queued and its deadline"""
+
+    def __init__(self, tweet_id: int, user_id: str, user_handle: str, tweet_text: str,
+                 enqueued_at: float, deadline: float):
+        self.tweet_id = tweet_id
+        self.user_id = user_id
+        self.user_handle = user_handle
+        self.tweet_text = tweet_text
+        self.enqueued_at = enqueued_at
+        self.deadline = deadline
+        self.response = None
+        self.stage_entered = enqueued_at
+
+
+class ReplyWorkerPool:
+    """
+    Thread pools for the two slow steps of a reply: generating it with the
+    LLM and posting it with create_tweet.
+
+    At most queue_size jobs are admitted at once; submit() blocks beyond
+    that, so a burst is absorbed at the pace the pools can sustain instead
+    of piling up in memory. A job still waiting when its deadline passes is
+    dropped rather than answered late, and a reply's quota charge is
+    refunded if posting it fails.
+    """
+
+    def __init__(self, bot, generate_concurrency: int = 4, post_concurrency: int = 2,
+                 queue_size: int = 50, max_job_age: float = 300, clock=time.monotonic):
+        """
+        Args:
+            bot (TwitterBot): Bot providing the Twitter client, reply cache and quota
+            generate_concurrency (int): Concurrent LLM calls
+            post_concurrency (int): Concurrent create_tweet calls
+            queue_size (int): Jobs admitted but not finished before submit() blocks
+            max_job_age (float): Default seconds from submission to deadline
+            clock (callable): Monotonic time source, injectable for tests
+        """
+        self.bot = bot
+        self.max_job_age = max_job_age
+        self.clock = clock
+        self._executors = {
+            'generate': ThreadPoolExecutor(max_workers=generate_concurrency, thread_name_prefix='reply_generate'),
+            'post': ThreadPoolExecutor(max_workers=post_concurrency, thread_name_prefix='reply_post'),
+        }
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._lock = threading.Lock()
+        self.depth = dict.fromkeys(STAGES, 0)
+        self.completed = 0
+        self.expired = 0
+        self.failed = 0
+        for stage in STAGES:
+            metrics.gauge('reply_queue_depth', fn=lambda stage=stage: self.depth[stage], stage=stage)
+
+    def submit(self, tweet_id: int, user_id: str, user_handle: str, tweet_text: str,
+               deadline: float = None) -> Future:
+        """
+        Queue a reply job, blocking while the pool is full
+        Args:
+            deadline (float): Clock time after which the job is dropped;
+                defaults to max_job_age from now
+        Returns:
+            Future: Resolves to True once the reply is posted, False if it was
+                dropped or failed
+        """
+        self._slots.acquire()
+        now = self.clock()
+        job = ReplyJob(tweet_id, user_id, user_handle, tweet_text, now,
+                       deadline if deadline is not None else now + self.max_job_age)
+        future = Future()
+        self._enter(job, 'generate')
+        self._executors['generate'].submit(self._generate, job, future)
+        return future
+
+    def run(self, jobs: list) -> list:
+        """
+        Reply to a batch of jobs and wait for all of them
+        Args:
+            jobs (list): (tweet_id, user_id, user_handle, tweet_text) tuples
+        Returns:
+            list: IDs of the tweets that were replied to
+        """
+        futures = [(job[0], self.submit(*job)) for job in jobs]
+        return [tweet_id for tweet_id, future in futures if future.result()]
+
+    def _enter(self, job: ReplyJob, stage: str):
+        job.stage_entered = self.clock()
+        with self._lock:
+            self.depth[stage] += 1
+
+    def _start(self, job: ReplyJob, stage: str) -> bool:
+        """Leave the stage's queue; returns False if the job missed its deadline"""
+        now = self.clock()
+        with self._lock:
+            self.depth[stage] -= 1
+        metrics.histogram('reply_job_wait_seconds', stage=stage).observe(now - job.stage_entered)
+        if now > job.deadline:
+            metrics.counter('reply_jobs_expired_total', stage=stage).inc()
+            logger.info(f"Dropping reply to tweet {job.tweet_id}: deadline passed {now - job.deadline:.1f}s ago in the {stage} queue")
+            return False
+        return True
+
+    def _finish(self, job: ReplyJob, future: Future, posted: bool, expired: bool = False):
+        with self._lock:
+            if posted:
+                self.completed += 1
+            elif expired:
+                self.expired += 1
+            else:
+                self.failed += 1
+        self._slots.release()
+        future.set_result(posted)
+
+    def _generate(self, job: ReplyJob, future: Future):
+        with log_context(job.tweet_id):
+            if not self._start(job, 'generate'):
+                self._finish(job, future, False, expired=True)
+                return
+            try:
+                with metrics.time('generate_response'):
+                    job.response = generate_response(
+                        job.tweet_text, stream=self.bot.stream_replies, cache=self.bot.reply_cache,
+                        char_limit=reply_char_limit(job.user_handle)
+                    )
+            except Exception as e:
+                logger.error(f"Error generating reply for tweet {job.tweet_id}: {e}", exc_info=True)
+                self._finish(job, future, False)
+                return
+            if job.response is None:
+                logger.info(f"Skipping reply to tweet {job.tweet_id}: no response was generated")
+                self._finish(job, future, False)
+                return
+            self._enter(job, 'post')
+            self._executors['post'].submit(self._post, job, future)
+
+    def _post(self, job: ReplyJob, future: Future):
+        with log_context(job.tweet_id):
+            if not self._start(job, 'post'):
+                self._finish(job, future, False, expired=True)
+                return
+            posted = False
+            try:
+                # Charges the quota atomically, so concurrent post workers
+                # cannot overshoot a limit
+                posted = self.bot._post_within_quota(job.tweet_id, job.user_id, job.user_handle, job.response)
+            finally:
+                if posted:
+                    logger.info(f"Successfully replied to @{job.user_handle}'s tweet: {job.tweet_text[:50]}...")
+                self._finish(job, future, posted)
+
+    def stats(self) -> dict:
+        """Queue depths, job outcomes and mean wait per stage"""
+        stats = {f"{stage}_depth": self.depth[stage] for stage in STAGES}
+        for stage in STAGES:
+            histogram = metrics.histogram('reply_job_wait_seconds', stage=stage)
+            stats[f"{stage}_wait_mean"] = histogram.sum / histogram.count if histogram.count else 0.0
+        stats.update(completed=self.completed, expired=self.expired, failed=self.failed)
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait)
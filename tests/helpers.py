@@ -0,0 +1,19 @@
+"""Test doubles shared by the test modules"""
+from unittest.mock import Mock
+
+
+class FakeClock:
+    """Manually advanced time source"""
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def create_mock_user(user_id, username):
+    """Create a mock user as returned in response includes or user lookups"""
+    user = Mock()
+    user.id = user_id
+    user.username = username
+    return user
@@ -0,0 +1,70 @@
+import sys
+import os
+import json
+import urllib.request
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeOpenAIServer, FakeTwitterServer
+from benchmarks.load_test import FAKE_CREDENTIALS, compare, run_load_test
+from benchmarks.records import run_records_benchmark
+from benchmarks.startup import run_startup_benchmark
+
+def test_fake_twitter_rate_limits_endpoint():
+    """Requests beyond the configured window limit receive a 429"""
+    with FakeTwitterServer(arrival_rate=0, rate_limits={'GET /2/users/:id': 1}) as twitter:
+        url = f"{twitter.url}/2/users/1001"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers['x-rate-limit-remaining'] == '0'
+            assert json.load(response)['data']['username'] == 'ada_builds'
+        try:
+            urllib.request.urlopen(url)
+            assert False, "expected a 429"
+        except urllib.error.HTTPError as e:
+            assert e.code == 429
+    assert twitter.rate_limited == 1
+
+def test_fake_openai_batch_reply():
+    """JSON-mode requests get one reply per numbered tweet"""
+    with FakeOpenAIServer() as openai_server:
+        request = urllib.request.Request(
+            f"{openai_server.url}/v1/chat/completions",
+            data=json.dumps({
+                'model': 'gpt-3.5-turbo',
+                'response_format': {'type': 'json_object'},
+                'messages': [{'role': 'user', 'content': 'Reply:\n1. first\n2. second'}],
+            }).encode(),
+            headers={'Content-Type': 'application/json'},
+        )
+        with urllib.request.urlopen(request) as response:
+            content = json.load(response)['choices'][0]['message']['content']
+    assert [entry['id'] for entry in json.loads(content)['replies']] == [1, 2]
+
+def test_load_test_reports_end_to_end_metrics():
+    """A short offline run replies to list tweets and reports its metrics"""
+    report = run_load_test(mode='async', duration=1, interval=0.5, arrival_rate=5,
+                           twitter_latency=0, openai_latency=0.01, token_delay=0)
+    assert report['replies'] > 0
+    assert report['replies'] == report['twitter_calls']['POST /2/tweets']
+    assert report['api_calls_per_reply'] >= 1
+    assert report['reply_latency_p50'] > 0
+    assert not any(name in os.environ for name in FAKE_CREDENTIALS)  # Credentials do not leak
+
+def test_compare_reports_relative_change():
+    """Numeric metrics are compared against the baseline"""
+    table = compare({'replies': 20, 'mode': 'async'}, {'replies': 10, 'mode': 'sync'})
+    assert 'replies' in table and '+100.0%' in table
+    assert 'mode' not in table
+
+def test_startup_benchmark_reports_lazy_startup():
+    """Importing the bot creates no log files and constructing it skips the OpenAI SDK"""
+    report = run_startup_benchmark(runs=1)
+    assert report['client_shared'] is True
+    assert report['openai_imported'] is False
+    assert report['logs_created_on_import'] is False
+
+def test_records_benchmark_compares_decode_paths():
+    """Records decode faster and keep less memory per tweet than tweepy objects"""
+    report = run_records_benchmark(tweets=500, repeat=1)
+    assert report['tweets'] == 500
+    assert report['records_json_bytes_per_tweet'] < report['tweepy_bytes_per_tweet']
+    assert report['dedup_int_bytes_per_id'] < report['dedup_str_bytes_per_id']
@@ -0,0 +1,142 @@
+import sys
+import os
+from unittest.mock import Mock, patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bot import TwitterBot, create_twitter_client
+from tests.helpers import create_mock_user
+
+def create_mock_tweet(tweet_id, author_id, text="Hello world", referenced_tweets=None):
+    """Create a mock tweet object"""
+    tweet = Mock()
+    tweet.id = tweet_id
+    tweet.author_id = author_id
+    tweet.text = text
+    tweet.referenced_tweets = referenced_tweets
+    return tweet
+
+def test_authors_resolved_from_includes():
+    """Authors expanded in get_list_tweets need no extra user lookups"""
+    bot = TwitterBot()
+    response = Mock(
+        data=[create_mock_tweet(1, 10), create_mock_tweet(2, 20)],
+        includes={'users': [create_mock_user(10, "alice"), create_mock_user(20, "bob")]},
+        meta={}
+    )
+
+    with patch.object(bot.client, 'get_list_tweets', return_value=response) as mock_list, \
+         patch.object(bot.client, 'get_users') as mock_get_users:
+        tweets = bot._fetch_list_tweets("123")
+        usernames = bot._resolve_usernames(str(tweet.author_id) for tweet in tweets)
+
+    assert usernames == {"10": "alice", "20": "bob"}
+    assert mock_list.call_args.kwargs['expansions'] == ['author_id']
+    mock_get_users.assert_not_called()
+
+def test_missing_authors_fetched_in_one_bulk_call():
+    """Authors missing from the cache are fetched together and then cached"""
+    bot = TwitterBot()
+    users = Mock(data=[create_mock_user(10, "alice"), create_mock_user(20, "bob")])
+
+    with patch.object(bot.client, 'get_users', return_value=users) as mock_get_users:
+        usernames = bot._resolve_usernames(["10", "20", "10"])
+        assert bot._resolve_usernames(["10", "20"]) == usernames
+
+    mock_get_users.assert_called_once_with(ids=["10", "20"], user_fields=['username'])
+    assert bot.user_cache.hits == 2
+
+def create_page(tweet_ids, next_token=None):
+    """Create a mock get_list_tweets page, newest tweet first"""
+    meta = {'next_token': next_token} if next_token else {}
+    return Mock(data=[create_mock_tweet(i, 10) for i in tweet_ids], includes={}, meta=meta)
+
+def test_first_poll_reads_only_newest_page():
+    """Without a high-water mark only the newest page is fetched"""
+    bot = TwitterBot()
+
+    with patch.object(bot.client, 'get_list_tweets', return_value=create_page([5, 4], "next")) as mock_list:
+        tweets = bot._fetch_list_tweets("123")
+    bot._advance_high_water()
+
+    assert [tweet.id for tweet in tweets] == [5, 4]
+    assert mock_list.call_count == 1
+    assert mock_list.call_args.kwargs['max_results'] == 100
+    assert bot.list_high_water["123"] == 5
+
+def test_poll_walks_pages_until_seen_tweet():
+    """Later polls page through new tweets and stop at the high-water mark"""
+    bot = TwitterBot()
+    bot.list_high_water["123"] = 3
+    pages = [create_page([9, 8], "page2"), create_page([7, 6], "page3"), create_page([5, 3, 2], "page4")]
+
+    with patch.object(bot.client, 'get_list_tweets', side_effect=pages) as mock_list:
+        tweets = bot._fetch_list_tweets("123")
+    bot._advance_high_water()
+
+    assert [tweet.id for tweet in tweets] == [9, 8, 7, 6, 5]
+    assert [call.kwargs['pagination_token'] for call in mock_list.call_args_list] == [None, "page2", "page3"]
+    assert bot.list_high_water["123"] == 9
+
+def test_poll_with_nothing_new_returns_no_tweets():
+    """A poll whose newest tweet was already seen returns nothing and keeps the mark"""
+    bot = TwitterBot()
+    bot.list_high_water["123"] = 9
+
+    with patch.object(bot.client, 'get_list_tweets', return_value=create_page([9, 8], "page2")) as mock_list:
+        assert bot._fetch_list_tweets("123") == []
+
+    assert mock_list.call_count == 1
+    assert bot.list_high_water["123"] == 9
+
+def test_failed_cycle_keeps_high_water_mark():
+    """Tweets of a cycle whose processing raised are fetched and replied to in the next one"""
+    bot = TwitterBot()
+    bot.sleep = lambda seconds: None
+    bot.list_high_water["123"] = 3
+    page = Mock(data=[create_mock_tweet(5, 10)], includes={'users': [create_mock_user(10, "alice")]}, meta={})
+    process = bot._process_tweets
+    calls = []
+
+    def flaky_process(tweets):
+        calls.append([tweet.id for tweet in tweets])
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return process(tweets)
+
+    with patch.object(bot.client, 'get_list_tweets', return_value=page) as mock_list, \
+         patch.object(bot.client, 'create_tweet') as mock_create_tweet, \
+         patch.object(bot, '_process_tweets', side_effect=flaky_process), \
+         patch('src.bot.generate_responses', return_value=["Hi alice"]):
+        bot.monitor_list_tweets("123", max_cycles=1)
+        assert bot.list_high_water["123"] == 3
+        bot.monitor_list_tweets("123", max_cycles=1)
+
+    assert calls == [[5], [5]]
+    assert mock_list.call_args.kwargs['pagination_token'] is None
+    mock_create_tweet.assert_called_once_with(text="@alice Hi alice", in_reply_to_tweet_id="5")
+    assert bot.list_high_water["123"] == 5
+
+def test_reply_to_tweets_generates_in_batch():
+    """A cycle's replies are generated together and posted individually"""
+    bot = TwitterBot()
+    jobs = [(1, "10", "alice", "Hello"), (2, "20", "bob", "World")]
+
+    with patch.object(bot.client, 'create_tweet') as mock_create_tweet, \
+         patch('src.bot.generate_responses', return_value=["Hi alice", "Hi bob"]) as mock_generate:
+        replied = bot._reply_to_tweets(jobs)
+
+    assert replied == [1, 2]
+    mock_generate.assert_called_once_with(["Hello", "World"], stream=bot.stream_replies, cache=bot.reply_cache,
+                                          char_limits=[273, 275])  # What "@handle " leaves of 280
+    mock_create_tweet.assert_any_call(text="@bob Hi bob", in_reply_to_tweet_id="2")
+    assert bot.quota.used("10") == 1
+
+def test_bots_share_the_twitter_client():
+    """A bot rebuilt after a crash reuses the client and its connection pool"""
+    first = TwitterBot()
+    second = TwitterBot()
+    assert second.client is first.client
+
+    own_client = create_twitter_client()
+    assert TwitterBot(client=own_client).client is own_client
+    assert own_client is not first.client
@@ -0,0 +1,36 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache import TTLCache
+from tests.helpers import FakeClock
+
+def test_cache_hit_and_miss_counters():
+    """Hits and misses are counted"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("1", "alice")
+    assert cache.get("1") == "alice"
+    assert cache.get("2") is None
+    assert cache.stats() == {'size': 1, 'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+def test_cache_entries_expire():
+    """Entries older than the TTL are treated as misses"""
+    clock = FakeClock(0.0)
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("1", "alice")
+    clock.now = 59
+    assert cache.get("1") == "alice"
+    clock.now = 61
+    assert cache.get("1") is None
+    assert "1" not in cache
+
+def test_cache_evicts_least_recently_used():
+    """The least recently used entry is evicted when the cache is full"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("1", "alice")
+    cache.set("2", "bob")
+    cache.get("1")
+    cache.set("3", "carol")
+    assert "1" in cache
+    assert "2" not in cache
+    assert "3" in cache
@@ -0,0 +1,63 @@
+import sys
+import os
+import threading
+from unittest.mock import Mock, patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bot import TwitterBot
+from src.coordination import Coordinator, SharedReplyQuota
+
+def create_mock_tweet(tweet_id, author_id, text="Hello world"):
+    """Create a mock tweet object"""
+    tweet = Mock()
+    tweet.id = tweet_id
+    tweet.author_id = author_id
+    tweet.text = text
+    tweet.referenced_tweets = None
+    tweet.created_at = None
+    tweet.public_metrics = None
+    return tweet
+
+def test_claim_is_exclusive(tmp_path):
+    """A tweet claimed by one worker is refused to the others, but not to its owner"""
+    path = str(tmp_path / "coordination.db")
+    first, second = Coordinator(path, owner="worker-0"), Coordinator(path, owner="worker-1")
+    assert first.claim("1")
+    assert not second.claim("1")
+    assert first.claim("1")
+    assert second.claim("2")
+
+def test_shared_quota_holds_across_workers(tmp_path):
+    """Concurrent charges from two workers stop at the per-user limit"""
+    path = str(tmp_path / "coordination.db")
+    quotas = [SharedReplyQuota(Coordinator(path, owner=f"worker-{i}"), per_user=3) for i in range(2)]
+    results = []
+    threads = [
+        threading.Thread(target=lambda quota=quota: results.append(quota.try_charge("42")))
+        for quota in quotas for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 3
+    assert quotas[1].used("42") == 3
+
+    quotas[0].refund("42")
+    assert quotas[1].allows("42")
+
+def test_bots_never_answer_the_same_tweet_twice(tmp_path):
+    """Two bots watching lists with a shared author reply to each tweet once"""
+    path = str(tmp_path / "coordination.db")
+    bots = []
+    for i in range(2):
+        coordinator = Coordinator(path, owner=f"worker-{i}")
+        bots.append(TwitterBot(quota=SharedReplyQuota(coordinator), coordinator=coordinator))
+
+    with patch('src.bot.generate_responses', side_effect=lambda texts, **kwargs: ['Reply'] * len(texts)), \
+         patch.object(bots[0].client, 'create_tweet') as mock_create:
+        for bot in bots:
+            bot.user_cache.set("10", "alice")
+            bot._process_tweets([create_mock_tweet(1, 10), create_mock_tweet(2, 10)])
+
+    assert sorted(call.kwargs['in_reply_to_tweet_id'] for call in mock_create.call_args_list) == ["1", "2"]
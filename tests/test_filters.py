@@ -0,0 +1,89 @@
+import sys
+import os
+import time
+from unittest.mock import Mock, patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bot import TwitterBot
+import pytest
+
+from src.filters import TweetFilter
+
+def create_tweet(text, author_id=10, lang='en', tweet_id=1):
+    tweet = Mock()
+    tweet.id = tweet_id
+    tweet.author_id = author_id
+    tweet.text = text
+    tweet.lang = lang
+    tweet.referenced_tweets = None
+    return tweet
+
+def test_rules_name_the_rejecting_rule():
+    tweet_filter = TweetFilter(
+        keywords=['giveaway', 'promo code'], patterns={'crypto': r'\bto the moon\b'},
+        languages=['en'], min_length=10, deny_authors=[66]
+    )
+    assert tweet_filter.check(create_tweet("Huge GIVEAWAY this weekend, enter now")) == 'keyword:giveaway'
+    assert tweet_filter.check(create_tweet("Use promo code SAVE10 at checkout")) == 'keyword:promo code'
+    assert tweet_filter.check(create_tweet("This coin is going to the moon")) == 'pattern:crypto'
+    assert tweet_filter.check(create_tweet("Bonjour à tous, belle journée", lang='fr')) == 'language'
+    assert tweet_filter.check(create_tweet("https://t.co/abc @someone")) == 'link_only'
+    assert tweet_filter.check(create_tweet("gm @friend")) == 'too_short'
+    assert tweet_filter.check(create_tweet("Thoughts on structured concurrency?", author_id=66)) == 'author:deny'
+    assert tweet_filter.check(create_tweet("Thoughts on structured concurrency?")) is None
+    # Keywords match whole words only
+    assert tweet_filter.check(create_tweet("Our giveaways policy changed in the docs")) is None
+
+def test_allowed_authors_skip_content_rules():
+    tweet_filter = TweetFilter(keywords=['giveaway'], min_length=10, allow_authors=['7'])
+    assert tweet_filter.check(create_tweet("giveaway", author_id=7)) is None
+
+def test_filter_counts_hits_per_rule():
+    tweet_filter = TweetFilter.default()
+    tweets = [
+        create_tweet("Airdrop live now, connect your wallet today"),
+        create_tweet("Another airdrop for early supporters!!"),
+        create_tweet("https://t.co/xyz"),
+        create_tweet("What do you think about property-based testing?"),
+    ]
+    passed = tweet_filter.filter(tweets)
+    assert passed == tweets[3:]
+    assert tweet_filter.stats() == {'keyword:airdrop': 2, 'link_only': 1}
+
+def test_filter_is_cheap_per_tweet():
+    tweet_filter = TweetFilter.default()
+    tweets = [create_tweet(f"Just shipped release {i} of our scheduler, feedback welcome!") for i in range(2000)]
+    start = time.perf_counter()
+    tweet_filter.filter(tweets)
+    assert (time.perf_counter() - start) / len(tweets) < 100e-6
+
+def test_bot_filters_before_resolving_authors():
+    """Rejected tweets never reach author lookup or generation"""
+    bot = TwitterBot(tweet_filter=TweetFilter(keywords=['giveaway']))
+    tweets = [create_tweet("Giveaway time, follow to enter", tweet_id=1), create_tweet("A real question about caching", tweet_id=2)]
+    assert [tweet.id for tweet in bot._filter_tweets(tweets)] == [2]
+    assert bot.tweet_filter.hits['keyword:giveaway'] == 1
+
+def test_bot_filters_nothing_unless_configured():
+    """Without BOT_FILTER_CONFIG every tweet passes; 'default' opts into the built-in rules"""
+    tweets = [create_tweet("Bonjour à tous", lang='fr'), create_tweet("Airdrop live now, connect your wallet"),
+              create_tweet("https://t.co/xyz")]
+    with patch.dict(os.environ, {'BOT_FILTER_CONFIG': ''}):
+        assert TwitterBot().tweet_filter.filter(tweets) == tweets
+    with patch.dict(os.environ, {'BOT_FILTER_CONFIG': 'default'}):
+        assert TwitterBot().tweet_filter.filter(tweets) == []
+
+def test_patterns_that_cannot_be_combined_are_rejected():
+    """Rules are checked on their own before they join the alternation"""
+    with pytest.raises(ValueError, match='backreference'):
+        TweetFilter(patterns={'first': r'spam', 'repeat': r'(\w+) \1'})
+    with pytest.raises(ValueError, match='inline flags'):
+        TweetFilter(patterns={'first': r'spam', 'flags': r'(?i)crypto'})
+    with pytest.raises(ValueError, match='group name'):
+        TweetFilter(patterns={'a': r'(?P<word>x)', 'b': r'(?P<word>y)'})
+
+    tweet_filter = TweetFilter(patterns={'first': r'spam', 'repeat': r'\b(?P<word>\w+) (?P=word)\b',
+                                         'scoped': r'(?-i:NFT)'})
+    assert tweet_filter.check(create_tweet("buy buy now")) == 'pattern:repeat'
+    assert tweet_filter.check(create_tweet("New NFT drop")) == 'pattern:scoped'
+    assert tweet_filter.check(create_tweet("what is an nft anyway")) is None
@@ -1,10 +1,13 @@
+import json
 import sys
 import os
+import threading
+import time
 import pytest
 from unittest.mock import patch, Mock
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.llm import generate_response
+from src.llm import generate_response, generate_responses, stream_response
 
 def test_generate_response_no_api_key():
     """Test response generation when API key is missing"""
@@ -55,3 +58,250 @@ def test_generate_response_all_retries_failed():
         mock_client.chat.completions.create.side_effect = [Exception("API Error")] * 3
         response = generate_response("Test tweet", max_retries=2)
         assert "[Test Reply]" in response
+
+class FakeStream:
+    """Iterable of streamed completion chunks that records whether it was closed"""
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self.pieces:
+            self.consumed += 1
+            yield Mock(choices=[Mock(delta=Mock(content=piece))])
+
+    def close(self):
+        self.closed = True
+
+def test_stream_response_assembles_reply():
+    """Streamed chunks are joined into the reply"""
+    stream = FakeStream(["Great ", "point! ", "Thanks."])
+    with patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.return_value = stream
+        reply, stats = stream_response("Test tweet")
+    assert reply == "Great point! Thanks."
+    assert mock_client.chat.completions.create.call_args.kwargs['stream'] is True
+    assert stats['chunks'] == 3
+    assert not stats['stopped_early']
+    assert stats['time_to_first_token'] is not None
+
+def test_stream_response_stops_at_limit():
+    """The stream is cancelled once the limit is passed and cut at a sentence"""
+    sentence = "This is a complete sentence. "
+    stream = FakeStream([sentence] * 20)
+    with patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.return_value = stream
+        reply, stats = stream_response("Test tweet")
+    assert len(reply) <= 280
+    assert reply.endswith("sentence.")
+    assert stats['stopped_early']
+    assert stream.consumed < 20
+    assert stream.closed
+
+def test_generate_response_streaming():
+    """generate_response uses the streaming path when asked"""
+    with patch('src.llm.OPENAI_API_KEY', 'test_key'), \
+         patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.return_value = FakeStream(["Streamed reply"])
+        assert generate_response("Test tweet", stream=True) == "Streamed reply"
+
+def create_completion(content):
+    """Create a mock non-streamed completion"""
+    response = Mock()
+    response.choices = [Mock(message=Mock(content=content))]
+    return response
+
+def test_generate_responses_single_request():
+    """Several tweets are answered by one completion call"""
+    content = json.dumps({"replies": [{"id": 1, "reply": "First"}, {"id": 2, "reply": "Second"}, {"id": 3, "reply": "Third"}]})
+    with patch('src.llm.OPENAI_API_KEY', 'test_key'), \
+         patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.return_value = create_completion(content)
+        replies = generate_responses(["a", "b", "c"])
+    assert replies == ["First", "Second", "Third"]
+    assert mock_client.chat.completions.create.call_count == 1
+    assert mock_client.chat.completions.create.call_args.kwargs['response_format'] == {"type": "json_object"}
+
+def test_generate_responses_falls_back_for_missing_items():
+    """Tweets missing from the batch result are generated individually"""
+    content = json.dumps({"replies": [{"id": 2, "reply": "Second"}, {"id": 7, "reply": "Unknown"}]})
+    with patch('src.llm.OPENAI_API_KEY', 'test_key'), \
+         patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.side_effect = [create_completion(content), create_completion("Single")]
+        replies = generate_responses(["a", "b"])
+    assert replies == ["Single", "Second"]
+
+def test_generate_responses_falls_back_on_invalid_json():
+    """Unparseable batch output falls back to one call per tweet"""
+    with patch('src.llm.OPENAI_API_KEY', 'test_key'), \
+         patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.side_effect = [
+            create_completion("not json"), create_completion("One"), create_completion("Two")
+        ]
+        replies = generate_responses(["a", "b"])
+    assert replies == ["One", "Two"]
+
+def test_generate_responses_respects_batch_size():
+    """Tweets are packed into batches of at most batch_size"""
+    batch = json.dumps({"replies": [{"id": 1, "reply": "x"}, {"id": 2, "reply": "y"}]})
+    with patch('src.llm.OPENAI_API_KEY', 'test_key'), \
+         patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.return_value = create_completion(batch)
+        replies = generate_responses(["a", "b", "c", "d"], batch_size=2)
+    assert replies == ["x", "y", "x", "y"]
+    assert mock_client.chat.completions.create.call_count == 2
+
+def test_slow_request_is_hedged():
+    """A request running past the observed p95 gets a second copy; the fast one wins"""
+    from src import llm
+    from src.metrics import metrics
+
+    for _ in range(llm.HEDGE_MIN_SAMPLES):
+        metrics.histogram('llm_request_seconds', model='hedge-test').observe(0.05)
+    calls = []
+
+    def call(cancel):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            time.sleep(1.0)
+            return "slow"
+        return "fast"
+
+    with patch('src.llm.HEDGE_MIN_DELAY', 0.05):
+        start = time.monotonic()
+        assert llm._call_with_hedge(call, 'hedge-test', timeout=5) == "fast"
+    assert time.monotonic() - start < 0.5
+    assert len(calls) == 2
+
+class SlowStream(FakeStream):
+    """FakeStream that waits between chunks"""
+    def __init__(self, pieces, delay):
+        super().__init__(pieces)
+        self.delay = delay
+        self.finished = threading.Event()
+
+    def __iter__(self):
+        for chunk in super().__iter__():
+            time.sleep(self.delay)
+            yield chunk
+
+    def close(self):
+        super().close()
+        self.finished.set()
+
+def test_losing_hedged_stream_stops_consuming():
+    """Once the hedged copy wins, the slow stream stops reading chunks and is closed"""
+    from src import llm
+    from src.metrics import metrics
+
+    for _ in range(llm.HEDGE_MIN_SAMPLES):
+        metrics.histogram('llm_request_seconds', model='hedge-cancel').observe(0.05)
+    slow = SlowStream(["word "] * 50, delay=0.05)
+    streams = [slow, FakeStream(["Fast reply."])]
+
+    with patch('src.llm.HEDGE_MIN_DELAY', 0.1), \
+         patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.side_effect = lambda **kwargs: streams.pop(0)
+        reply, _ = llm._call_with_hedge(
+            lambda cancel: stream_response("Test tweet", model='hedge-cancel', cancel=cancel), 'hedge-cancel'
+        )
+        assert reply == "Fast reply."
+        assert slow.finished.wait(1)
+    assert slow.closed
+    assert slow.consumed < 10
+
+def test_timed_out_request_is_cancelled():
+    """An attempt that runs past the timeout is told to stop"""
+    from src import llm
+    from src.metrics import metrics
+
+    for _ in range(llm.HEDGE_MIN_SAMPLES):
+        metrics.histogram('llm_request_seconds', model='hedge-timeout').observe(0.05)
+    events = []
+
+    def call(cancel):
+        events.append(cancel)
+        cancel.wait(2)
+        return "late"
+
+    with patch('src.llm.HEDGE_MIN_DELAY', 0.05), pytest.raises(TimeoutError):
+        llm._call_with_hedge(call, 'hedge-timeout', timeout=0.2)
+    assert len(events) == 2
+    assert all(event.is_set() for event in events)
+
+def test_circuit_breaker_routes_to_fallback_model():
+    """After the breaker opens, requests go to the fallback model without a backoff sleep"""
+    from src.llm import CircuitBreaker
+
+    def create(**kwargs):
+        if kwargs['model'] == 'primary-model':
+            raise Exception("503 overloaded")
+        return Mock(choices=[Mock(message=Mock(content="From fallback"))])
+
+    with patch('src.llm.OPENAI_API_KEY', 'test_key'), \
+         patch('src.llm.FALLBACK_MODEL', 'fallback-model'), \
+         patch.dict('src.llm.breakers', {'primary-model': CircuitBreaker(failure_threshold=1)}), \
+         patch('src.llm.time.sleep') as mock_sleep, \
+         patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.side_effect = create
+        assert generate_response("Test tweet", model='primary-model', max_retries=2) == "From fallback"
+        # The open breaker sends the next reply straight to the fallback
+        assert generate_response("Another tweet", model='primary-model', max_retries=1) == "From fallback"
+
+    models = [call.kwargs['model'] for call in mock_client.chat.completions.create.call_args_list]
+    assert models == ['primary-model', 'fallback-model', 'fallback-model']
+    assert all(call.kwargs['timeout'] for call in mock_client.chat.completions.create.call_args_list)
+    mock_sleep.assert_not_called()
+
+def test_circuit_breaker_half_open_trial():
+    from src.llm import CircuitBreaker
+
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    now[0] = 31
+    assert breaker.allow()  # One trial request
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+def test_skip_on_failure_returns_none():
+    """With skipping enabled no placeholder reply is produced"""
+    with patch('src.llm.OPENAI_API_KEY', 'test_key'), \
+         patch('src.llm.time.sleep'), \
+         patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.side_effect = Exception("API Error")
+        assert generate_response("Test tweet", max_retries=2, skip_on_failure=True) is None
+
+def test_client_built_once_on_first_use():
+    """The OpenAI client is created lazily and shared by every call"""
+    from src import llm
+    with patch('src.llm.client', None), patch('src.llm.OPENAI_API_KEY', 'test_key'):
+        first = llm.get_client()
+        assert llm.get_client() is first
+
+def test_completion_is_sized_and_accounted():
+    """max_tokens follows the character limit and the API's usage is recorded"""
+    from src.usage import usage
+    mock_response = Mock()
+    mock_response.choices = [Mock(message=Mock(content="Short reply."))]
+    mock_response.usage = Mock(prompt_tokens=120, completion_tokens=4, prompt_tokens_details=Mock(cached_tokens=0))
+    usage.reset()
+
+    with patch('src.llm.OPENAI_API_KEY', 'test_key'), \
+         patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.return_value = mock_response
+        generate_response("Check this out https://t.co/abc", char_limit=100)
+
+    kwargs = mock_client.chat.completions.create.call_args.kwargs
+    assert kwargs['max_tokens'] < 40
+    assert "https://" not in kwargs['messages'][-1]['content']
+    report = usage.report()
+    assert report['requests'] == report['replies'] == 1
+    assert report['prompt_tokens'] == 120 and report['estimated_requests'] == 0
+    usage.reset()
@@ -0,0 +1,84 @@
+import json
+import logging
+import logging.handlers
+import os
+import sys
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logger import (ContextFilter, DebugSamplingFilter, JSONFormatter, SizedTimedRotatingFileHandler,
+                        log_context, setup_logger)
+
+
+def make_record(level=logging.INFO, msg='hello', high_volume=False):
+    record = logging.LogRecord('twitter_bot', level, __file__, 1, msg, None, None)
+    if high_volume:
+        record.high_volume = True
+    return record
+
+
+def test_setup_logger_uses_queue_handler():
+    """Records are handed to the background listener instead of written inline"""
+    logger = setup_logger('test_queue_logger')
+    assert len(logger.handlers) == 1
+    assert isinstance(logger.handlers[0], logging.handlers.QueueHandler)
+    assert setup_logger('test_queue_logger').handlers == logger.handlers
+
+
+def test_log_context_sets_correlation_id():
+    context_filter = ContextFilter()
+    record = make_record()
+    with log_context(12345):
+        context_filter.filter(record)
+    assert record.correlation_id == '12345'
+
+    outside = make_record()
+    context_filter.filter(outside)
+    assert outside.correlation_id is None
+
+
+def test_json_formatter_includes_tweet_id():
+    record = make_record(msg='posted %s')
+    record.args = ('reply',)
+    record.correlation_id = '42'
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry['msg'] == 'posted reply'
+    assert entry['level'] == 'INFO'
+    assert entry['tweet_id'] == '42'
+
+
+def test_debug_sampling_keeps_one_in_n():
+    sampler = DebugSamplingFilter(rate=0.25)
+    kept = sum(sampler.filter(make_record(logging.DEBUG, high_volume=True)) for _ in range(100))
+    assert kept == 25
+    assert all(sampler.filter(make_record(logging.WARNING)) for _ in range(10))
+    assert not DebugSamplingFilter(rate=0).filter(make_record(logging.DEBUG, high_volume=True))
+
+
+def test_debug_sampling_keeps_untagged_debug_records():
+    sampler = DebugSamplingFilter(rate=0.01)
+    assert all(sampler.filter(make_record(logging.DEBUG)) for _ in range(100))
+
+
+def test_rotating_handler_rolls_over_on_size(tmp_path):
+    path = tmp_path / 'bot.log'
+    handler = SizedTimedRotatingFileHandler(str(path), max_bytes=200, when='midnight', backupCount=3)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for i in range(20):
+        handler.emit(make_record(msg=f'line {i:02d} ' + 'x' * 20))
+    handler.close()
+
+    rotated = [name for name in os.listdir(tmp_path) if name.startswith('bot.log.')]
+    assert len(rotated) == 3
+    assert os.path.getsize(path) < 200
+
+
+def test_rotating_handler_formats_each_record_once(tmp_path):
+    handler = SizedTimedRotatingFileHandler(str(tmp_path / 'bot.log'), max_bytes=200, when='midnight')
+    formatter = logging.Formatter('%(message)s')
+    handler.setFormatter(formatter)
+    with patch.object(formatter, 'format', wraps=formatter.format) as format_record:
+        for i in range(5):
+            handler.emit(make_record(msg=f'line {i}'))
+    handler.close()
+    assert format_record.call_count == 5
@@ -0,0 +1,76 @@
+import sys
+import os
+from unittest.mock import Mock, patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bot import TwitterBot
+from src.membership import ListMembership
+from src.state import SQLiteStateStore
+from tests.helpers import create_mock_user
+
+def members_page(users, next_token=None):
+    return Mock(data=[create_mock_user(*user) for user in users], meta={'next_token': next_token} if next_token else {})
+
+def test_update_applies_diff_in_place():
+    """Only added, renamed and removed members are reported and recorded"""
+    membership = ListMembership(clock=lambda: 100.0)
+    membership.update("A", {"1": "alice", "2": "bob"})
+    membership.drain_changed()
+
+    diff = membership.update("A", {"1": "alice", "2": "bobby", "3": "carol"})
+    assert diff == {'added': {"2": "bobby", "3": "carol"}, 'removed': []}
+    diff = membership.update("A", {"2": "bobby", "3": "carol"})
+    assert diff == {'added': {}, 'removed': ["1"]}
+    assert membership.drain_changed() == {
+        "A": {'added': {"2": "bobby", "3": "carol"}, 'removed': ["1"], 'synced_at': 100.0}
+    }
+
+def test_users_on_several_lists_stay_until_removed_from_all():
+    """monitored_users merges every list"""
+    membership = ListMembership()
+    membership.update("A", {"1": "alice"})
+    membership.update("B", {"1": "alice", "2": "bob"})
+    membership.update("A", {})
+    assert membership.monitored_users == {"1": "alice", "2": "bob"}
+    assert not membership.is_member("1", "A")
+    membership.update("B", {"2": "bob"})
+    assert "1" not in membership.monitored_users
+
+def test_get_list_members_paginates_and_persists(tmp_path):
+    """The first download walks every page; a restarted bot loads the index instead"""
+    path = str(tmp_path / "state.db")
+    bot = TwitterBot(state_store=SQLiteStateStore(path))
+    pages = [members_page([(1, "alice"), (2, "bob")], "next"), members_page([(3, "carol")])]
+    with patch.object(bot.client, 'get_list_members', side_effect=pages) as mock_members:
+        assert bot.get_list_members("123")
+    assert mock_members.call_count == 2
+    assert bot.monitored_users == {"1": "alice", "2": "bob", "3": "carol"}
+    bot.save_state()
+
+    restarted = TwitterBot(state_store=SQLiteStateStore(path))
+    with patch.object(restarted.client, 'get_list_members') as mock_members:
+        assert restarted.get_list_members("123", max_age=3600)
+        mock_members.assert_not_called()
+        assert restarted._resolve_usernames(["1", "3"]) == {"1": "alice", "3": "carol"}
+    assert restarted.membership.usernames("123") == ["alice", "bob", "carol"]
+
+    with patch.object(restarted.client, 'get_list_members', return_value=members_page([(1, "alice")])):
+        assert restarted.get_list_members("123")
+    restarted.save_state()
+    assert SQLiteStateStore(path).load_list_members()["123"]['members'] == {"1": "alice"}
+
+def test_get_list_members_reports_failure():
+    """An API error leaves the index as it was"""
+    bot = TwitterBot()
+    with patch.object(bot.client, 'get_list_members', side_effect=Exception("boom")):
+        assert bot.get_list_members("123") is False
+    assert bot.monitored_users == {}
+
+def test_unknown_author_marks_list_for_refresh():
+    """A list tweet from someone missing from the index triggers the next refresh"""
+    bot = TwitterBot()
+    bot.membership.update("123", {"1": "alice"})
+    response = Mock(data=[], includes={'users': [create_mock_user(2, "newcomer")]}, meta={})
+    with patch.object(bot.client, 'get_list_tweets', return_value=response):
+        bot._fetch_list_tweets("123")
+    assert bot.membership.due("123", max_age=3600)
@@ -0,0 +1,62 @@
+import sys
+import os
+import urllib.request
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import MetricsRegistry, start_metrics_server
+
+def test_histogram_percentiles():
+    """Percentiles are computed from the recorded samples"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram('stage_latency_seconds', stage='generate_response')
+    for value in range(1, 101):
+        histogram.observe(value / 100)
+    percentiles = histogram.percentiles()
+    assert percentiles[0.5] == 0.51
+    assert percentiles[0.95] == 0.96
+    assert percentiles[0.99] == 1.0
+    assert histogram.count == 100
+
+def test_time_records_stage_latency():
+    """The time() context manager records one sample per block"""
+    registry = MetricsRegistry()
+    with registry.time('create_tweet'):
+        pass
+    assert registry.histogram('stage_latency_seconds', stage='create_tweet').count == 1
+
+def test_prometheus_rendering():
+    """Counters, callback gauges and histograms are exported in text format"""
+    registry = MetricsRegistry()
+    registry.describe('replies_posted_total', 'Replies posted')
+    registry.counter('replies_posted_total').inc(3)
+    registry.gauge('processed_tweets', fn=lambda: 42)
+    registry.histogram('stage_latency_seconds', stage='get_users').observe(0.25)
+    text = registry.render_prometheus()
+    assert '# HELP twitter_bot_replies_posted_total Replies posted' in text
+    assert 'twitter_bot_replies_posted_total 3' in text
+    assert 'twitter_bot_processed_tweets 42' in text
+    assert '# TYPE twitter_bot_stage_latency_seconds summary' in text
+    assert 'twitter_bot_stage_latency_seconds{stage="get_users",quantile="0.95"} 0.25' in text
+    assert 'twitter_bot_stage_latency_seconds_count{stage="get_users"} 1' in text
+
+def test_summary_line():
+    """The summary log line includes counters and latency percentiles"""
+    registry = MetricsRegistry()
+    registry.counter('tweets_fetched_total').inc(5)
+    registry.histogram('stage_latency_seconds', stage='get_list_tweets').observe(0.2)
+    summary = registry.summary()
+    assert 'tweets_fetched_total=5' in summary
+    assert 'stage_latency_seconds[get_list_tweets] n=1 p50=200ms' in summary
+
+def test_metrics_server_serves_registry():
+    """The local endpoint serves the registry at /metrics"""
+    registry = MetricsRegistry()
+    registry.counter('rate_limited_total').inc()
+    server = start_metrics_server(port=0, registry=registry)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics') as response:
+            body = response.read().decode()
+        assert 'twitter_bot_rate_limited_total 1' in body
+    finally:
+        server.shutdown()
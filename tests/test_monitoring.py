@@ -92,11 +92,12 @@ def test_monitoring():
                     print(f"- Original tweets (non-retweets/replies): {len(filtered_tweets)}")
                     print(f"- Successfully processed: {processed_count}")
                     print("\nReply Statistics:")
-                    for user_id, replies in bot.daily_replies.items():
-                        print(f"User {user_id}: {replies['count']} replies today (limit: {bot.max_daily_replies})")
+                    author_ids = {str(tweet.author_id) for tweet in filtered_tweets}
+                    for user_id in sorted(author_ids):
+                        print(f"User {user_id}: {bot.quota.used(user_id)} replies today (limit: {bot.max_daily_replies})")
                     
                     # Verify daily reply limits
-                    assert all(replies['count'] <= bot.max_daily_replies for replies in bot.daily_replies.values()), \
+                    assert all(bot.quota.used(user_id) <= bot.max_daily_replies for user_id in author_ids), \
                         "Daily reply limit exceeded for some users"
                     
                     print("\nAll tests passed successfully!")
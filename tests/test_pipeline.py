@@ -0,0 +1,99 @@
+import sys
+import os
+import time
+import asyncio
+from unittest.mock import Mock, patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bot import TwitterBot
+from src.pipeline import TweetPipeline
+from tests.helpers import create_mock_user
+
+def create_mock_tweet(tweet_id, author_id, text, referenced_tweets=None):
+    """Create a mock tweet object"""
+    tweet = Mock()
+    tweet.id = tweet_id
+    tweet.author_id = author_id
+    tweet.text = text
+    tweet.referenced_tweets = referenced_tweets
+    return tweet
+
+def create_list_response(tweets):
+    """Create a mock get_list_tweets response with the authors expanded"""
+    authors = {tweet.author_id for tweet in tweets}
+    users = [create_mock_user(author_id, f"user{author_id}") for author_id in authors]
+    return Mock(data=tweets, includes={'users': users}, meta={})
+
+def test_pipeline_generates_replies_in_parallel():
+    """Replies to a burst of tweets should take about one LLM latency, not the sum"""
+    bot = TwitterBot()
+    tweets = [create_mock_tweet(i, 100 + i, f"Tweet number {i}") for i in range(1, 6)]
+    tweets.append(create_mock_tweet(6, 106, "RT someone", referenced_tweets=[Mock()]))
+    list_response = create_list_response(tweets)
+
+    def slow_generate(text, **kwargs):
+        time.sleep(0.3)
+        return f"Reply to {text}"
+
+    with patch.object(bot.client, 'get_list_tweets', return_value=list_response), \
+         patch.object(bot.client, 'get_users') as mock_get_users, \
+         patch.object(bot.client, 'create_tweet') as mock_create_tweet, \
+         patch('src.pipeline.generate_response', side_effect=slow_generate):
+        pipeline = TweetPipeline(bot, "123", interval=0, generate_concurrency=5)
+        start = time.monotonic()
+        asyncio.run(pipeline.run(max_cycles=1))
+        elapsed = time.monotonic() - start
+
+    assert mock_create_tweet.call_count == 5
+    mock_get_users.assert_not_called()
+    assert set(bot.processed_tweets) == {str(i) for i in range(1, 6)}
+    assert not pipeline.in_flight
+    assert elapsed < 1.0
+
+def test_pipeline_respects_daily_limit():
+    """Concurrent tweets from one author must not exceed the daily limit"""
+    bot = TwitterBot()
+    tweets = [create_mock_tweet(i, 42, f"Tweet number {i}") for i in range(1, 6)]
+
+    with patch.object(bot.client, 'get_list_tweets', return_value=create_list_response(tweets)), \
+         patch.object(bot.client, 'create_tweet') as mock_create_tweet, \
+         patch('src.pipeline.generate_response', return_value="Reply"):
+        asyncio.run(TweetPipeline(bot, "123", interval=0).run(max_cycles=1))
+
+    assert mock_create_tweet.call_count == bot.max_daily_replies
+    assert bot.quota.used("42") == bot.max_daily_replies
+
+def test_pipeline_skips_processed_tweets():
+    """Tweets already replied to are not fetched into the pipeline again"""
+    bot = TwitterBot()
+    bot.processed_tweets.add("1")
+    tweets = [create_mock_tweet(1, 7, "Old tweet"), create_mock_tweet(2, 7, "New tweet")]
+
+    with patch.object(bot.client, 'get_list_tweets', return_value=create_list_response(tweets)), \
+         patch.object(bot.client, 'create_tweet') as mock_create_tweet, \
+         patch('src.pipeline.generate_response', return_value="Reply"):
+        asyncio.run(TweetPipeline(bot, "123", interval=0).run(max_cycles=2))
+
+    mock_create_tweet.assert_called_once_with(text="@user7 Reply", in_reply_to_tweet_id="2")
+
+def test_pipeline_post_failure_does_not_stop_worker():
+    """A reply that fails to post is logged and the worker goes on to the next one"""
+    bot = TwitterBot()
+    tweets = [create_mock_tweet(i, 100 + i, f"Tweet number {i}") for i in range(1, 4)]
+    post = bot._post_within_quota
+
+    def flaky_post(tweet_id, *args):
+        if tweet_id == 1:
+            raise RuntimeError("database is locked")
+        return post(tweet_id, *args)
+
+    with patch.object(bot.client, 'get_list_tweets', return_value=create_list_response(tweets)), \
+         patch.object(bot.client, 'create_tweet') as mock_create_tweet, \
+         patch.object(bot, '_post_within_quota', side_effect=flaky_post), \
+         patch('src.pipeline.generate_response', return_value="Reply"):
+        pipeline = TweetPipeline(bot, "123", interval=0, post_concurrency=1)
+        asyncio.run(pipeline.run(max_cycles=1))
+
+    assert mock_create_tweet.call_count == 2
+    assert set(bot.processed_tweets) == {"2", "3"}
+    assert not pipeline.in_flight
@@ -0,0 +1,74 @@
+import sys
+import os
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bot import TwitterBot
+from src.priority import ReplyQueue, make_scorer
+
+NOW = 1_700_000_000.0
+
+def create_tweet(tweet_id, author_id, age=0.0, likes=0, text="Hello world"):
+    """Create a tweet with created_at and public_metrics set"""
+    tweet = Mock()
+    tweet.id = tweet_id
+    tweet.author_id = author_id
+    tweet.text = text
+    tweet.referenced_tweets = None
+    tweet.created_at = datetime.fromtimestamp(NOW - age, timezone.utc)
+    tweet.public_metrics = {'like_count': likes, 'retweet_count': 0, 'reply_count': 0, 'quote_count': 0}
+    return tweet
+
+def test_scorer_prefers_fresh_and_engaging_tweets():
+    score = make_scorer(half_life=600, author_weights={'99': 0.1})
+    fresh, stale = create_tweet(1, 10, age=0), create_tweet(2, 10, age=1200)
+    assert score(fresh, NOW) == 1.0
+    assert score(stale, NOW) == 0.25
+    assert score(create_tweet(3, 10, likes=50), NOW) > score(fresh, NOW)
+    assert score(create_tweet(4, 99), NOW) < score(stale, NOW)
+
+def test_queue_pops_best_first_and_evicts_aged_out():
+    now = [NOW]
+    queue = ReplyQueue(score_fn=make_scorer(half_life=600), max_age=900, clock=lambda: now[0])
+    for tweet in [create_tweet(1, 10, age=300), create_tweet(2, 10, age=0), create_tweet(3, 10, age=800)]:
+        queue.push(str(tweet.id), str(tweet.id), tweet)
+    queue.push('2', '2', create_tweet(2, 10))  # Duplicate is ignored
+    assert len(queue) == 3
+
+    assert queue.pop()[0] == '2'
+    now[0] += 200  # Tweet 3 is now 1000s old
+    assert queue.pop()[0] == '1'
+    assert queue.pop() is None
+    assert queue.evicted == 1
+
+def test_daily_budget_goes_to_best_tweets():
+    """With a limit of one reply, the author's freshest tweet is answered"""
+    bot = TwitterBot()
+    bot.max_daily_replies = 1
+    bot.reply_queue.clock = lambda: NOW
+    bot.user_cache.set("10", "alice")
+    tweets = [create_tweet(1, 10, age=600, text="Older"), create_tweet(2, 10, age=5, text="Newest")]
+
+    with patch('src.bot.generate_responses', side_effect=lambda texts, **kwargs: ['Reply'] * len(texts)) as mock_generate, \
+         patch.object(bot.client, 'create_tweet') as mock_create:
+        replied = bot._process_tweets(tweets)
+
+    assert replied == [2]
+    assert mock_generate.call_args.args[0] == ["Newest"]
+    assert mock_create.call_args.kwargs['in_reply_to_tweet_id'] == "2"
+
+def test_cycle_cap_leaves_candidates_queued():
+    """Candidates beyond the per-cycle cap wait for the next cycle"""
+    bot = TwitterBot()
+    bot.max_replies_per_cycle = 1
+    bot.reply_queue.clock = lambda: NOW
+    bot.user_cache.set("10", "alice")
+    bot.user_cache.set("20", "bob")
+    tweets = [create_tweet(1, 10, age=60), create_tweet(2, 20, likes=100)]
+
+    with patch('src.bot.generate_responses', side_effect=lambda texts, **kwargs: ['Reply'] * len(texts)), \
+         patch.object(bot.client, 'create_tweet'):
+        assert bot._process_tweets(tweets) == [2]
+        assert 1 in bot.reply_queue
+        assert bot._process_tweets([]) == [1]
@@ -0,0 +1,140 @@
+import sys
+import os
+import json
+import socket
+import threading
+import tracemalloc
+from unittest.mock import Mock, patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.bot import TwitterBot
+from src.metrics import metrics
+from src.profiling import Profiler, start_control_server
+
+def make_bot(profiler):
+    bot = TwitterBot()
+    bot.sleep = lambda seconds: None
+    bot.profiler = profiler
+    return bot
+
+def test_profile_covers_requested_cycles(tmp_path):
+    """A session runs from the first cycle after start to the cycle in which stop arrives"""
+    profiler = Profiler(str(tmp_path))
+    bot = make_bot(profiler)
+
+    empty = Mock(data=[], includes={}, meta={})
+    with patch.object(bot.client, 'get_list_tweets', return_value=empty):
+        bot.monitor_list_tweets('1', max_cycles=1)
+        assert not list(tmp_path.iterdir())  # Nothing happens while profiling is off
+
+        profiler.start_profile()
+        bot.monitor_list_tweets('1', max_cycles=3)
+        assert profiler.profiling and not list(tmp_path.glob('*.prof'))
+        profiler.stop_profile()
+        bot.monitor_list_tweets('1', max_cycles=1)
+
+    assert not profiler.profiling
+    [report] = tmp_path.glob('*-profile-*.txt')
+    assert report.read_text().startswith('4 cycles')
+    assert '_fetch_list_tweets' in report.read_text()
+    assert len(list(tmp_path.glob('*.prof'))) == 1
+
+def test_memory_report_shows_growth_and_sizes(tmp_path):
+    """The report lists the registered collection sizes and where memory grew"""
+    profiler = Profiler(str(tmp_path))
+    bot = make_bot(profiler)
+    profiler.sizes['processed_tweets'] = lambda: len(bot.processed_tweets)
+
+    profiler.toggle_memory()
+    assert profiler.tracing_memory
+    for i in range(50):
+        bot.processed_tweets.add(str(i))
+    kept = [bytearray(1024) for _ in range(100)]
+    path = profiler.stop_memory()
+
+    assert not profiler.tracing_memory and not tracemalloc.is_tracing()
+    report = open(path).read()
+    assert 'processed_tweets: 0 -> 50' in report
+    assert 'test_profiling.py' in report
+    assert len(list(tmp_path.glob('*.tracemalloc'))) == 1
+    assert len(kept) == 100
+
+def test_memory_tracing_started_elsewhere_keeps_running(tmp_path):
+    """stop_memory only stops tracemalloc if start_memory started it"""
+    profiler = Profiler(str(tmp_path))
+    tracemalloc.start()
+    try:
+        profiler.start_memory()
+        assert profiler.stop_memory()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+def test_profile_excludes_sleep_between_cycles(tmp_path):
+    """The wait between polls is not part of the profiled cycle"""
+    profiler = Profiler(str(tmp_path))
+    bot = make_bot(profiler)
+    sleeps = []
+    bot.sleep = lambda seconds: sleeps.append(profiler._profile is not None and profiler._profile_cycles)
+
+    empty = Mock(data=[], includes={}, meta={})
+    profiler.start_profile()
+    with patch.object(bot.client, 'get_list_tweets', return_value=empty):
+        bot.monitor_list_tweets('1', max_cycles=2)
+    profiler.stop_profile()
+    profiler.close()
+
+    # Each sleep happens after its cycle was closed and counted
+    assert sleeps == [1, 2]
+
+def test_stuck_calls_dump_stacks_once(tmp_path):
+    """A call running past the threshold gets one stack dump naming its thread"""
+    profiler = Profiler(str(tmp_path), stuck_after=0)
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_call():
+        with metrics.time('create_tweet'):
+            entered.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=slow_call, name='reply-worker')
+    thread.start()
+    entered.wait(5)
+    try:
+        path = profiler.check_stuck_calls()
+        assert profiler.check_stuck_calls() is None
+    finally:
+        release.set()
+        thread.join()
+
+    dump = open(path).read()
+    assert 'create_tweet' in dump
+    assert 'Thread reply-worker [create_tweet]' in dump
+    assert 'slow_call' in dump
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="needs Unix sockets")
+def test_control_socket_commands(tmp_path):
+    """Commands sent over the socket are answered with one JSON line each"""
+    profiler = Profiler(str(tmp_path / "profiles"))
+    path = str(tmp_path / "control.sock")
+    server = start_control_server(profiler, path)
+    try:
+        with socket.socket(socket.AF_UNIX) as conn:
+            conn.connect(path)
+            stream = conn.makefile('rw')
+
+            def send(command):
+                stream.write(command + '\n')
+                stream.flush()
+                return json.loads(stream.readline())
+
+            assert send('profile start')['profiling'] is True
+            assert send('status')['profiling'] is True
+            assert send('profile stop')['profiling'] is False
+            assert os.path.exists(send('stacks')['path'])
+            assert send('frobnicate')['ok'] is False
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.prompt import PromptBuilder, clean_tweet, completion_budget, estimate_tokens, reply_char_limit
+from src.usage import UsageTracker
+
+def test_clean_tweet_drops_links_and_boilerplate():
+    """Links, retweet prefixes, leading mentions and trailing tags cost tokens but say nothing"""
+    text = "RT @news: @alice @bob Tail latency matters more than averages &amp; medians https://t.co/abc #perf #sre"
+    assert clean_tweet(text) == "Tail latency matters more than averages & medians"
+
+def test_clean_tweet_keeps_tweets_that_are_only_tags():
+    assert clean_tweet("#python #rust") == "#python #rust"
+
+def test_clean_tweet_cuts_to_token_budget():
+    cleaned = clean_tweet("word " * 200, max_tokens=10)
+    assert estimate_tokens(cleaned) <= 11 and cleaned.endswith("...")
+
+def test_completion_budget_follows_character_limit():
+    """max_tokens shrinks with the characters the reply may use"""
+    assert reply_char_limit("alice") == 273
+    assert completion_budget(140) < completion_budget(280) < 100
+    assert completion_budget(280, replies=3) > 3 * completion_budget(280)
+
+def test_prompt_prefix_is_identical_across_tweets():
+    """Only the user message varies, so the system message can be cached server-side"""
+    builder = PromptBuilder()
+    first = builder.messages("First tweet", 250)
+    second = builder.messages("Another tweet https://t.co/x", 280)
+    assert first[0] is second[0] is builder.system_message
+    assert "https://" not in second[1]['content'] and "280" in second[1]['content']
+    assert builder.batch_messages(["a", "b"])[0] is builder.batch_messages(["c"])[0]
+    assert PromptBuilder("Other rules").version != builder.version
+
+def test_usage_tracker_costs_requests_and_cycles():
+    """Usage is priced per model, with cached input at its discount, and summed per cycle"""
+    tracker = UsageTracker(prices={'gpt-4o-mini': (0.15, 0.075, 0.60)})
+    cost = tracker.record('gpt-4o-mini-2024-07-18', prompt_tokens=1000, completion_tokens=100, cached_tokens=400)
+    assert abs(cost - (600 * 0.15 + 400 * 0.075 + 100 * 0.60) / 1e6) < 1e-12
+    tracker.record('gpt-4o-mini', prompt_tokens=200, completion_tokens=50, replies=0)
+    tracker.add_replies('gpt-4o-mini')
+
+    cycle = tracker.end_cycle()
+    assert cycle['requests'] == 2 and cycle['replies'] == 2
+    assert tracker.end_cycle()['requests'] == 0  # Empty cycles are not kept
+
+    report = tracker.report()
+    assert report['cycles'] == 1
+    assert report['prompt_tokens_per_reply'] == 600
+    assert report['cost_per_cycle'] == report['cost']
+    assert 'per reply' in tracker.format_report()
+
+def test_usage_tracker_estimates_missing_usage():
+    """Streams stopped early have no usage; their tokens are estimated from the text"""
+    tracker = UsageTracker()
+    tracker.record_response('gpt-3.5-turbo', None, [{"role": "user", "content": "x" * 40}], "y" * 20)
+    report = tracker.report()
+    assert report['prompt_tokens'] == 10 and report['completion_tokens'] == 5
+    assert report['estimated_requests'] == 1
@@ -0,0 +1,94 @@
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.quota import GLOBAL_KEY, ReplyQuota
+from tests.helpers import FakeClock
+
+def test_user_limit_rolls_instead_of_resetting():
+    """A reply frees up a full window after it was sent, not at midnight"""
+    clock = FakeClock()
+    quota = ReplyQuota(per_user=2, user_window=3600, clock=clock)
+    assert quota.try_charge("10")
+    clock.now += 1000
+    assert quota.try_charge("10")
+    assert not quota.try_charge("10")
+    assert quota.blocked_by("10") == 'user'
+
+    clock.now += 2601  # The first reply is now older than the window
+    assert quota.used("10") == 1
+    assert quota.try_charge("10")
+    assert not quota.try_charge("10")
+
+def test_global_and_hourly_limits():
+    """Limits across all authors stop replies to authors with budget left"""
+    clock = FakeClock()
+    quota = ReplyQuota(per_user=5, global_limit=3, hourly_limit=2, clock=clock)
+    assert quota.try_charge("1")
+    assert quota.try_charge("2")
+    assert quota.blocked_by("3") == 'hourly'
+    clock.now += 3600
+    assert quota.try_charge("3")
+    assert quota.blocked_by("4") == 'global'
+    assert quota.allows("4", pending_total=0) is False
+
+def test_pending_replies_count_against_limits():
+    """Replies planned but not yet charged are included in the check"""
+    quota = ReplyQuota(per_user=2, global_limit=3, clock=FakeClock())
+    quota.charge("10")
+    assert quota.allows("10")
+    assert not quota.allows("10", pending=1)
+    assert not quota.allows("20", pending_total=2)
+
+def test_refund_restores_budget():
+    """A charge taken back for a failed post leaves the limits untouched"""
+    quota = ReplyQuota(per_user=1, hourly_limit=1, clock=FakeClock())
+    assert quota.try_charge("10")
+    quota.refund("10")
+    assert quota.used("10") == 0
+    assert quota.try_charge("20")
+
+def test_idle_users_expire_and_memory_is_bounded():
+    """Users drop out once their replies leave the window, and max_users caps the rest"""
+    clock = FakeClock()
+    quota = ReplyQuota(per_user=3, user_window=100, max_users=3, clock=clock)
+    for user_id in ["1", "2", "3", "4"]:
+        quota.charge(user_id)
+    assert len(quota) == 3
+    assert quota.used("1") == 0
+
+    clock.now += 101
+    quota.charge("5")
+    assert len(quota) == 1
+    assert quota.drain_changed()["2"] == []
+
+def test_drain_and_restore_round_trip():
+    """Persisted logs are restored without the replies that have aged out"""
+    clock = FakeClock()
+    quota = ReplyQuota(per_user=3, user_window=100, global_limit=10, clock=clock)
+    quota.charge("10")
+    clock.now += 60
+    quota.charge("10")
+    saved = quota.drain_changed()
+    assert saved["10"] == [clock.now - 60, clock.now]
+    assert quota.drain_changed() == {}
+
+    clock.now += 50
+    restored = ReplyQuota(per_user=3, user_window=100, global_limit=10, clock=clock)
+    restored.restore(saved)
+    assert restored.used("10") == 1
+    assert restored.stats()['global_used'] == 2
+    assert GLOBAL_KEY in saved
+
+def test_concurrent_charges_stop_at_limit():
+    """try_charge is atomic across threads"""
+    quota = ReplyQuota(per_user=5, clock=FakeClock())
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(quota.try_charge("10"))) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 5
+    assert quota.used("10") == 5
@@ -0,0 +1,80 @@
+import sys
+import os
+import gzip
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeOpenAIServer, FakeTwitterServer
+from benchmarks.load_test import FAKE_CREDENTIALS, point_bot_at
+from src.bot import TwitterBot, create_twitter_client
+from src.recorder import TraceRecorder, diff_report, load_trace, replay, route, start_recording
+
+LIST_ID = '1872292999155040454'
+
+def record_run(path):
+    """Run two polling cycles against the fake servers while recording"""
+    from src import llm
+
+    original_client, original_key = llm.client, llm.OPENAI_API_KEY
+    with FakeTwitterServer(arrival_rate=0, referenced_fraction=0) as twitter, FakeOpenAIServer() as openai_server:
+        with patch.dict(os.environ, FAKE_CREDENTIALS):
+            bot = TwitterBot(client=create_twitter_client())
+        bot.sleep = lambda seconds: None
+        point_bot_at(bot, twitter, openai_server)
+        recorder = start_recording(bot, path)
+        try:
+            bot.monitor_list_tweets(LIST_ID, max_cycles=2)
+        finally:
+            recorder.close()
+            llm.client, llm.OPENAI_API_KEY = original_client, original_key
+    return twitter
+
+def test_route_names_endpoints():
+    assert route('GET', '/2/lists/123/tweets') == 'GET /2/lists/:id/tweets'
+
+def test_trace_records_twitter_and_openai_traffic(tmp_path):
+    """Every exchange lands in the compressed trace, without credentials"""
+    path = str(tmp_path / "trace.jsonl.gz")
+    twitter = record_run(path)
+    entries = load_trace(path)
+
+    routes = [route(entry['method'], entry['path']) for entry in entries]
+    assert routes.count('GET /2/lists/:id/tweets') == 2
+    assert routes.count('POST /2/tweets') == len(twitter.replies) > 0
+    assert 'POST /v1/chat/completions' in routes
+    assert all('duration' in entry and 't' in entry for entry in entries)
+    with gzip.open(path, 'rt') as f:
+        raw = f.read()
+    assert FAKE_CREDENTIALS['AccessTokenSecret'] not in raw and 'bench-bearer' not in raw
+
+def test_trace_of_a_killed_process_keeps_flushed_entries(tmp_path):
+    """A trace whose gzip stream was never closed still loads up to its last flush"""
+    path = str(tmp_path / "trace.jsonl.gz")
+    recorder = TraceRecorder(path, flush_every=20)
+    for i in range(60):
+        recorder.write({'t': i, 'method': 'GET', 'path': '/2/users/1001'})
+    recorder._file.flush()
+    # The file as a killed process leaves it: no end-of-stream trailer
+    crashed = str(tmp_path / "crashed.jsonl.gz")
+    with open(path, 'rb') as src, open(crashed, 'wb') as dst:
+        dst.write(src.read())
+    recorder.close()
+
+    assert [entry['t'] for entry in load_trace(crashed)] == list(range(60))
+    assert len(load_trace(path)) == 60
+
+def test_fast_replay_reproduces_the_recording(tmp_path):
+    """Replaying serves the recorded responses without any network and reports the differences"""
+    path = str(tmp_path / "trace.jsonl.gz")
+    twitter = record_run(path)
+
+    with patch.dict(os.environ, FAKE_CREDENTIALS):
+        result = replay(path)
+
+    recorded, replayed = result['recorded'], result['replayed']
+    assert replayed['replies'] == recorded['replies'] == len(twitter.replies)
+    assert replayed['calls'] == recorded['calls']
+    assert result['matches'].get('unmatched', 0) == 0
+    assert replayed['elapsed_seconds'] <= recorded['elapsed_seconds'] + 1
+    report = diff_report(recorded, replayed)
+    assert 'replies_per_second' in report and 'calls POST /2/tweets' in report
@@ -0,0 +1,54 @@
+import sys
+import os
+import json
+from datetime import datetime, timezone
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tweepy
+
+from src.records import TweetPage, TweetRecord, to_record
+from src.state import ProcessedTweets
+
+TWEET = {
+    'id': '1872400000000000001',
+    'edit_history_tweet_ids': ['1872400000000000001'],
+    'text': 'Shipped the new queue today',
+    'author_id': '1001',
+    'created_at': '2024-12-30T12:00:00.000Z',
+    'lang': 'en',
+    'public_metrics': {'retweet_count': 2, 'reply_count': 1, 'like_count': 10, 'quote_count': 1},
+}
+
+def test_record_from_json_matches_tweepy_tweet():
+    """Decoding JSON directly gives the same record as going through a tweepy Tweet"""
+    record = TweetRecord.from_json(TWEET)
+    assert record == to_record(tweepy.Tweet(TWEET))
+    assert record.id == 1872400000000000001 and record.author_id == 1001
+    assert record.timestamp == datetime(2024, 12, 30, 12, tzinfo=timezone.utc).timestamp()
+    assert record.engagement == 10 + 2 * 2 + 2 * 1 + 1
+    assert record.lang == 'en' and not record.is_reference
+
+def test_page_decode_keeps_users_and_meta():
+    """A list tweets page decodes to records, included users and the paging meta"""
+    retweet = dict(TWEET, id='1872400000000000002', referenced_tweets=[{'type': 'retweeted', 'id': '1'}])
+    payload = json.dumps({
+        'data': [TWEET, retweet],
+        'includes': {'users': [{'id': '1001', 'name': 'Ada', 'username': 'ada_builds'}]},
+        'meta': {'result_count': 2, 'next_token': 'abc'},
+    }).encode('utf-8')
+
+    page = TweetPage.decode(payload)
+    assert [tweet.id for tweet in page.data] == [1872400000000000001, 1872400000000000002]
+    assert page.data[1].is_reference
+    assert page.includes['users'][0].username == 'ada_builds'
+    assert page.meta['next_token'] == 'abc'
+    assert TweetPage.decode(b'{"meta": {"result_count": 0}}').data == []
+
+def test_processed_tweets_accept_ints_and_strings():
+    """IDs are stored as ints but match and persist as strings"""
+    processed = ProcessedTweets(['5'], maxlen=10)
+    processed.add(6)
+    processed.add('7')
+    assert '6' in processed and 7 in processed and 5 in processed
+    assert list(processed) == ['5', '6', '7']
+    assert processed.drain_new() == ['6', '7']
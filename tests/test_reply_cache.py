@@ -0,0 +1,112 @@
+import sys
+import os
+from unittest.mock import Mock, patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm import generate_response
+from src.reply_cache import ReplyCache, cache_key, normalize_tweet_text
+from tests.helpers import FakeClock
+
+def test_normalization_ignores_urls_and_whitespace():
+    """Tweets differing only in URLs, spacing or case share a key"""
+    first = "Big news!  Read more https://t.co/abc"
+    second = "big news! read more https://t.co/xyz\n"
+    assert normalize_tweet_text(first) == normalize_tweet_text(second) == "big news! read more"
+    assert cache_key(first, "gpt", "v1") == cache_key(second, "gpt", "v1")
+    assert cache_key(first, "gpt", "v1") != cache_key(first, "gpt", "v2")
+    assert cache_key(first, "gpt", "v1") != cache_key(first, "other", "v1")
+
+def test_cache_reuses_reply_and_counts_saved_latency():
+    """A hit returns the stored reply and credits its generation time"""
+    cache = ReplyCache()
+    assert cache.get("Hello", "gpt") is None
+    cache.put("Hello", "gpt", "Hi there", latency=1.5)
+    assert cache.get("hello ", "gpt") == "Hi there"
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['saved_seconds'] == 1.5
+
+def test_cache_varies_replies():
+    """With several variants, new replies are generated first and then rotated"""
+    cache = ReplyCache(max_variants=2)
+    cache.put("Hello", "gpt", "First")
+    assert cache.get("Hello", "gpt") is None
+    cache.put("Hello", "gpt", "Second")
+    assert [cache.get("Hello", "gpt") for _ in range(3)] == ["First", "Second", "First"]
+
+def test_rotation_is_bounded_by_cache_size():
+    """Rotation positions are evicted along with the cached replies"""
+    cache = ReplyCache(maxsize=2)
+    for i in range(10):
+        cache.put(f"Tweet {i}", "gpt", f"Reply {i}")
+        assert cache.get(f"Tweet {i}", "gpt") == f"Reply {i}"
+    assert len(cache._rotation) == 2
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Replies stored on disk are served by a new cache instance until they expire"""
+    clock = FakeClock()
+    path = str(tmp_path / "replies.db")
+    cache = ReplyCache(path=path, ttl=60, clock=clock)
+    cache.put("Hello", "gpt", "Hi there")
+    cache.close()
+
+    cache = ReplyCache(path=path, ttl=60, clock=clock)
+    assert cache.get("Hello", "gpt") == "Hi there"
+    cache.close()
+
+    clock.now += 120
+    cache = ReplyCache(path=path, ttl=60, clock=clock)
+    assert cache.get("Hello", "gpt") is None
+    cache.close()
+
+def test_disk_tier_is_purged_while_storing(tmp_path):
+    """Storing replies deletes expired rows and keeps the disk tier under max_rows"""
+    clock = FakeClock()
+    cache = ReplyCache(path=str(tmp_path / "replies.db"), ttl=60, clock=clock, max_rows=3, purge_every=2)
+    rows = lambda: cache._conn.execute('SELECT COUNT(*) FROM reply_cache').fetchone()[0]
+    cache.put("Old one", "gpt", "Reply")
+    cache.put("Old two", "gpt", "Reply")
+    assert rows() == 2
+
+    clock.now += 120
+    cache.put("New one", "gpt", "Reply")
+    cache.put("New two", "gpt", "Reply")
+    assert rows() == 2  # The expired rows went with the second store
+
+    for i in range(4):
+        cache.put(f"Newer {i}", "gpt", "Reply")
+    assert rows() == 3
+    assert cache.get("Newer 3", "gpt") == "Reply"
+    cache.close()
+
+def test_purge_caps_variants_added_by_other_processes(tmp_path):
+    """Variants beyond max_variants, stored concurrently by caches sharing the file, are deleted"""
+    cache = ReplyCache(path=str(tmp_path / "replies.db"))
+    cache.put("Hello", "gpt", "Hi")
+    with cache._conn:  # What a racing process's put leaves behind
+        cache._conn.execute('INSERT INTO reply_cache SELECT key, ?, latency, created_at FROM reply_cache', ("Hey",))
+    assert cache.purge_expired() == 1
+    assert cache._conn.execute('SELECT reply FROM reply_cache').fetchall() == [("Hi",)]
+    cache.close()
+
+def test_generate_response_uses_cache():
+    """Repeated content is answered from the cache without another API call"""
+    cache = ReplyCache()
+    mock_response = Mock()
+    mock_response.choices = [Mock(message=Mock(content="Cached response"))]
+
+    with patch('src.llm.OPENAI_API_KEY', 'test_key'), \
+         patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.return_value = mock_response
+        assert generate_response("Launch day! https://t.co/1", cache=cache) == "Cached response"
+        assert generate_response("Launch  day! https://t.co/2", cache=cache) == "Cached response"
+    assert mock_client.chat.completions.create.call_count == 1
+
+def test_generate_response_does_not_cache_placeholder():
+    """The fallback placeholder is never cached"""
+    cache = ReplyCache()
+    with patch('src.llm.OPENAI_API_KEY', 'test_key'), \
+         patch('src.llm.client') as mock_client:
+        mock_client.chat.completions.create.side_effect = Exception("API Error")
+        generate_response("Hello", max_retries=1, cache=cache)
+    assert cache.get("Hello", "gpt-3.5-turbo") is None
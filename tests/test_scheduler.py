@@ -0,0 +1,77 @@
+import sys
+import os
+from unittest.mock import Mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.scheduler import LIST_TWEETS_ENDPOINT, PollScheduler, endpoint_key
+from tests.helpers import FakeClock
+
+def rate_limit_headers(limit, remaining, reset_at):
+    return {
+        'x-rate-limit-limit': str(limit),
+        'x-rate-limit-remaining': str(remaining),
+        'x-rate-limit-reset': str(int(reset_at)),
+    }
+
+def test_endpoint_key_normalizes_ids():
+    """Requests for different lists share one bucket"""
+    assert endpoint_key('get', 'https://api.twitter.com/2/lists/123/tweets?max_results=100') == LIST_TWEETS_ENDPOINT
+
+def test_quiet_list_polls_at_base_interval():
+    """Without activity or rate-limit pressure the base interval is used"""
+    scheduler = PollScheduler(base_interval=60, clock=FakeClock())
+    assert scheduler.next_delay() == 60
+
+def test_busy_list_polls_faster():
+    """Activity shortens the delay down to the minimum interval"""
+    scheduler = PollScheduler(base_interval=60, min_interval=5, clock=FakeClock())
+    for _ in range(10):
+        scheduler.record_activity(20)
+    assert scheduler.next_delay() == 5
+
+def test_budget_paces_polling():
+    """Remaining requests are spread over the rest of the window"""
+    clock = FakeClock()
+    scheduler = PollScheduler(base_interval=60, min_interval=5, reserve_fraction=0.1, clock=clock)
+    for _ in range(10):
+        scheduler.record_activity(20)
+
+    scheduler.observe(LIST_TWEETS_ENDPOINT, rate_limit_headers(900, 890, clock.now + 900))
+    assert scheduler.next_delay() == 5
+
+    # 30 requests left, 90 of them reserved: wait for the reset
+    scheduler.observe(LIST_TWEETS_ENDPOINT, rate_limit_headers(900, 30, clock.now + 300))
+    assert scheduler.next_delay() == 301
+
+    # 190 usable requests over 760 seconds: one poll every 4 seconds at most
+    scheduler.observe(LIST_TWEETS_ENDPOINT, rate_limit_headers(900, 280, clock.now + 760))
+    assert scheduler.next_delay() == 5
+    scheduler.observe(LIST_TWEETS_ENDPOINT, rate_limit_headers(900, 100, clock.now + 600))
+    assert scheduler.next_delay() == 60
+
+def test_window_reset_restores_budget():
+    """After the reset time the previous window's exhaustion no longer applies"""
+    clock = FakeClock()
+    scheduler = PollScheduler(base_interval=60, clock=clock)
+    scheduler.observe(LIST_TWEETS_ENDPOINT, rate_limit_headers(900, 0, clock.now + 100))
+    assert scheduler.next_delay() == 101
+    clock.now += 200
+    assert scheduler.next_delay() == 60
+
+def test_response_hook_reads_headers():
+    """The requests hook feeds every response into the matching bucket"""
+    clock = FakeClock()
+    scheduler = PollScheduler(clock=clock)
+    response = Mock(url='https://api.twitter.com/2/lists/1/tweets', headers=rate_limit_headers(900, 10, clock.now + 60))
+    response.request.method = 'GET'
+    scheduler.observe_response(response)
+    assert scheduler.stats()['buckets'][LIST_TWEETS_ENDPOINT]['remaining'] == 10
+
+def test_attach_replaces_previous_scheduler():
+    """A shared session keeps only the hook of the newest scheduler"""
+    session = Mock(hooks={'response': []})
+    first, second = PollScheduler(), PollScheduler()
+    first.attach(session)
+    first.attach(session)
+    second.attach(session)
+    assert session.hooks['response'] == [second.observe_response]
@@ -0,0 +1,77 @@
+import sys
+import os
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bot import TwitterBot
+from src.state import MemoryStateStore, ProcessedTweets, SQLiteStateStore
+
+def test_processed_tweets_drops_oldest_first():
+    """The bounded dedup set evicts in insertion order"""
+    processed = ProcessedTweets(maxlen=3)
+    for tweet_id in ["1", "2", "3", "4"]:
+        processed.add(tweet_id)
+    assert list(processed) == ["2", "3", "4"]
+    assert "1" not in processed
+    assert processed.drain_new() == ["1", "2", "3", "4"]
+    assert processed.drain_new() == []
+
+def test_sqlite_store_round_trip(tmp_path):
+    """Saved state is loaded back by a new store on the same file"""
+    path = str(tmp_path / "state.db")
+    store = SQLiteStateStore(path)
+    store.save(
+        processed=["1", "2", "3"],
+        reply_log={"42": [1700000000.0, 1700000060.0], "7": []},
+        high_water={"list": 3}
+    )
+    store.close()
+
+    store = SQLiteStateStore(path)
+    assert store.load_processed(10) == ["1", "2", "3"]
+    assert store.load_reply_log() == {"42": [1700000000.0, 1700000060.0]}
+    assert store.load_high_water() == {"list": 3}
+    store.close()
+
+def test_sqlite_store_keeps_most_recent(tmp_path):
+    """Only the newest processed IDs are retained on disk"""
+    store = SQLiteStateStore(str(tmp_path / "state.db"))
+    store.save(processed=[str(i) for i in range(10)], keep=4)
+    store.save(processed=["10"], keep=4)
+    assert store.load_processed(100) == ["7", "8", "9", "10"]
+    store.close()
+
+def test_workers_keep_their_own_processed_tweets(tmp_path):
+    """A busy worker trims only its own rows of a shared database"""
+    path = str(tmp_path / "state.db")
+    quiet = SQLiteStateStore(path, owner="worker-0")
+    busy = SQLiteStateStore(path, owner="worker-1")
+    quiet.save(processed=["1", "2"], keep=4)
+    for start in range(100, 120, 5):
+        busy.save(processed=[str(i) for i in range(start, start + 5)], keep=4)
+
+    assert quiet.load_processed(100) == ["1", "2"]
+    assert busy.load_processed(100) == ["116", "117", "118", "119"]
+    quiet.close()
+    busy.close()
+
+def test_bot_resumes_from_store(tmp_path):
+    """A new bot on the same store skips work the previous one finished"""
+    path = str(tmp_path / "state.db")
+    bot = TwitterBot(state_store=SQLiteStateStore(path))
+    with patch.object(bot.client, 'create_tweet'), \
+         patch('src.bot.generate_response', return_value="Reply"):
+        assert bot._reply_to_tweet("1", "42", "author", "Hello")
+    bot.processed_tweets.add("1")
+    bot.list_high_water["list"] = 1
+    bot.save_state()
+
+    restarted = TwitterBot(state_store=SQLiteStateStore(path))
+    assert "1" in restarted.processed_tweets
+    assert restarted.quota.used("42") == 1
+    assert restarted.list_high_water == {"list": 1}
+
+def test_memory_store_is_default():
+    """Bots without a configured store keep state in memory"""
+    bot = TwitterBot()
+    assert isinstance(bot.state_store, MemoryStateStore)
@@ -0,0 +1,101 @@
+import sys
+import os
+import threading
+import time
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeTwitterServer, RedirectAdapter, TWITTER_HOST
+from benchmarks.load_test import FAKE_CREDENTIALS
+from src.bot import TwitterBot, create_twitter_client
+from src.mock_data import MOCK_USERS
+from src.stream import _STOP, ListStream, build_member_rules
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def make_stream(twitter, **options):
+    with patch.dict(os.environ, FAKE_CREDENTIALS):
+        bot = TwitterBot(client=create_twitter_client())
+    bot.client.session.mount(TWITTER_HOST, RedirectAdapter(twitter.url))
+    return ListStream(bot, '123', base_url=twitter.url, read_timeout=5, **options)
+
+def test_member_rules_respect_length_limit():
+    """Members are packed into as few OR rules as fit the limit"""
+    rules = build_member_rules(['carol', 'alice', 'bob', 'alice'], max_length=30)
+    assert rules == ['from:alice OR from:bob', 'from:carol']
+    assert all(len(rule) <= 30 for rule in rules)
+
+def test_sync_rules_applies_membership_diff():
+    """Only rules affected by a membership change are added or deleted"""
+    users = dict(MOCK_USERS)
+    with FakeTwitterServer(arrival_rate=0, users=users) as twitter:
+        stream = make_stream(twitter, max_rule_length=45)
+        assert stream.sync_rules() == {'added': 2, 'deleted': 0}
+        assert stream.sync_rules() == {'added': 0, 'deleted': 0}
+
+        del users['1004']  # margaret_tests leaves the list
+        assert stream.sync_rules() == {'added': 1, 'deleted': 1}
+        values = [rule['value'] for rule in twitter.stream_rules.values()]
+    assert all('margaret_tests' not in value for value in values)
+    assert all(rule['tag'] == 'list:123' for rule in twitter.stream_rules.values())
+
+def test_stream_replies_and_fills_gap_after_disconnect():
+    """Streamed tweets are replied to, and tweets missed while disconnected
+    are picked up by the catch-up poll"""
+    with FakeTwitterServer(arrival_rate=0, initial_tweets=[], users=dict(MOCK_USERS)) as twitter:
+        twitter.stream_heartbeat = 0.05
+        twitter.stream_disconnect_after = 1
+        stream = make_stream(twitter)
+
+        with patch('src.bot.generate_responses', side_effect=lambda texts, **kwargs: ['Nice!'] * len(texts)):
+            thread = threading.Thread(target=stream.run, daemon=True)
+            thread.start()
+            wait_for(lambda: twitter.stream_connections == 1)
+            first = twitter.add_tweet('Streaming beats polling', '1001')
+            second = twitter.add_tweet('Posted during the disconnect', '1002')
+            retweet = twitter.add_tweet('RT something', '1003', referenced_tweets=[{'type': 'retweeted', 'id': '1'}])
+            wait_for(lambda: len(twitter.replies) == 2)
+            stream.stop()
+            thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert [reply['in_reply_to_tweet_id'] for reply in twitter.replies] == [first['id'], second['id']]
+    assert retweet['id'] not in stream.bot.processed_tweets
+    assert twitter.stream_connections >= 2
+    assert stream.bot.list_high_water['123'] >= int(second['id'])
+
+def test_slow_replies_do_not_block_the_stream():
+    """Tweets are queued for the reply thread without waiting for the LLM; a full queue drops them"""
+    with patch.dict(os.environ, FAKE_CREDENTIALS):
+        bot = TwitterBot(client=create_twitter_client())
+    stream = ListStream(bot, '123', base_url='http://127.0.0.1:9', queue_size=1)
+    release = threading.Event()
+    processed = []
+
+    def slow_process(tweets):
+        processed.append([tweet.id for tweet in tweets])
+        release.wait(5)
+        return []
+
+    def message(tweet_id):
+        return {'data': {'id': str(tweet_id), 'text': 'Hello', 'author_id': '1001'}}
+
+    with patch.object(bot, '_process_tweets', side_effect=slow_process):
+        worker = threading.Thread(target=stream._reply_worker)
+        worker.start()
+        start = time.monotonic()
+        assert stream.handle_message(message(1))
+        wait_for(lambda: processed)
+        assert stream.handle_message(message(2))
+        assert not stream.handle_message(message(3))  # Queue full
+        assert time.monotonic() - start < 1
+        release.set()
+        stream.replies.put(_STOP)
+        worker.join(timeout=5)
+
+    assert processed == [[1], [2]]
+    assert bot.list_high_water['123'] == 2
@@ -0,0 +1,111 @@
+import sys
+import os
+import signal
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.supervisor import HashRing, Supervisor, WorkerProcess, parse_list_ids
+
+LIST_IDS = [str(1872292999155040000 + i) for i in range(40)]
+
+def crash_first_worker(worker_name, list_ids):
+    """Worker target: worker-0 fails at once, the others keep running"""
+    if worker_name == 'worker-0':
+        sys.exit(3)
+    time.sleep(30)
+
+def idle_worker(worker_name, list_ids):
+    """Worker target that just keeps running"""
+    time.sleep(30)
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+def test_parse_list_ids():
+    assert parse_list_ids(" 1, 2,,1 ,3") == ["1", "2", "3"]
+
+def test_ring_assigns_every_list():
+    """Every list lands on exactly one worker and all workers get some"""
+    assignment = HashRing([f"worker-{i}" for i in range(4)]).assign(LIST_IDS)
+    assert sorted(sum(assignment.values(), [])) == sorted(LIST_IDS)
+    assert len(assignment) == 4
+
+def test_worker_index():
+    assert [Supervisor.index(Supervisor._name(i)) for i in (0, 3, 12)] == [0, 3, 12]
+
+def test_adding_a_worker_moves_few_lists():
+    """Only the lists that land on the new worker move"""
+    ring = HashRing([f"worker-{i}" for i in range(4)])
+    before = {list_id: ring.node_for(list_id) for list_id in LIST_IDS}
+    ring.add("worker-4")
+    after = {list_id: ring.node_for(list_id) for list_id in LIST_IDS}
+
+    moved = [list_id for list_id in LIST_IDS if before[list_id] != after[list_id]]
+    assert all(after[list_id] == "worker-4" for list_id in moved)
+    assert len(moved) < len(LIST_IDS) / 2
+
+def test_only_failed_worker_is_restarted():
+    """A crashing worker is restarted on its own; its sibling keeps its process"""
+    supervisor = Supervisor(crash_first_worker, LIST_IDS, workers=2, restart_backoff=0)
+    supervisor.start()
+    try:
+        first, second = supervisor.workers['worker-0'], supervisor.workers['worker-1']
+        second_pid = second.process.pid
+        wait_for(lambda: first.process.exitcode == 3)
+
+        assert supervisor.check() == ['worker-0']
+        assert first.failures == 1
+        assert second.process.pid == second_pid and second.process.is_alive()
+    finally:
+        supervisor.stop()
+    assert not second.process.is_alive()
+
+def test_signal_workers_reaches_running_workers_only():
+    """Signals are forwarded to the live workers, skipping the one that exited"""
+    supervisor = Supervisor(crash_first_worker, LIST_IDS, workers=2, restart_backoff=60)
+    supervisor.start()
+    try:
+        wait_for(lambda: supervisor.workers['worker-0'].process.exitcode == 3)
+        wait_for(supervisor.workers['worker-1'].ready.is_set)
+        assert supervisor.signal_workers(0) == ['worker-1']  # Signal 0 only checks the process exists
+    finally:
+        supervisor.stop()
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGUSR1'), reason="needs SIGUSR1")
+def test_profiling_signal_does_not_kill_starting_worker():
+    """Workers are only signalled once ready, and a target without handlers survives the signal"""
+    supervisor = Supervisor(crash_first_worker, LIST_IDS, workers=2)
+    supervisor.workers['worker-1'] = worker = WorkerProcess('worker-1', LIST_IDS)
+    supervisor._spawn(worker)
+    try:
+        if not worker.ready.is_set():
+            assert supervisor.signal_workers(signal.SIGUSR1) == []
+        wait_for(worker.ready.is_set)
+        assert supervisor.signal_workers(signal.SIGUSR1) == ['worker-1']
+        time.sleep(0.2)
+        assert worker.process.is_alive()
+    finally:
+        supervisor.stop()
+
+def test_requested_resize_applied_on_check():
+    """A resize requested, e.g. from a signal handler, starts a worker for the moved lists only"""
+    supervisor = Supervisor(idle_worker, LIST_IDS, workers=2)
+    supervisor.start()
+    try:
+        pids = {name: worker.process.pid for name, worker in supervisor.workers.items()}
+        supervisor.request_resize(supervisor.target_size + 1)
+        assert supervisor.target_size == 3 and supervisor.size == 2
+        supervisor.check()
+
+        assert supervisor.size == 3
+        assert sorted(supervisor.workers) == ['worker-0', 'worker-1', 'worker-2']
+        assert sorted(sum((worker.list_ids for worker in supervisor.workers.values()), [])) == sorted(LIST_IDS)
+        assert all(worker.process.is_alive() for worker in supervisor.workers.values())
+        assert supervisor.workers['worker-2'].process.pid not in pids.values()
+    finally:
+        supervisor.stop()
@@ -0,0 +1,69 @@
+import sys
+import os
+import time
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bot import TwitterBot
+from src.workers import ReplyWorkerPool
+
+def slow_generate(text, **kwargs):
+    time.sleep(0.2)
+    return f"Reply to {text}"
+
+def test_pool_generates_concurrently():
+    """A burst is limited by the pool's concurrency, not by sequential LLM latency"""
+    bot = TwitterBot()
+    pool = ReplyWorkerPool(bot, generate_concurrency=5, post_concurrency=2)
+    jobs = [(str(i), str(100 + i), f"user{i}", f"Tweet {i}") for i in range(5)]
+
+    with patch('src.workers.generate_response', side_effect=slow_generate), \
+         patch.object(bot.client, 'create_tweet') as mock_create:
+        start = time.monotonic()
+        replied = pool.run(jobs)
+        elapsed = time.monotonic() - start
+    pool.shutdown()
+
+    assert sorted(replied) == [str(i) for i in range(5)]
+    assert elapsed < 0.6  # 5 sequential calls would take 1s
+    assert mock_create.call_count == 5
+    assert pool.stats()['completed'] == 5
+    assert pool.stats()['generate_depth'] == 0
+
+def test_expired_jobs_are_dropped_without_charging_quota():
+    """Jobs past their deadline are not posted and do not count against the limit"""
+    bot = TwitterBot()
+    now = [100.0]
+    pool = ReplyWorkerPool(bot, max_job_age=30, clock=lambda: now[0])
+
+    with patch('src.workers.generate_response') as mock_generate, \
+         patch.object(bot.client, 'create_tweet') as mock_create:
+        future = pool.submit("1", "10", "alice", "Old news", deadline=99.0)
+        assert future.result(timeout=5) is False
+    pool.shutdown()
+
+    mock_generate.assert_not_called()
+    mock_create.assert_not_called()
+    assert bot.quota.used("10") == 0
+    assert pool.stats()['expired'] == 1
+
+def test_quota_charged_only_on_successful_post():
+    """A failed post leaves the quota untouched; concurrent posts stop at the limit"""
+    bot = TwitterBot()
+    bot.max_daily_replies = 2
+    pool = ReplyWorkerPool(bot, generate_concurrency=4, post_concurrency=4)
+    jobs = [(str(i), "10", "alice", f"Tweet {i}") for i in range(4)]
+
+    with patch('src.workers.generate_response', return_value="Nice"), \
+         patch.object(bot.client, 'create_tweet', side_effect=Exception("boom")):
+        assert pool.run(jobs[:1]) == []
+    assert bot.quota.used("10") == 0
+
+    with patch('src.workers.generate_response', return_value="Nice"), \
+         patch.object(bot.client, 'create_tweet') as mock_create:
+        replied = pool.run(jobs)
+    pool.shutdown()
+
+    assert len(replied) == 2
+    assert mock_create.call_count == 2
+    assert bot.quota.used("10") == 2